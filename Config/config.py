@@ -16,9 +16,27 @@ class Config:
     MYSQL_PORT = int(os.environ.get('MYSQL_PORT', 3306))
 
     # URI de conexión MySQL
-    SQLALCHEMY_DATABASE_URI = f'mysql+mysqlconnector://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}'
+    # DATABASE_URL permite otra base de datos (p. ej. sqlite:////tmp/primario.db en pruebas locales)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
+        f'mysql+mysqlconnector://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Pool de conexiones: pre_ping descarta conexiones cerradas por wait_timeout
+    # y recycle las renueva antes de que MySQL las corte
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),  # segundos (entero) esperando conexión
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # segundos, menor que wait_timeout
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true',
+    }
+
+    # Réplicas de lectura (URIs separadas por comas): las vistas públicas GET
+    # leen de ellas mientras su retraso no pase de DB_REPLICA_MAX_LAG segundos
+    DB_REPLICA_URIS = [uri.strip() for uri in os.environ.get('DB_REPLICA_URIS', '').split(',') if uri.strip()]
+    DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 5))
+    DB_REPLICA_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_CHECK_INTERVAL', 1))
+
     # Security
     SECRET_KEY = os.environ.get('SECRET_KEY', 'clave-secreta-parnet-2024')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secreto-parnet-2024')
@@ -31,6 +49,41 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
 
+    # Cola de envío de emails: workers fijos y cola acotada
+    EMAIL_WORKERS = int(os.environ.get('EMAIL_WORKERS', 2))
+    EMAIL_QUEUE_SIZE = int(os.environ.get('EMAIL_QUEUE_SIZE', 100))
+    EMAIL_QUEUE_OVERFLOW = os.environ.get('EMAIL_QUEUE_OVERFLOW', 'block').lower()  # block, drop_new, drop_oldest, sync
+    EMAIL_QUEUE_TIMEOUT = float(os.environ.get('EMAIL_QUEUE_TIMEOUT', 5))  # segundos esperando lugar (block)
+    EMAIL_DRAIN_TIMEOUT = float(os.environ.get('EMAIL_DRAIN_TIMEOUT', 10))  # segundos para vaciar la cola al detenerse
+    EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 10))  # mensajes en cola que un worker envía por la misma conexión
+
+    # Conexiones SMTP persistentes (ver Utils/smtp_pool.py)
+    MAIL_POOL_ENABLED = os.environ.get('MAIL_POOL_ENABLED', 'True').lower() == 'true'
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE', 2))  # conexiones autenticadas abiertas como máximo
+    MAIL_POOL_IDLE_TIMEOUT = float(os.environ.get('MAIL_POOL_IDLE_TIMEOUT', 30))  # segundos antes de descartar una conexión ociosa
+    MAIL_POOL_MAX_MESSAGES = int(os.environ.get('MAIL_POOL_MAX_MESSAGES', 100))  # mensajes por conexión antes de renovarla
+
+    # Outbox de emails (tabla email_outbox, ver Utils/email_outbox.py)
+    EMAIL_OUTBOX_ENABLED = os.environ.get('EMAIL_OUTBOX_ENABLED', 'True').lower() == 'true'
+    EMAIL_OUTBOX_POLL_INTERVAL = float(os.environ.get('EMAIL_OUTBOX_POLL_INTERVAL', 5))  # segundos entre pasadas del relay
+    EMAIL_OUTBOX_BATCH = int(os.environ.get('EMAIL_OUTBOX_BATCH', 20))  # filas reclamadas por consulta
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 8))
+    EMAIL_OUTBOX_BACKOFF_BASE = float(os.environ.get('EMAIL_OUTBOX_BACKOFF_BASE', 30))  # segundos tras el primer fallo
+    EMAIL_OUTBOX_BACKOFF_MAX = float(os.environ.get('EMAIL_OUTBOX_BACKOFF_MAX', 3600))  # tope de espera entre intentos
+    EMAIL_OUTBOX_LEASE = float(os.environ.get('EMAIL_OUTBOX_LEASE', 300))  # segundos que una fila reclamada es de un worker
+    EMAIL_OUTBOX_SKIP_LOCKED = os.environ.get('EMAIL_OUTBOX_SKIP_LOCKED', 'True').lower() == 'true'  # False en MySQL < 8
+    EMAIL_OUTBOX_RETENTION_DAYS = int(os.environ.get('EMAIL_OUTBOX_RETENTION_DAYS', 30))  # 0 = no borrar enviados
+
+    # Resumen de notificaciones al administrador (ver Utils/email_digest.py)
+    EMAIL_DIGEST_ENABLED = os.environ.get('EMAIL_DIGEST_ENABLED', 'False').lower() == 'true'
+    EMAIL_DIGEST_WINDOW = float(os.environ.get('EMAIL_DIGEST_WINDOW', 300))  # segundos que se juntan eventos antes del resumen
+    EMAIL_DIGEST_MAX_EVENTS = int(os.environ.get('EMAIL_DIGEST_MAX_EVENTS', 20))  # eventos que disparan el resumen antes de la ventana
+    EMAIL_DIGEST_TYPES = os.environ.get('EMAIL_DIGEST_TYPES', 'contacto,sugerencia,solicitud_servicio')  # tipo[:ventana[:máximo]] separados por comas
+    EMAIL_DIGEST_PRIORITY_SERVICES = [
+        servicio.strip() for servicio in os.environ.get('EMAIL_DIGEST_PRIORITY_SERVICES', '').split(',') if servicio.strip()
+    ]  # ids o nombres de servicio cuyas solicitudes se envían al momento
+    EMAIL_DIGEST_CHECK_INTERVAL = float(os.environ.get('EMAIL_DIGEST_CHECK_INTERVAL', 15))  # segundos entre revisiones de las ventanas
+
     # File Uploads
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
@@ -42,6 +95,62 @@ class Config:
         'http://127.0.0.1:3000'
     ]
 
+    # Estadísticas del sitio
+    DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    STATS_BACKEND = os.environ.get('STATS_BACKEND', 'sqlite')  # sqlite (compartido entre workers), memory
+    STATS_SQLITE_PATH = os.environ.get('STATS_SQLITE_PATH', os.path.join(DATA_FOLDER, 'estadisticas.sqlite3'))
+    STATS_SESSION_TIMEOUT = int(os.environ.get('STATS_SESSION_TIMEOUT', 3600))  # segundos
+    STATS_MAX_SESSIONS = int(os.environ.get('STATS_MAX_SESSIONS', 10000))
+    STATS_EXPIRE_STEP = int(os.environ.get('STATS_EXPIRE_STEP', 500))  # sesiones expiradas por pasada
+    STATS_CLEANUP_INTERVAL = int(os.environ.get('STATS_CLEANUP_INTERVAL', 60))  # segundos entre pasadas de expiración
+    STATS_TOP_PAGES = int(os.environ.get('STATS_TOP_PAGES', 100))  # páginas rastreadas (Space-Saving)
+    STATS_HLL_PRECISION = int(os.environ.get('STATS_HLL_PRECISION', 12))  # 2^12 registros = 4 KB por día
+    STATS_RETENTION_DAYS = int(os.environ.get('STATS_RETENTION_DAYS', 30))
+    STATS_BUFFER_SIZE = int(os.environ.get('STATS_BUFFER_SIZE', 4096))  # visitas por hilo
+    STATS_FLUSH_INTERVAL = float(os.environ.get('STATS_FLUSH_INTERVAL', 2))  # segundos
+    STATS_ROLLUP_FLUSH_INTERVAL = float(os.environ.get('STATS_ROLLUP_FLUSH_INTERVAL', 60))  # segundos
+    STATS_ROLLUP_MAX_POINTS = int(os.environ.get('STATS_ROLLUP_MAX_POINTS', 1500))
+    STATS_ROLLUP_MINUTE_RETENTION_DAYS = int(os.environ.get('STATS_ROLLUP_MINUTE_RETENTION_DAYS', 2))  # 0 = no borrar
+    STATS_ROLLUP_HOUR_RETENTION_DAYS = int(os.environ.get('STATS_ROLLUP_HOUR_RETENTION_DAYS', 90))  # los de día no se borran
+
+    # Visitas de noticias: se acumulan por worker y se escriben cada N segundos
+    VIEW_COUNTER_BUFFERED = os.environ.get('VIEW_COUNTER_BUFFERED', 'True').lower() == 'true'
+    VIEW_COUNTER_FLUSH_INTERVAL = float(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL', 5))  # segundos
+
+    # Dashboard
+    DASHBOARD_COUNTERS_ENABLED = os.environ.get('DASHBOARD_COUNTERS_ENABLED', 'True').lower() == 'true'
+    DASHBOARD_RECONCILE_INTERVAL = int(os.environ.get('DASHBOARD_RECONCILE_INTERVAL', 600))  # segundos
+
+    # Búsqueda
+    SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 1000))  # ids por búsqueda en listados
+    AUTOCOMPLETE_MAX_ENTRIES = int(os.environ.get('AUTOCOMPLETE_MAX_ENTRIES', 200000))  # claves en memoria (~190 bytes c/u: ~36 MB por worker)
+    AUTOCOMPLETE_REFRESH_INTERVAL = int(os.environ.get('AUTOCOMPLETE_REFRESH_INTERVAL', 600))  # segundos
+
+    # Paginación
+    PAGINATION_COUNT_TTL = int(os.environ.get('PAGINATION_COUNT_TTL', 60))  # segundos (include_total=estimate)
+    PAGINATION_COUNT_CACHE_SIZE = int(os.environ.get('PAGINATION_COUNT_CACHE_SIZE', 1024))
+
+    # Caché de respuestas públicas y GET condicional
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))  # segundos, respaldo
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 2048))
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    CONDITIONAL_GET_ENABLED = os.environ.get('CONDITIONAL_GET_ENABLED', 'True').lower() == 'true'  # ETag / 304
+    APP_RELEASE = os.environ.get('APP_RELEASE')  # versión desplegada; por defecto, fecha de los archivos
+    TABLE_VERSIONS_PATH = os.environ.get('TABLE_VERSIONS_PATH') or os.path.join(DATA_FOLDER, 'versiones')
+
+    # Assets estáticos (static/dist con hash, .gz y .br)
+    ASSETS_ENABLED = os.environ.get('ASSETS_ENABLED', 'True').lower() == 'true'
+    ASSETS_BUILD_ON_STARTUP = os.environ.get('ASSETS_BUILD_ON_STARTUP', 'True').lower() == 'true'
+    ASSET_BUNDLES = {}  # {'js/sitio.js': ['js/a.js', 'js/b.js']}: se concatenan y minifican juntos
+
+    # Páginas del frontend pre-renderizadas y plantillas compiladas en disco
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'True').lower() == 'true'
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR', os.path.join(DATA_FOLDER, 'jinja'))  # '' desactiva
+
+    # Presupuesto de consultas SQL por endpoint: off, warn o raise (pruebas)
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'off').lower()
+
     # Debug
     DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
 
@@ -50,4 +159,5 @@ class Config:
 config = Config()
 
 # Crear directorio de uploads si no existe
-os.makedirs(config.UPLOAD_FOLDER, exist_ok=True)
\ No newline at end of file
+os.makedirs(config.UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(config.DATA_FOLDER, exist_ok=True)
\ No newline at end of file
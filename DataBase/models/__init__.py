@@ -33,8 +33,6 @@ class BaseModel(db.Model):
             return False
 
     def to_dict(self):
-        """Convertir objeto a diccionario"""
-        return {
-            column.name: getattr(self, column.name)
-            for column in self.__table__.columns
-        }
\ No newline at end of file
+        """Convertir objeto a diccionario (todas las columnas, función compilada por modelo)"""
+        from Utils.serializers import serializers
+        return serializers.columnas(type(self))(self)
\ No newline at end of file
@@ -0,0 +1,23 @@
+from . import db, BaseModel
+
+
+class TerminoBusqueda(BaseModel):
+    """
+    Índice invertido para la búsqueda de productos, servicios y noticias.
+    Cada fila es un término normalizado (minúsculas, sin acentos) de un
+    documento con su peso; las búsquedas por prefijo usan el índice de
+    `termino` en lugar de recorrer las tablas con LIKE '%texto%'.
+    """
+    __tablename__ = 'indice_busqueda'
+    __table_args__ = (
+        db.Index('ix_indice_busqueda_termino', 'termino'),
+        db.Index('ix_indice_busqueda_documento', 'tipo', 'documento_id'),
+    )
+
+    termino = db.Column(db.String(64), nullable=False)
+    tipo = db.Column(db.String(20), nullable=False)  # producto, servicio, noticia
+    documento_id = db.Column(db.Integer, nullable=False)
+    peso = db.Column(db.Float, nullable=False, default=1.0)
+
+    def __repr__(self):
+        return f'<TerminoBusqueda {self.termino} {self.tipo}:{self.documento_id}>'
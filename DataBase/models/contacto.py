@@ -3,6 +3,9 @@ from . import db, BaseModel
 
 class Contacto(BaseModel):
     __tablename__ = 'contactos'
+    __table_args__ = (
+        db.Index('ix_contactos_fecha_creacion_id', 'fecha_creacion', 'id'),
+    )
 
     nombre = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), nullable=False)
@@ -17,6 +20,9 @@ class Contacto(BaseModel):
 
 class Sugerencia(BaseModel):
     __tablename__ = 'sugerencias'
+    __table_args__ = (
+        db.Index('ix_sugerencias_fecha_creacion_id', 'fecha_creacion', 'id'),
+    )
 
     nombre = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), nullable=False)
@@ -1,7 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """
+    Sesión que puede leer de una réplica.
+    Cuando session.info['replica'] tiene un engine (lo asigna replica_router
+    en las vistas públicas de solo lectura) los SELECT se envían a ese engine;
+    los flush, INSERT/UPDATE/DELETE y todas las lecturas posteriores a una
+    escritura en la misma sesión van al primario.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['escritura'] = True
+            elif getattr(clause, 'is_select', False) and not self.info.get('escritura'):
+                replica = self.info.get('replica')
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
 def init_db(app):
@@ -16,4 +38,4 @@ def init_db(app):
             print("✅ Base de datos inicializada correctamente")
             print(f"✅ Base de datos: {app.config['MYSQL_DATABASE']}")
         except Exception as e:
-            print(f"❌ Error inicializando base de datos: {e}")
\ No newline at end of file
+            print(f"❌ Error inicializando base de datos: {e}")
@@ -0,0 +1,40 @@
+from . import db, BaseModel
+from datetime import datetime
+
+
+class EmailOutbox(BaseModel):
+    """
+    Email pendiente de enviar (patrón outbox).
+    La fila se escribe en la misma transacción que el registro que la origina
+    (contacto, solicitud, sugerencia), así que si el registro se guarda el
+    email queda guardado también. El relay de Utils.email_outbox la reclama,
+    la envía y la marca como enviada o la reprograma con backoff.
+    Las notificaciones que van en un resumen (Utils.email_digest) esperan
+    como retenidas hasta que el resumen que las incluye pasa a pendiente.
+    """
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_estado_proximo', 'estado', 'proximo_intento'),
+    )
+
+    ESTADOS = ('pendiente', 'enviando', 'enviado', 'fallido', 'retenido', 'resumido')
+
+    tipo = db.Column(db.String(50), nullable=False)  # contacto, solicitud_servicio, sugerencia...
+    asunto = db.Column(db.String(255), nullable=False)
+    remitente = db.Column(db.String(255))
+    destinatarios = db.Column(db.JSON, nullable=False)
+    reply_to = db.Column(db.String(255))
+    cuerpo_texto = db.Column(db.Text)
+    cuerpo_html = db.Column(db.Text)
+    datos = db.Column(db.JSON)  # campos del evento para el resumen (solo las retenidas)
+
+    estado = db.Column(db.String(20), nullable=False, default='pendiente')
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    proximo_intento = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    bloqueado_hasta = db.Column(db.DateTime)  # fin del reclamo de un relay (estado enviando)
+    reclamo = db.Column(db.String(32))  # token del relay que tiene la fila (o del resumen que la incluyó)
+    ultimo_error = db.Column(db.Text)
+    fecha_envio = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.estado}>'
@@ -0,0 +1,38 @@
+from . import db, BaseModel
+
+
+class VisitaRollup(BaseModel):
+    """
+    Agregados de visitas por periodo (minuto, hora o día).
+    Una fila por (granularidad, periodo): cada volcado suma su incremento
+    con un upsert atómico, así varios workers escriben sin
+    leer-modificar-escribir y la tabla no crece con cada volcado.
+    """
+    __tablename__ = 'visitas_rollup'
+    __table_args__ = (
+        db.Index('uq_visitas_rollup_granularidad_periodo', 'granularidad', 'periodo', unique=True),
+    )
+
+    GRANULARIDADES = ('minute', 'hour', 'day')
+
+    granularidad = db.Column(db.String(10), nullable=False)  # minute, hour, day
+    periodo = db.Column(db.DateTime, nullable=False)  # inicio del bucket (hora local)
+    visitas = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<VisitaRollup {self.granularidad} {self.periodo}: {self.visitas}>'
+
+
+class ContadorDashboard(BaseModel):
+    """
+    Contadores materializados del dashboard (totales por modelo, estado, estatus y día).
+    Se mantienen en la misma transacción que las escrituras de los modelos y
+    una tarea periódica los reconcilia contra los conteos reales.
+    """
+    __tablename__ = 'contadores_dashboard'
+
+    clave = db.Column(db.String(120), unique=True, nullable=False)
+    valor = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ContadorDashboard {self.clave}={self.valor}>'
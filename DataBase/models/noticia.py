@@ -3,20 +3,31 @@ from . import db, BaseModel
 
 class Noticia(BaseModel):
     __tablename__ = 'noticias'
+    __table_args__ = (
+        db.Index('ix_noticias_fecha_publicacion_id', 'fecha_publicacion', 'id'),
+    )
 
     titulo = db.Column(db.String(200), nullable=False)
     contenido = db.Column(db.Text, nullable=False)
     resumen = db.Column(db.String(500))
     imagen = db.Column(db.String(255))
     autor = db.Column(db.String(100))
-    fecha_publicacion = db.Column(db.DateTime, default=db.func.current_timestamp())
+    fecha_publicacion = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
     visitas = db.Column(db.Integer, default=0)
     etiquetas = db.Column(db.JSON)  # Lista de etiquetas
 
     def incrementar_visitas(self):
-        """Incrementar contador de visitas"""
-        self.visitas += 1
-        self.save()
+        """Incrementar contador de visitas (escritura diferida, ver Utils.view_counter)"""
+        from Utils.view_counter import view_counter
+        view_counter.incrementar(self.id)
 
     def __repr__(self):
-        return f'<Noticia {self.titulo}>'
\ No newline at end of file
+        return f'<Noticia {self.titulo}>'
+
+
+# Inicio del contenido calculado en la consulta, para listados que no deben traer
+# el texto completo. Diferido: solo se lee cuando se pide explícitamente
+Noticia.extracto = db.column_property(
+    db.func.substr(Noticia.contenido, 1, 200),
+    deferred=True
+)
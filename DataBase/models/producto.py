@@ -14,7 +14,8 @@ class CategoriaProducto(BaseModel):
 
     def to_dict(self):
         data = super().to_dict()
-        data['total_productos'] = len(self.productos)
+        # Conteo por subconsulta (total_productos) en vez de cargar la colección
+        data['total_productos'] = self.total_productos
         return data
 
 
@@ -54,3 +55,14 @@ class Producto(BaseModel):
 
     def __repr__(self):
         return f'<Producto {self.nombre}>'
+
+
+# Total de productos por categoría como subconsulta correlacionada. Diferida: solo
+# se calcula al leerla o con .options(undefer(CategoriaProducto.total_productos))
+CategoriaProducto.total_productos = db.column_property(
+    db.select(db.func.count(Producto.id))
+    .where(Producto.categoria_id == CategoriaProducto.id)
+    .correlate_except(Producto)
+    .scalar_subquery(),
+    deferred=True
+)
@@ -0,0 +1,17 @@
+from . import db, BaseModel
+
+
+class LatidoReplica(BaseModel):
+    """
+    Latido para medir el retraso de las réplicas.
+    Cada worker escribe periódicamente en el primario la hora actual (fila
+    id=1) y la lee en cada réplica: la diferencia es el retraso de replicación
+    y, como la réplica aplica los cambios en orden, una marca posterior a la
+    última escritura confirmada indica que la réplica ya la tiene.
+    """
+    __tablename__ = 'replica_latido'
+
+    marca = db.Column(db.Float, nullable=False)  # time.time() del worker que escribió
+
+    def __repr__(self):
+        return f'<LatidoReplica {self.marca}>'
@@ -16,12 +16,16 @@ class Servicio(BaseModel):
 
     def to_dict(self):
         data = super().to_dict()
-        data['total_solicitudes'] = len(self.solicitudes)
+        # Conteo por subconsulta (total_solicitudes) en vez de cargar la colección
+        data['total_solicitudes'] = self.total_solicitudes
         return data
 
 
 class SolicitudServicio(BaseModel):
     __tablename__ = 'solicitudes_servicios'
+    __table_args__ = (
+        db.Index('ix_solicitudes_servicios_fecha_creacion_id', 'fecha_creacion', 'id'),
+    )
 
     servicio_id = db.Column(db.Integer, db.ForeignKey('servicios.id'), nullable=False)
     nombre_cliente = db.Column(db.String(100), nullable=False)
@@ -32,4 +36,15 @@ class SolicitudServicio(BaseModel):
     estado = db.Column(db.String(20), default='pendiente')  # pendiente, en_proceso, atendido
 
     def __repr__(self):
-        return f'<SolicitudServicio {self.nombre_cliente}>'
\ No newline at end of file
+        return f'<SolicitudServicio {self.nombre_cliente}>'
+
+
+# Total de solicitudes por servicio como subconsulta correlacionada. Diferida: solo
+# se calcula al leerla o con .options(undefer(Servicio.total_solicitudes))
+Servicio.total_solicitudes = db.column_property(
+    db.select(db.func.count(SolicitudServicio.id))
+    .where(SolicitudServicio.servicio_id == Servicio.id)
+    .correlate_except(SolicitudServicio)
+    .scalar_subquery(),
+    deferred=True
+)
@@ -3,7 +3,9 @@ from flask_jwt_extended import jwt_required
 from DataBase.models.contacto import Contacto, Sugerencia
 from DataBase.models.database import db
 from Utils.email_sender import email_sender
-import datetime
+from Utils.dashboard_aggregator import dashboard_aggregator
+from Utils.pagination import keyset_paginate, offset_paginate, parse_include_total, CursorError
+from Utils.query_budget import query_budget
 
 contactos_bp = Blueprint('contactos', __name__)
 
@@ -31,9 +33,8 @@ def crear_contacto():
         )
 
         db.session.add(contacto)
-        db.session.commit()
 
-        # Enviar email de notificación
+        # Email de notificación al outbox: se guarda en la misma transacción
         try:
             email_sender.send_contact_email({
                 'nombre': contacto.nombre,
@@ -45,6 +46,8 @@ def crear_contacto():
         except Exception as email_error:
             print(f"❌ Error enviando email de contacto: {email_error}")
 
+        db.session.commit()
+
         return jsonify({
             'success': True,
             'message': 'Mensaje enviado correctamente',
@@ -63,24 +66,32 @@ def crear_contacto():
 
 @contactos_bp.route('/contactos', methods=['GET'])
 @jwt_required()
+@query_budget.limit(2)
 def listar_contactos():
     """Listar todos los contactos (admin)"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
-
-        contactos = Contacto.query.order_by(Contacto.fecha_creacion.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        cursor = request.args.get('cursor')
+        include_total = parse_include_total(request.args.get('include_total'))
+
+        if cursor is not None:
+            items, paginacion = keyset_paginate(
+                Contacto.query, [(Contacto.fecha_creacion, True), (Contacto.id, True)], cursor, per_page
+            )
+        else:
+            items, paginacion = offset_paginate(
+                Contacto.query.order_by(Contacto.fecha_creacion.desc()), page, per_page, include_total
+            )
 
         return jsonify({
             'success': True,
-            'contactos': [contacto.to_dict() for contacto in contactos.items],
-            'total': contactos.total,
-            'pages': contactos.pages,
-            'current_page': page
+            'contactos': [contacto.to_dict() for contacto in items],
+            **paginacion
         })
 
+    except CursorError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -107,14 +118,16 @@ def crear_sugerencia():
         )
 
         db.session.add(sugerencia)
-        db.session.commit()
+        db.session.flush()  # fecha_creacion para el email
 
-        # Enviar email de notificación
+        # Email de notificación al outbox: se guarda en la misma transacción
         try:
             email_sender.send_suggestion_email(sugerencia)
         except Exception as email_error:
             print(f"❌ Error enviando email de sugerencia: {email_error}")
 
+        db.session.commit()
+
         return jsonify({
             'success': True,
             'message': 'Sugerencia enviada correctamente',
@@ -133,24 +146,32 @@ def crear_sugerencia():
 
 @contactos_bp.route('/sugerencias', methods=['GET'])
 @jwt_required()
+@query_budget.limit(2)
 def listar_sugerencias():
     """Listar todas las sugerencias (admin)"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
-
-        sugerencias = Sugerencia.query.order_by(Sugerencia.fecha_creacion.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        cursor = request.args.get('cursor')
+        include_total = parse_include_total(request.args.get('include_total'))
+
+        if cursor is not None:
+            items, paginacion = keyset_paginate(
+                Sugerencia.query, [(Sugerencia.fecha_creacion, True), (Sugerencia.id, True)], cursor, per_page
+            )
+        else:
+            items, paginacion = offset_paginate(
+                Sugerencia.query.order_by(Sugerencia.fecha_creacion.desc()), page, per_page, include_total
+            )
 
         return jsonify({
             'success': True,
-            'sugerencias': [sugerencia.to_dict() for sugerencia in sugerencias.items],
-            'total': sugerencias.total,
-            'pages': sugerencias.pages,
-            'current_page': page
+            'sugerencias': [sugerencia.to_dict() for sugerencia in items],
+            **paginacion
         })
 
+    except CursorError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -198,27 +219,9 @@ def eliminar_sugerencia(sugerencia_id):
 def estadisticas_contactos():
     """Estadísticas de contactos y sugerencias"""
     try:
-        # Contactos de los últimos 30 días
-        fecha_limite = datetime.datetime.utcnow() - datetime.timedelta(days=30)
-
-        total_contactos = Contacto.query.count()
-        contactos_30_dias = Contacto.query.filter(
-            Contacto.fecha_creacion >= fecha_limite
-        ).count()
-
-        total_sugerencias = Sugerencia.query.count()
-        sugerencias_30_dias = Sugerencia.query.filter(
-            Sugerencia.fecha_creacion >= fecha_limite
-        ).count()
-
         return jsonify({
             'success': True,
-            'estadisticas': {
-                'total_contactos': total_contactos,
-                'contactos_30_dias': contactos_30_dias,
-                'total_sugerencias': total_sugerencias,
-                'sugerencias_30_dias': sugerencias_30_dias
-            }
+            'estadisticas': dashboard_aggregator.estadisticas_contactos()
         })
 
     except Exception as e:
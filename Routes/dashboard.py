@@ -1,12 +1,17 @@
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required
-from DataBase.models.producto import Producto, CategoriaProducto
-from DataBase.models.servicio import Servicio, SolicitudServicio
-from DataBase.models.cliente import Cliente
+from DataBase.models.producto import Producto
+from DataBase.models.servicio import SolicitudServicio
 from DataBase.models.contacto import Contacto, Sugerencia
-from DataBase.models.noticia import Noticia
-from DataBase.models.database import db
-from datetime import datetime, timedelta
+from Utils.dashboard_aggregator import dashboard_aggregator
+from Utils.dashboard_counters import dashboard_counters
+from Utils.response_cache import response_cache
+from Utils.db_pool import pool_monitor
+from Utils.db_replica import replica_router
+from Utils.email_dispatcher import email_dispatcher
+from Utils.email_outbox import email_outbox
+from Utils.smtp_pool import smtp_pool
+from Utils.email_digest import email_digest
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -16,119 +21,7 @@ dashboard_bp = Blueprint('dashboard', __name__)
 def get_estadisticas():
     """Obtener estadísticas para el dashboard del admin"""
     try:
-        # Productos por categoría
-        productos_por_categoria = []
-        try:
-            productos_por_categoria = db.session.query(
-                CategoriaProducto.nombre,
-                db.func.count(Producto.id)
-            ).join(Producto).filter(
-                Producto.activo == True
-            ).group_by(CategoriaProducto.id).all()
-        except Exception:
-            # Si falla, usar datos vacíos
-            pass
-
-        # Servicios más solicitados
-        servicios_solicitados = []
-        try:
-            servicios_solicitados = db.session.query(
-                Servicio.nombre,
-                db.func.count(SolicitudServicio.id)
-            ).join(SolicitudServicio).group_by(Servicio.id).all()
-        except Exception:
-            pass
-
-        # Solicitudes por estado
-        solicitudes_por_estado = []
-        try:
-            solicitudes_por_estado = db.session.query(
-                SolicitudServicio.estado,
-                db.func.count(SolicitudServicio.id)
-            ).group_by(SolicitudServicio.estado).all()
-        except Exception:
-            pass
-
-        # Productos por estatus
-        productos_por_estatus = []
-        try:
-            productos_por_estatus = db.session.query(
-                Producto.estatus,
-                db.func.count(Producto.id)
-            ).filter(Producto.activo == True).group_by(Producto.estatus).all()
-        except Exception:
-            pass
-
-        # Estadísticas generales
-        total_productos = Producto.query.filter_by(activo=True).count()
-        total_servicios = Servicio.query.filter_by(activo=True).count()
-        total_clientes = Cliente.query.filter_by(activo=True).count()
-        total_contactos = Contacto.query.count()
-        total_sugerencias = Sugerencia.query.count()
-        total_noticias = Noticia.query.filter_by(activa=True).count()
-
-        # Solicitudes pendientes
-        solicitudes_pendientes = 0
-        try:
-            solicitudes_pendientes = SolicitudServicio.query.filter_by(estado='pendiente').count()
-        except Exception:
-            pass
-
-        # Productos agotados
-        productos_agotados = 0
-        try:
-            productos_agotados = Producto.query.filter_by(estatus='agotado', activo=True).count()
-        except Exception:
-            pass
-
-        # Estadísticas de los últimos 30 días
-        fecha_limite = datetime.utcnow() - timedelta(days=30)
-
-        nuevas_solicitudes = 0
-        nuevos_contactos = 0
-
-        try:
-            nuevas_solicitudes = SolicitudServicio.query.filter(
-                SolicitudServicio.fecha_creacion >= fecha_limite
-            ).count()
-
-            nuevos_contactos = Contacto.query.filter(
-                Contacto.fecha_creacion >= fecha_limite
-            ).count()
-        except Exception:
-            pass
-
-        return jsonify({
-            'success': True,
-            'productos_por_categoria': [
-                {'categoria': cat, 'cantidad': cant}
-                for cat, cant in productos_por_categoria
-            ],
-            'servicios_solicitados': [
-                {'servicio': serv, 'solicitudes': cant}
-                for serv, cant in servicios_solicitados
-            ],
-            'solicitudes_por_estado': [
-                {'estado': est, 'cantidad': cant}
-                for est, cant in solicitudes_por_estado
-            ],
-            'productos_por_estatus': [
-                {'estatus': est, 'cantidad': cant}
-                for est, cant in productos_por_estatus
-            ],
-            'estadisticas_generales': {
-                'total_productos': total_productos,
-                'total_servicios': total_servicios,
-                'total_clientes': total_clientes,
-                'total_contactos': total_contactos,
-                'total_sugerencias': total_sugerencias,
-                'total_noticias': total_noticias,
-                'solicitudes_pendientes': solicitudes_pendientes,
-                'productos_agotados': productos_agotados,
-                'nuevas_solicitudes_30d': nuevas_solicitudes,
-                'nuevos_contactos_30d': nuevos_contactos
-            }
-        })
+        return jsonify({'success': True, **dashboard_aggregator.estadisticas()})
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -186,27 +79,66 @@ def get_actividad_reciente():
 def get_resumen():
     """Resumen rápido para el dashboard"""
     try:
-        total_productos = Producto.query.filter_by(activo=True).count()
-        total_servicios = Servicio.query.filter_by(activo=True).count()
-        total_clientes = Cliente.query.filter_by(activo=True).count()
-        total_contactos = Contacto.query.count()
+        return jsonify({
+            'success': True,
+            'resumen': dashboard_aggregator.resumen()
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+
+@dashboard_bp.route('/contadores/reconciliar', methods=['POST'])
+@jwt_required()
+def reconciliar_contadores():
+    """Forzar la reconciliación de los contadores materializados"""
+    try:
+        deriva = dashboard_counters.reconcile()
+        return jsonify({
+            'success': True,
+            'message': f'Se corrigieron {len(deriva)} contadores',
+            'deriva': deriva
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
-        # Contactos de hoy
-        hoy = datetime.utcnow().date()
-        contactos_hoy = Contacto.query.filter(
-            db.func.date(Contacto.fecha_creacion) == hoy
-        ).count()
 
+@dashboard_bp.route('/cache', methods=['GET'])
+@jwt_required()
+def get_estado_cache():
+    """Contadores de la caché de respuestas públicas (hits, misses, evictions)"""
+    try:
+        return jsonify({'success': True, 'cache': response_cache.stats()})
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@dashboard_bp.route('/pool', methods=['GET'])
+@jwt_required()
+def get_estado_pool():
+    """Estado de los pools de conexiones (en uso, overflow, esperas, timeouts) y retraso de las réplicas"""
+    try:
+        return jsonify({'success': True, 'pools': pool_monitor.stats(), 'replicas': replica_router.stats()})
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@dashboard_bp.route('/email', methods=['GET'])
+@jwt_required()
+def get_estado_email():
+    """Cola de envío de emails (en cola, en curso, enviados, fallidos, descartados, latencias), outbox, conexiones SMTP y resúmenes"""
+    try:
         return jsonify({
             'success': True,
-            'resumen': {
-                'productos': total_productos,
-                'servicios': total_servicios,
-                'clientes': total_clientes,
-                'contactos_total': total_contactos,
-                'contactos_hoy': contactos_hoy
-            }
+            'email': email_dispatcher.stats(),
+            'outbox': email_outbox.stats(),
+            'smtp': smtp_pool.stats(),
+            'resumen': email_digest.stats()
         })
 
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'error': str(e)}), 500
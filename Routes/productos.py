@@ -1,34 +1,77 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
-from sqlalchemy import or_
 from DataBase.models.producto import Producto, CategoriaProducto
 from DataBase.models.database import db
+from Utils.search_index import search_index
+from Utils.response_cache import response_cache
+from Utils.conditional import conditional_get
+from Utils.pagination import offset_paginate, parse_include_total
+from Utils.serializers import serializers, Campo, ProjectionError
+from Utils.query_budget import query_budget
+from Utils.db_replica import replica_router
 
 productos_bp = Blueprint('productos', __name__)
 
 
+# Perfiles de columnas: las columnas largas (descripcion_larga, especificaciones)
+# y las JSON solo se leen con el perfil "detail" o si se piden en ?fields=
+_CAMPOS_ADMIN = {
+    "id": "id",
+    "nombre": Campo("nombre", ""),
+    "descripcion": Campo("descripcion", ""),
+    "descripcion_corta": "descripcion_corta",
+    "precio": Campo("precio", 0, tipo="float"),
+    "estatus": Campo("estatus", "disponible"),
+    "imagen_url": "imagen_url",
+    "categoria_id": "categoria_id",
+    "categoria": "categoria.nombre",
+    "activo": Campo("activo", True),
+    "stock": Campo("stock", 0),
+    "sku": "sku",
+    "destacado": Campo("destacado", False)
+}
+
+perfiles_producto = serializers.profiles(Producto, {
+    "card": {
+        "id": "id",
+        "nombre": Campo("nombre", ""),
+        "descripcion": Campo("descripcion", ""),
+        "descripcion_corta": Campo("descripcion_corta", ""),
+        "precio": Campo("precio", 0, tipo="float"),
+        "estatus": Campo("estatus", "disponible"),
+        "imagen_url": Campo("imagen_url", ""),
+        "categoria": "categoria.nombre",
+        "stock": Campo("stock", 0),
+        "sku": "sku",
+        "destacado": Campo("destacado", False)
+    },
+    "admin": _CAMPOS_ADMIN,
+    "detail": {
+        **_CAMPOS_ADMIN,
+        "descripcion_larga": "descripcion_larga",
+        "especificaciones": "especificaciones",
+        "imagen_principal": "imagen_principal",
+        "imagenes_adicionales": "imagenes_adicionales",
+        "caracteristicas": "caracteristicas"
+    }
+})
+
+PERFILES_PUBLICOS = ("card", "detail")
+
+producto_admin = perfiles_producto["admin"]
+
+categoria_dict = serializers.compile(CategoriaProducto, {
+    "id": "id",
+    "nombre": Campo("nombre", ""),
+    "descripcion": Campo("descripcion", ""),
+    "activo": Campo("activo", True)
+})
+
+
 def _producto_to_dict(p):
     """Helper para serializar producto a dict"""
     try:
-        categoria_nombre = None
-        if hasattr(p, "categoria") and p.categoria is not None:
-            categoria_nombre = getattr(p.categoria, "nombre", None)
-
-        return {
-            "id": p.id,
-            "nombre": getattr(p, "nombre", ""),
-            "descripcion": getattr(p, "descripcion", ""),
-            "descripcion_corta": getattr(p, "descripcion_corta", None),
-            "precio": float(getattr(p, "precio", 0) or 0),
-            "estatus": getattr(p, "estatus", "disponible"),
-            "imagen_url": getattr(p, "imagen_url", None),
-            "categoria_id": getattr(p, "categoria_id", None),
-            "categoria": categoria_nombre,
-            "activo": getattr(p, "activo", True),
-            "stock": getattr(p, "stock", 0),
-            "sku": getattr(p, "sku", f"PROD-{p.id}"),
-            "destacado": getattr(p, "destacado", False)
-        }
+        return producto_admin(p)
     except Exception as e:
         return {
             "id": p.id,
@@ -40,6 +83,9 @@ def _producto_to_dict(p):
 # ==================== ENDPOINTS PÚBLICOS ====================
 
 @productos_bp.route('/public', methods=['GET'])
+@response_cache.cached('productos', 'categorias_productos')
+@replica_router.prefer_replica('productos', 'categorias_productos')
+@query_budget.limit(3)
 def listar_productos_publicos():
     """Listado público de productos para el frontend"""
     try:
@@ -49,21 +95,20 @@ def listar_productos_publicos():
         destacado = request.args.get('destacado', type=bool)
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 12, type=int)
+        include_total = parse_include_total(request.args.get('include_total'))
+        proyeccion = perfiles_producto.resolve(
+            request.args.get('profile'), request.args.get('fields'), 'card', PERFILES_PUBLICOS
+        )
 
-        # Query base
-        query = Producto.query.filter_by(activo=True)
+        # Query base: solo las columnas del perfil (la categoría en el mismo SELECT)
+        query = Producto.query.options(*proyeccion.options()).filter_by(activo=True)
 
-        # Filtro por texto
+        # Filtro por texto (índice de búsqueda, ordenado por relevancia)
         if texto:
-            like_text = f"%{texto}%"
-            filtros = [Producto.nombre.ilike(like_text)]
-            if hasattr(Producto, "descripcion"):
-                filtros.append(Producto.descripcion.ilike(like_text))
-            if hasattr(Producto, "descripcion_corta"):
-                filtros.append(Producto.descripcion_corta.ilike(like_text))
-            if hasattr(Producto, "sku"):
-                filtros.append(Producto.sku.ilike(like_text))
-            query = query.filter(or_(*filtros))
+            ids = search_index.ids(texto, 'producto', current_app.config.get('SEARCH_MAX_RESULTS', 1000))
+            query = query.filter(Producto.id.in_(ids))
+            if ids:
+                query = query.order_by(search_index.orden_relevancia(Producto, ids))
 
         # Filtro por categoría
         if categoria_id and hasattr(Producto, "categoria_id"):
@@ -74,48 +119,33 @@ def listar_productos_publicos():
             query = query.filter_by(destacado=destacado)
 
         # Paginación
-        productos_pag = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        items, paginacion = offset_paginate(query, page, per_page, include_total)
 
-        resultado = []
-        for p in productos_pag.items:
-            categoria_nombre = None
-            if hasattr(p, "categoria") and getattr(p, "categoria") is not None:
-                categoria_nombre = getattr(p.categoria, "nombre", None)
-
-            producto_dict = {
-                "id": p.id,
-                "nombre": getattr(p, "nombre", ""),
-                "descripcion": getattr(p, "descripcion", ""),
-                "descripcion_corta": getattr(p, "descripcion_corta", ""),
-                "precio": float(getattr(p, "precio", 0) or 0),
-                "estatus": getattr(p, "estatus", "disponible"),
-                "imagen_url": getattr(p, "imagen_url", ""),
-                "categoria": categoria_nombre,
-                "stock": getattr(p, "stock", 0),
-                "sku": getattr(p, "sku", f"PROD-{p.id}"),
-                "destacado": getattr(p, "destacado", False)
-            }
-            resultado.append(producto_dict)
+        resultado = [proyeccion(p) for p in items]
 
         return jsonify({
             "success": True,
             "productos": resultado,
-            "total": productos_pag.total,
-            "pages": productos_pag.pages,
-            "current_page": page
+            **paginacion
         }), 200
 
+    except ProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @productos_bp.route('/public/<int:producto_id>', methods=['GET'])
+@response_cache.cached('productos', 'categorias_productos')
+@replica_router.prefer_replica('productos', 'categorias_productos')
+@query_budget.limit(1)
 def obtener_producto_publico(producto_id):
     """Obtener producto específico para frontend público"""
     try:
-        producto = Producto.query.filter_by(
+        proyeccion = perfiles_producto.resolve(
+            request.args.get('profile'), request.args.get('fields'), 'detail', PERFILES_PUBLICOS
+        )
+        producto = Producto.query.options(*proyeccion.options()).filter_by(
             id=producto_id,
             activo=True
         ).first()
@@ -128,20 +158,25 @@ def obtener_producto_publico(producto_id):
 
         return jsonify({
             "success": True,
-            "producto": _producto_to_dict(producto)
+            "producto": proyeccion(producto)
         }), 200
 
+    except ProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @productos_bp.route('/public/destacados', methods=['GET'])
+@response_cache.cached('productos', 'categorias_productos')
+@replica_router.prefer_replica('productos', 'categorias_productos')
+@query_budget.limit(1)
 def obtener_productos_destacados():
     """Obtener productos destacados"""
     try:
         limit = request.args.get('limit', 6, type=int)
 
-        query = Producto.query.filter_by(activo=True)
+        query = Producto.query.options(*producto_admin.options()).filter_by(activo=True)
 
         # Si existe el campo destacado, filtrar por él
         if hasattr(Producto, 'destacado'):
@@ -162,14 +197,19 @@ def obtener_productos_destacados():
 
 @productos_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional_get.conditional('productos', 'categorias_productos', private=True)
+@query_budget.limit(1)
 def listar_productos_admin():
     """Listado de productos para administración"""
     try:
-        productos = Producto.query.all()
+        proyeccion = perfiles_producto.resolve(request.args.get('profile'), request.args.get('fields'), 'admin')
+        productos = Producto.query.options(*proyeccion.options()).all()
         return jsonify({
             "success": True,
-            "data": [_producto_to_dict(p) for p in productos]
+            "data": [proyeccion(p) for p in productos]
         }), 200
+    except ProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -224,14 +264,19 @@ def crear_producto():
 
 @productos_bp.route('/<int:producto_id>', methods=['GET'])
 @jwt_required()
+@conditional_get.conditional('productos', 'categorias_productos', private=True)
+@query_budget.limit(1)
 def obtener_producto(producto_id):
     """Obtener detalle de un producto (admin)"""
     try:
-        producto = Producto.query.get_or_404(producto_id)
+        proyeccion = perfiles_producto.resolve(request.args.get('profile'), request.args.get('fields'), 'detail')
+        producto = Producto.query.options(*proyeccion.options()).get_or_404(producto_id)
         return jsonify({
             "success": True,
-            "data": _producto_to_dict(producto)
+            "data": proyeccion(producto)
         }), 200
+    except ProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -296,23 +341,16 @@ def eliminar_producto(producto_id):
 # ==================== CATEGORÍAS ====================
 
 @productos_bp.route('/categorias', methods=['GET'])
+@response_cache.cached('categorias_productos')
+@query_budget.limit(1)
 def listar_categorias():
     """Listar categorías de productos"""
     try:
         categorias = CategoriaProducto.query.filter_by(activo=True).all()
 
-        categorias_data = []
-        for cat in categorias:
-            categorias_data.append({
-                "id": cat.id,
-                "nombre": getattr(cat, "nombre", ""),
-                "descripcion": getattr(cat, "descripcion", ""),
-                "activo": getattr(cat, "activo", True)
-            })
-
         return jsonify({
             "success": True,
-            "categorias": categorias_data
+            "categorias": [categoria_dict(cat) for cat in categorias]
         }), 200
 
     except Exception as e:
@@ -1,33 +1,158 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from DataBase.models.producto import Producto, CategoriaProducto
 from DataBase.models.servicio import Servicio
 from DataBase.models.cliente import Cliente
 from DataBase.models.noticia import Noticia
-from DataBase.models.database import db
-from sqlalchemy import or_
+from Utils.search_index import search_index
+from Utils.autocomplete import autocomplete
+from Utils.response_cache import response_cache
+from Utils.pagination import keyset_paginate, offset_paginate, parse_include_total, CursorError
+from Utils.serializers import serializers, Campo, ProjectionError
+from Utils.query_budget import query_budget
+from Utils.db_replica import replica_router
+from Utils.view_counter import view_counter
 
 public_bp = Blueprint('public', __name__)
 
 
+# ==================== SERIALIZADORES ====================
+
+# Perfiles de columnas (?profile=card|detail y ?fields=a,b): los listados no
+# leen las columnas largas ni las JSON
+_CAMPOS_PRODUCTO = {
+    'id': 'id',
+    'nombre': Campo('nombre', ''),
+    'descripcion': Campo('descripcion', ''),
+    'descripcion_corta': Campo('descripcion_corta', ''),
+    'precio': Campo('precio', 0, tipo='float'),
+    'estatus': Campo('estatus', 'disponible'),
+    'imagen_url': Campo('imagen_url', ''),
+    'categoria_id': 'categoria_id',
+    'stock': Campo('stock', 0),
+    'sku': 'sku',
+    'destacado': Campo('destacado', False)
+}
+
+perfiles_producto = serializers.profiles(Producto, {
+    'card': _CAMPOS_PRODUCTO,
+    'detail': {
+        **_CAMPOS_PRODUCTO,
+        'descripcion_larga': 'descripcion_larga',
+        'especificaciones': 'especificaciones',
+        'imagen_principal': 'imagen_principal',
+        'imagenes_adicionales': 'imagenes_adicionales',
+        'caracteristicas': 'caracteristicas'
+    }
+})
+
+producto_destacado = serializers.projection(Producto, {
+    'id': 'id',
+    'nombre': Campo('nombre', ''),
+    'descripcion_corta': Campo('descripcion_corta', ''),
+    'precio': Campo('precio', 0, tipo='float'),
+    'imagen_url': Campo('imagen_url', ''),
+    'destacado': Campo('destacado', False)
+})
+
+categoria_publica = serializers.compile(CategoriaProducto, {
+    'id': 'id',
+    'nombre': Campo('nombre', ''),
+    'descripcion': Campo('descripcion', ''),
+    'activo': Campo('activo', True)
+})
+
+servicio_publico = serializers.compile(Servicio, {
+    'id': 'id',
+    'nombre': Campo('nombre', ''),
+    'descripcion': Campo('descripcion', ''),
+    'precio_base': Campo('precio_base', 0, tipo='float'),
+    'activo': Campo('activo', True)
+})
+
+cliente_publico = serializers.compile(Cliente, {
+    'id': 'id',
+    'nombre': Campo('nombre', ''),
+    'logo_url': Campo('logo_url', ''),
+    'activo': Campo('activo', True)
+})
+
+# En los listados el contenido completo se reemplaza por su extracto (calculado en SQL)
+perfiles_noticia = serializers.profiles(Noticia, {
+    'card': {
+        'id': 'id',
+        'titulo': Campo('titulo', '', vacio=True),
+        'resumen': Campo('resumen', '', vacio=True),
+        'extracto': Campo('extracto', ''),
+        'fecha_publicacion': 'fecha_publicacion',
+        'visitas': Campo('visitas', 0),
+        'autor': Campo('autor', '', vacio=True),
+        'imagen_url': Campo('imagen_url', '')
+    },
+    'detail': {
+        'id': 'id',
+        'titulo': Campo('titulo', '', vacio=True),
+        'resumen': Campo('resumen', '', vacio=True),
+        'contenido': Campo('contenido', '', vacio=True),
+        'fecha_publicacion': 'fecha_publicacion',
+        'visitas': Campo('visitas', 0),
+        'autor': Campo('autor', '', vacio=True),
+        'imagen_url': Campo('imagen_url', '')
+    }
+})
+
+noticia_reciente = serializers.projection(Noticia, {
+    'id': 'id',
+    'titulo': Campo('titulo', '', vacio=True),
+    'fecha_publicacion': 'fecha_publicacion',
+    'visitas': Campo('visitas', 0)
+})
+
+producto_encontrado = serializers.compile(Producto, {
+    'id': 'id',
+    'nombre': Campo('nombre', ''),
+    'descripcion_corta': Campo('descripcion_corta', ''),
+    'precio': Campo('precio', 0, tipo='float'),
+    'tipo': Campo(None, 'producto')
+})
+
+servicio_encontrado = serializers.compile(Servicio, {
+    'id': 'id',
+    'nombre': Campo('nombre', ''),
+    'descripcion': Campo('descripcion', ''),
+    'tipo': Campo(None, 'servicio')
+})
+
+noticia_encontrada = serializers.compile(Noticia, {
+    'id': 'id',
+    'titulo': Campo('titulo', ''),
+    'resumen': Campo('resumen', ''),
+    'tipo': Campo(None, 'noticia')
+})
+
+
 @public_bp.route('/productos', methods=['GET'])
+@response_cache.cached('productos')
+@replica_router.prefer_replica('productos')
+@query_budget.limit(4)
 def get_productos_public():
     """Obtener productos para el frontend público"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 12, type=int)
+        cursor = request.args.get('cursor')
+        include_total = parse_include_total(request.args.get('include_total'))
         search = request.args.get('search', '')
         categoria_id = request.args.get('categoria_id', type=int)
         destacado = request.args.get('destacado', type=bool)
+        proyeccion = perfiles_producto.resolve(request.args.get('profile'), request.args.get('fields'), 'card')
 
-        query = Producto.query.filter_by(activo=True)
+        query = Producto.query.options(*proyeccion.options()).filter_by(activo=True)
 
+        orden = Producto.id.desc()
         if search:
-            query = query.filter(
-                or_(
-                    Producto.nombre.ilike(f'%{search}%'),
-                    Producto.descripcion_corta.ilike(f'%{search}%')
-                )
-            )
+            ids = search_index.ids(search, 'producto', current_app.config.get('SEARCH_MAX_RESULTS', 1000))
+            query = query.filter(Producto.id.in_(ids))
+            orden = search_index.orden_relevancia(Producto, ids) if ids else orden
 
         if categoria_id:
             query = query.filter_by(categoria_id=categoria_id)
@@ -35,43 +160,35 @@ def get_productos_public():
         if destacado is not None and hasattr(Producto, 'destacado'):
             query = query.filter_by(destacado=destacado)
 
-        productos = query.order_by(Producto.id.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-
-        productos_data = []
-        for prod in productos.items:
-            productos_data.append({
-                'id': prod.id,
-                'nombre': getattr(prod, 'nombre', ''),
-                'descripcion': getattr(prod, 'descripcion', ''),
-                'descripcion_corta': getattr(prod, 'descripcion_corta', ''),
-                'precio': float(getattr(prod, 'precio', 0)),
-                'estatus': getattr(prod, 'estatus', 'disponible'),
-                'imagen_url': getattr(prod, 'imagen_url', ''),
-                'categoria_id': getattr(prod, 'categoria_id', None),
-                'stock': getattr(prod, 'stock', 0),
-                'sku': getattr(prod, 'sku', f'PROD-{prod.id}'),
-                'destacado': getattr(prod, 'destacado', False)
-            })
+        if cursor is not None:
+            # Modo cursor: orden estable por id (la relevancia no admite keyset)
+            items, paginacion = keyset_paginate(query, [(Producto.id, True)], cursor, per_page)
+        else:
+            items, paginacion = offset_paginate(query.order_by(orden), page, per_page, include_total)
+
+        productos_data = [proyeccion(prod) for prod in items]
 
         return jsonify({
             'success': True,
             'productos': productos_data,
-            'total': productos.total,
-            'pages': productos.pages,
-            'current_page': page
+            **paginacion
         })
 
+    except (CursorError, ProjectionError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @public_bp.route('/productos/<int:producto_id>', methods=['GET'])
+@response_cache.cached('productos')
+@replica_router.prefer_replica('productos')
+@query_budget.limit(1)
 def get_producto_public(producto_id):
     """Obtener producto específico para frontend público"""
     try:
-        producto = Producto.query.filter_by(
+        proyeccion = perfiles_producto.resolve(request.args.get('profile'), request.args.get('fields'), 'detail')
+        producto = Producto.query.options(*proyeccion.options()).filter_by(
             id=producto_id,
             activo=True
         ).first()
@@ -82,52 +199,36 @@ def get_producto_public(producto_id):
                 'error': 'Producto no encontrado'
             }), 404
 
-        producto_data = {
-            'id': producto.id,
-            'nombre': getattr(producto, 'nombre', ''),
-            'descripcion': getattr(producto, 'descripcion', ''),
-            'descripcion_corta': getattr(producto, 'descripcion_corta', ''),
-            'precio': float(getattr(producto, 'precio', 0)),
-            'estatus': getattr(producto, 'estatus', 'disponible'),
-            'imagen_url': getattr(producto, 'imagen_url', ''),
-            'categoria_id': getattr(producto, 'categoria_id', None),
-            'stock': getattr(producto, 'stock', 0),
-            'sku': getattr(producto, 'sku', f'PROD-{producto.id}'),
-            'destacado': getattr(producto, 'destacado', False)
-        }
+        producto_data = proyeccion(producto)
 
         return jsonify({
             'success': True,
             'producto': producto_data
         })
 
+    except ProjectionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @public_bp.route('/productos/destacados', methods=['GET'])
+@response_cache.cached('productos')
+@replica_router.prefer_replica('productos')
+@query_budget.limit(1)
 def get_productos_destacados():
     """Obtener productos destacados"""
     try:
         limit = request.args.get('limit', 6, type=int)
 
-        query = Producto.query.filter_by(activo=True)
+        query = Producto.query.options(*producto_destacado.options()).filter_by(activo=True)
 
         if hasattr(Producto, 'destacado'):
             query = query.filter_by(destacado=True)
 
         productos = query.order_by(Producto.id.desc()).limit(limit).all()
 
-        productos_data = []
-        for prod in productos:
-            productos_data.append({
-                'id': prod.id,
-                'nombre': getattr(prod, 'nombre', ''),
-                'descripcion_corta': getattr(prod, 'descripcion_corta', ''),
-                'precio': float(getattr(prod, 'precio', 0)),
-                'imagen_url': getattr(prod, 'imagen_url', ''),
-                'destacado': getattr(prod, 'destacado', False)
-            })
+        productos_data = [producto_destacado(prod) for prod in productos]
 
         return jsonify({
             'success': True,
@@ -139,19 +240,15 @@ def get_productos_destacados():
 
 
 @public_bp.route('/categorias', methods=['GET'])
+@response_cache.cached('categorias_productos')
+@replica_router.prefer_replica('categorias_productos')
+@query_budget.limit(1)
 def get_categorias_public():
     """Obtener categorías para frontend público"""
     try:
         categorias = CategoriaProducto.query.filter_by(activo=True).all()
 
-        categorias_data = []
-        for cat in categorias:
-            categorias_data.append({
-                'id': cat.id,
-                'nombre': getattr(cat, 'nombre', ''),
-                'descripcion': getattr(cat, 'descripcion', ''),
-                'activo': getattr(cat, 'activo', True)
-            })
+        categorias_data = [categoria_publica(cat) for cat in categorias]
 
         return jsonify({
             'success': True,
@@ -162,20 +259,15 @@ def get_categorias_public():
 
 
 @public_bp.route('/servicios', methods=['GET'])
+@response_cache.cached('servicios')
+@replica_router.prefer_replica('servicios')
+@query_budget.limit(1)
 def obtener_servicios_publicos():
     """Lista pública de servicios para el frontend"""
     try:
         servicios = Servicio.query.filter_by(activo=True).all()
 
-        servicios_data = []
-        for serv in servicios:
-            servicios_data.append({
-                "id": serv.id,
-                "nombre": getattr(serv, "nombre", ""),
-                "descripcion": getattr(serv, "descripcion", ""),
-                "precio_base": float(getattr(serv, "precio_base", 0)),
-                "activo": getattr(serv, "activo", True)
-            })
+        servicios_data = [servicio_publico(serv) for serv in servicios]
 
         return jsonify({
             "success": True,
@@ -190,19 +282,15 @@ def obtener_servicios_publicos():
 
 
 @public_bp.route('/clientes', methods=['GET'])
+@response_cache.cached('clientes')
+@replica_router.prefer_replica('clientes')
+@query_budget.limit(1)
 def get_clientes_public():
     """Obtener clientes para frontend público"""
     try:
         clientes = Cliente.query.filter_by(activo=True).all()
 
-        clientes_data = []
-        for cliente in clientes:
-            clientes_data.append({
-                'id': cliente.id,
-                'nombre': getattr(cliente, 'nombre', ''),
-                'logo_url': getattr(cliente, 'logo_url', ''),
-                'activo': getattr(cliente, 'activo', True)
-            })
+        clientes_data = [cliente_publico(cliente) for cliente in clientes]
 
         return jsonify({
             'success': True,
@@ -213,56 +301,60 @@ def get_clientes_public():
 
 
 @public_bp.route('/noticias', methods=['GET'])
+@response_cache.cached('noticias')
+@replica_router.prefer_replica('noticias')
+@query_budget.limit(2)
 def get_noticias_public():
     """Obtener noticias para frontend público"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 6, type=int)
+        cursor = request.args.get('cursor')
+        include_total = parse_include_total(request.args.get('include_total'))
+        proyeccion = perfiles_noticia.resolve(request.args.get('profile'), request.args.get('fields'), 'card')
 
-        query = Noticia.query
+        # fecha_publicacion también se lee para armar el cursor
+        query = Noticia.query.options(*proyeccion.options(Noticia.fecha_publicacion))
 
         # Intentar filtrar por activas si existe el campo
         if hasattr(Noticia, 'activa'):
             query = query.filter_by(activa=True)
 
-        # Intentar ordenar por fecha
-        try:
-            query = query.order_by(Noticia.fecha_publicacion.desc())
-        except:
-            query = query.order_by(Noticia.id.desc())
+        if cursor is not None:
+            items, paginacion = keyset_paginate(
+                query, [(Noticia.fecha_publicacion, True), (Noticia.id, True)], cursor, per_page
+            )
+        else:
+            # Intentar ordenar por fecha
+            try:
+                query = query.order_by(Noticia.fecha_publicacion.desc())
+            except:
+                query = query.order_by(Noticia.id.desc())
+
+            items, paginacion = offset_paginate(query, page, per_page, include_total)
 
-        noticias_pag = query.paginate(page=page, per_page=per_page, error_out=False)
-
-        noticias_data = []
-        for n in noticias_pag.items:
-            noticias_data.append({
-                "id": getattr(n, "id", None),
-                "titulo": getattr(n, "titulo", "") or getattr(n, "titulo_noticia", ""),
-                "resumen": getattr(n, "resumen", "") or getattr(n, "descripcion_corta", ""),
-                "contenido": getattr(n, "contenido", "") or getattr(n, "cuerpo", ""),
-                "fecha_publicacion": getattr(n, "fecha_publicacion", None),
-                "visitas": getattr(n, "visitas", 0),
-                "autor": getattr(n, "autor", "") or getattr(n, "creado_por", ""),
-                "imagen_url": getattr(n, "imagen_url", "")
-            })
+        noticias_data = [proyeccion(n) for n in items]
 
         return jsonify({
             "success": True,
             "noticias": noticias_data,
-            "total": noticias_pag.total,
-            "pages": noticias_pag.pages,
-            "current_page": noticias_pag.page
+            **paginacion
         })
 
+    except (CursorError, ProjectionError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @public_bp.route('/noticias/<int:noticia_id>', methods=['GET'])
+@replica_router.prefer_replica('noticias')
+@query_budget.limit(1)
 def get_noticia_public(noticia_id):
     """Obtener noticia específica"""
     try:
-        noticia = Noticia.query.get(noticia_id)
+        proyeccion = perfiles_noticia.resolve(request.args.get('profile'), request.args.get('fields'), 'detail')
+        noticia = Noticia.query.options(*proyeccion.options()).filter_by(id=noticia_id).first()
 
         if not noticia:
             return jsonify({
@@ -270,38 +362,34 @@ def get_noticia_public(noticia_id):
                 "error": "Noticia no encontrada"
             }), 404
 
-        # Incrementar visitas si el campo existe
-        if hasattr(noticia, 'visitas'):
-            noticia.visitas = getattr(noticia, 'visitas', 0) + 1
-            db.session.commit()
-
-        noticia_data = {
-            "id": getattr(noticia, "id", None),
-            "titulo": getattr(noticia, "titulo", "") or getattr(noticia, "titulo_noticia", ""),
-            "resumen": getattr(noticia, "resumen", "") or getattr(noticia, "descripcion_corta", ""),
-            "contenido": getattr(noticia, "contenido", "") or getattr(noticia, "cuerpo", ""),
-            "fecha_publicacion": getattr(noticia, "fecha_publicacion", None),
-            "visitas": getattr(noticia, "visitas", 0),
-            "autor": getattr(noticia, "autor", "") or getattr(noticia, "creado_por", ""),
-            "imagen_url": getattr(noticia, "imagen_url", "")
-        }
+        # La visita se suma en memoria y se escribe en el siguiente volcado
+        view_counter.incrementar(noticia.id)
+
+        noticia_data = proyeccion(noticia)
+        if 'visitas' in noticia_data:
+            noticia_data['visitas'] = view_counter.valor(noticia.id, noticia_data['visitas'])
 
         return jsonify({
             "success": True,
             "noticia": noticia_data
         })
 
+    except ProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @public_bp.route('/noticias/recientes', methods=['GET'])
+@response_cache.cached('noticias')
+@replica_router.prefer_replica('noticias')
+@query_budget.limit(1)
 def get_noticias_recientes():
     """Obtener noticias más recientes"""
     try:
         limit = request.args.get('limit', 3, type=int)
 
-        query = Noticia.query
+        query = Noticia.query.options(*noticia_reciente.options())
 
         if hasattr(Noticia, 'activa'):
             query = query.filter_by(activa=True)
@@ -313,14 +401,7 @@ def get_noticias_recientes():
 
         noticias = query.limit(limit).all()
 
-        noticias_data = []
-        for n in noticias:
-            noticias_data.append({
-                "id": getattr(n, "id", None),
-                "titulo": getattr(n, "titulo", "") or getattr(n, "titulo_noticia", ""),
-                "fecha_publicacion": getattr(n, "fecha_publicacion", None),
-                "visitas": getattr(n, "visitas", 0),
-            })
+        noticias_data = [noticia_reciente(n) for n in noticias]
 
         return jsonify({
             "success": True,
@@ -332,6 +413,9 @@ def get_noticias_recientes():
 
 
 @public_bp.route('/search', methods=['GET'])
+@response_cache.cached('productos', 'servicios', 'noticias')
+@replica_router.prefer_replica('productos', 'servicios', 'noticias', 'indice_busqueda')
+@query_budget.limit(4)
 def search_global():
     """Búsqueda global en productos y servicios"""
     try:
@@ -344,49 +428,28 @@ def search_global():
                 'error': 'Término de búsqueda requerido'
             }), 400
 
-        # Buscar en productos
-        productos = Producto.query.filter_by(activo=True).filter(
-            or_(
-                Producto.nombre.ilike(f'%{query}%'),
-                Producto.descripcion_corta.ilike(f'%{query}%'),
-                Producto.descripcion.ilike(f'%{query}%')
-            )
-        ).limit(limit).all()
+        # Buscar en el índice invertido: una consulta para los tres tipos y
+        # una por tipo para leer los documentos encontrados
+        encontrados = search_index.documentos_tipos(query, ('producto', 'servicio', 'noticia'), limit)
+        productos = encontrados['producto']
+        servicios = encontrados['servicio']
+        noticias = encontrados['noticia']
 
-        # Buscar en servicios
-        servicios = Servicio.query.filter_by(activo=True).filter(
-            or_(
-                Servicio.nombre.ilike(f'%{query}%'),
-                Servicio.descripcion.ilike(f'%{query}%')
-            )
-        ).limit(limit).all()
-
-        productos_data = []
-        for prod in productos:
-            productos_data.append({
-                'id': prod.id,
-                'nombre': getattr(prod, 'nombre', ''),
-                'descripcion_corta': getattr(prod, 'descripcion_corta', ''),
-                'precio': float(getattr(prod, 'precio', 0)),
-                'tipo': 'producto'
-            })
-
-        servicios_data = []
-        for serv in servicios:
-            servicios_data.append({
-                'id': serv.id,
-                'nombre': getattr(serv, 'nombre', ''),
-                'descripcion': getattr(serv, 'descripcion', ''),
-                'tipo': 'servicio'
-            })
+        productos_data = [producto_encontrado(prod) for prod in productos]
+
+        servicios_data = [servicio_encontrado(serv) for serv in servicios]
+
+        noticias_data = [noticia_encontrada(n) for n in noticias]
 
         return jsonify({
             'success': True,
             'resultados': {
                 'productos': productos_data,
                 'servicios': servicios_data,
+                'noticias': noticias_data,
                 'total_productos': len(productos),
-                'total_servicios': len(servicios)
+                'total_servicios': len(servicios),
+                'total_noticias': len(noticias)
             }
         })
 
@@ -394,7 +457,25 @@ def search_global():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@public_bp.route('/autocomplete', methods=['GET'])
+def autocompletar():
+    """Sugerencias mientras se escribe (se responden desde memoria)"""
+    try:
+        texto = request.args.get('q', '')
+        limit = min(max(request.args.get('limit', 8, type=int), 1), 20)
+        tipo = request.args.get('tipo')
+
+        return jsonify({
+            'success': True,
+            'sugerencias': autocomplete.sugerir(texto, limit, tipo)
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @public_bp.route('/info', methods=['GET'])
+@response_cache.cached()
 def get_info_empresa():
     """Información básica de la empresa para el frontend"""
     try:
@@ -1,11 +1,55 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import joinedload
 from DataBase.models.servicio import Servicio, SolicitudServicio
 from DataBase.models.database import db
 from Utils.email_sender import email_sender
+from Utils.dashboard_aggregator import dashboard_aggregator
+from Utils.pagination import keyset_paginate, offset_paginate, parse_include_total, CursorError
+from Utils.serializers import serializers, Campo
+from Utils.query_budget import query_budget
 
 servicios_bp = Blueprint('servicios', __name__)
 
+# Solo campos que existen en el modelo
+solicitud_resumen = serializers.compile(SolicitudServicio, {
+    'id': 'id',
+    'servicio_id': 'servicio_id',
+    'servicio_nombre': Campo('servicio.nombre', ''),
+    'nombre_cliente': 'nombre_cliente',
+    'email': 'email',
+    'telefono': 'telefono',
+    'empresa': 'empresa',
+    'mensaje': 'mensaje',
+    'estado': 'estado',
+    'fecha_creacion': Campo('fecha_creacion', tipo='iso')
+})
+
+solicitud_detalle = serializers.compile(SolicitudServicio, {
+    'id': 'id',
+    'servicio_id': 'servicio_id',
+    'servicio_nombre': Campo('servicio.nombre', ''),
+    'nombre_cliente': 'nombre_cliente',
+    'email': 'email',
+    'telefono': 'telefono',
+    'empresa': 'empresa',
+    'mensaje': 'mensaje',
+    'estado': 'estado',
+    'fecha_creacion': Campo('fecha_creacion', tipo='iso'),
+    'fecha_actualizacion': Campo('fecha_actualizacion', tipo='iso')
+})
+
+servicio_listado = serializers.compile(Servicio, {
+    'id': 'id',
+    'nombre': 'nombre',
+    'descripcion': 'descripcion',
+    'area': 'area',
+    'imagen': 'imagen',
+    'caracteristicas': 'caracteristicas',
+    'orden': 'orden',
+    'activo': 'activo'
+})
+
 
 # ==================== SOLICITUDES DE SERVICIOS ====================
 
@@ -44,14 +88,16 @@ def crear_solicitud_servicio():
         )
 
         db.session.add(solicitud)
-        db.session.commit()
+        db.session.flush()  # id y fecha_creacion para el email
 
-        # Enviar email de notificación
+        # Email de notificación al outbox: se guarda en la misma transacción
         try:
             email_sender.send_service_request_email(solicitud, servicio)
         except Exception as email_error:
             print(f"❌ Error enviando email de servicio: {email_error}")
 
+        db.session.commit()
+
         return jsonify({
             'success': True,
             'message': 'Solicitud de servicio enviada correctamente',
@@ -70,77 +116,56 @@ def crear_solicitud_servicio():
 
 @servicios_bp.route('/solicitudes', methods=['GET'])
 @jwt_required()
+@query_budget.limit(2)
 def listar_solicitudes_servicios():
     """Listar todas las solicitudes de servicios (admin)"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor')
+        include_total = parse_include_total(request.args.get('include_total'))
         estado = request.args.get('estado')
 
-        query = SolicitudServicio.query
+        # El servicio se carga en el mismo SELECT (servicio_nombre)
+        query = SolicitudServicio.query.options(joinedload(SolicitudServicio.servicio))
 
         if estado:
             query = query.filter_by(estado=estado)
 
-        solicitudes = query.order_by(SolicitudServicio.fecha_creacion.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        if cursor is not None:
+            items, paginacion = keyset_paginate(
+                query, [(SolicitudServicio.fecha_creacion, True), (SolicitudServicio.id, True)], cursor, per_page
+            )
+        else:
+            items, paginacion = offset_paginate(
+                query.order_by(SolicitudServicio.fecha_creacion.desc()), page, per_page, include_total
+            )
 
-        solicitudes_data = []
-        for sol in solicitudes.items:
-            servicio_nombre = getattr(sol.servicio, 'nombre', '') if sol.servicio else ''
-
-            # ✅ CORREGIDO: Solo usar campos que existen en el modelo
-            solicitudes_data.append({
-                'id': sol.id,
-                'servicio_id': sol.servicio_id,
-                'servicio_nombre': servicio_nombre,
-                'nombre_cliente': sol.nombre_cliente,
-                'email': sol.email,
-                'telefono': sol.telefono,
-                'empresa': sol.empresa,
-                'mensaje': sol.mensaje,
-                'estado': sol.estado,
-                'fecha_creacion': sol.fecha_creacion.isoformat() if sol.fecha_creacion else None
-            })
+        solicitudes_data = [solicitud_resumen(sol) for sol in items]
 
         return jsonify({
             'success': True,
             'solicitudes': solicitudes_data,
-            'total': solicitudes.total,
-            'pages': solicitudes.pages,
-            'current_page': page
+            **paginacion
         })
 
+    except CursorError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @servicios_bp.route('/solicitudes/<int:solicitud_id>', methods=['GET'])
 @jwt_required()
+@query_budget.limit(1)
 def obtener_solicitud_servicio(solicitud_id):
     """Obtener solicitud de servicio específica"""
     try:
-        solicitud = SolicitudServicio.query.get_or_404(solicitud_id)
-
-        servicio_nombre = getattr(solicitud.servicio, 'nombre', '') if solicitud.servicio else ''
+        solicitud = SolicitudServicio.query.options(joinedload(SolicitudServicio.servicio)).get_or_404(solicitud_id)
 
-        # ✅ CORREGIDO: Solo usar campos que existen en el modelo
         return jsonify({
             'success': True,
-            'solicitud': {
-                'id': solicitud.id,
-                'servicio_id': solicitud.servicio_id,
-                'servicio_nombre': servicio_nombre,
-                'nombre_cliente': solicitud.nombre_cliente,
-                'email': solicitud.email,
-                'telefono': solicitud.telefono,
-                'empresa': solicitud.empresa,
-                'mensaje': solicitud.mensaje,
-                'estado': solicitud.estado,
-                'fecha_creacion': solicitud.fecha_creacion.isoformat() if solicitud.fecha_creacion else None,
-                'fecha_actualizacion': solicitud.fecha_actualizacion.isoformat() if solicitud.fecha_actualizacion else None
-            }
+            'solicitud': solicitud_detalle(solicitud)
         })
 
     except Exception as e:
@@ -207,27 +232,15 @@ def eliminar_solicitud_servicio(solicitud_id):
 # ==================== SERVICIOS ====================
 
 @servicios_bp.route('/', methods=['GET'])
+@query_budget.limit(1)
 def listar_servicios():
     """Listar todos los servicios activos"""
     try:
         servicios = Servicio.query.filter_by(activo=True).all()
 
-        servicios_data = []
-        for serv in servicios:
-            servicios_data.append({
-                'id': serv.id,
-                'nombre': serv.nombre,
-                'descripcion': serv.descripcion,
-                'area': serv.area,
-                'imagen': serv.imagen,
-                'caracteristicas': serv.caracteristicas,
-                'orden': serv.orden,
-                'activo': serv.activo
-            })
-
         return jsonify({
             'success': True,
-            'servicios': servicios_data
+            'servicios': [servicio_listado(serv) for serv in servicios]
         })
 
     except Exception as e:
@@ -236,27 +249,15 @@ def listar_servicios():
 
 @servicios_bp.route('/admin', methods=['GET'])
 @jwt_required()
+@query_budget.limit(1)
 def listar_servicios_admin():
     """Listar todos los servicios (admin)"""
     try:
         servicios = Servicio.query.all()
 
-        servicios_data = []
-        for serv in servicios:
-            servicios_data.append({
-                'id': serv.id,
-                'nombre': serv.nombre,
-                'descripcion': serv.descripcion,
-                'area': serv.area,
-                'imagen': serv.imagen,
-                'caracteristicas': serv.caracteristicas,
-                'orden': serv.orden,
-                'activo': serv.activo
-            })
-
         return jsonify({
             'success': True,
-            'servicios': servicios_data
+            'servicios': [servicio_listado(serv) for serv in servicios]
         })
 
     except Exception as e:
@@ -378,20 +379,9 @@ def eliminar_servicio(servicio_id):
 def estadisticas_servicios():
     """Estadísticas de servicios y solicitudes"""
     try:
-        total_servicios = Servicio.query.filter_by(activo=True).count()
-        total_solicitudes = SolicitudServicio.query.count()
-
-        solicitudes_pendientes = SolicitudServicio.query.filter_by(estado='pendiente').count()
-        solicitudes_completadas = SolicitudServicio.query.filter_by(estado='completado').count()
-
         return jsonify({
             'success': True,
-            'estadisticas': {
-                'total_servicios': total_servicios,
-                'total_solicitudes': total_solicitudes,
-                'solicitudes_pendientes': solicitudes_pendientes,
-                'solicitudes_completadas': solicitudes_completadas
-            }
+            'estadisticas': dashboard_aggregator.estadisticas_servicios()
         })
 
     except Exception as e:
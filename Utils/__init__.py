@@ -1,13 +1,93 @@
 # Importar todas las utilidades
 from .singleton import stats_manager, StatisticsManager
+from .stats_backends import StatsBackend, MemoryStatsBackend, SQLiteStatsBackend
+from .visit_recorder import VisitRecorder
+from .background import PeriodicTask
+from .sketches import SessionTable, SpaceSaving, HyperLogLog
 from .pdf_generator import PDFGenerator, ParnetPDF
 from .email_sender import email_sender, EmailSender
+from .email_dispatcher import email_dispatcher, EmailDispatcher
+from .email_outbox import email_outbox, EmailOutboxRelay
+from .smtp_pool import smtp_pool, SMTPPool
+from .email_templates import email_templates, EmailTemplates
+from .email_digest import email_digest, EmailDigest
+from .dashboard_aggregator import dashboard_aggregator, DashboardAggregator
+from .dashboard_counters import dashboard_counters, DashboardCounters
+from .search_index import search_index, SearchIndex
+from .autocomplete import autocomplete, Autocomplete
+from .table_versions import table_versions, TableVersions
+from .conditional import conditional_get, ConditionalGet
+from .response_cache import response_cache, ResponseCache
+from .assets import asset_pipeline, AssetPipeline
+from .page_cache import page_cache, PageCache
+from .serializers import serializers, SerializerRegistry, Campo, Perfiles, ProjectionError
+from .query_budget import query_budget, QueryBudget, QueryBudgetExceeded
+from .db_pool import pool_monitor, PoolMonitor, InstrumentedQueuePool
+from .db_replica import replica_router, ReplicaRouter
+from .view_counter import view_counter, ViewCounter
+from .pagination import keyset_paginate, offset_paginate, count_cache, CountCache, CursorError
 
 __all__ = [
     'stats_manager',
     'StatisticsManager',
+    'StatsBackend',
+    'MemoryStatsBackend',
+    'SQLiteStatsBackend',
+    'VisitRecorder',
+    'PeriodicTask',
+    'SessionTable',
+    'SpaceSaving',
+    'HyperLogLog',
     'PDFGenerator',
     'ParnetPDF',
     'email_sender',
-    'EmailSender'
+    'EmailSender',
+    'email_dispatcher',
+    'EmailDispatcher',
+    'email_outbox',
+    'EmailOutboxRelay',
+    'smtp_pool',
+    'SMTPPool',
+    'email_templates',
+    'EmailTemplates',
+    'email_digest',
+    'EmailDigest',
+    'dashboard_aggregator',
+    'DashboardAggregator',
+    'dashboard_counters',
+    'DashboardCounters',
+    'search_index',
+    'SearchIndex',
+    'autocomplete',
+    'Autocomplete',
+    'table_versions',
+    'TableVersions',
+    'conditional_get',
+    'ConditionalGet',
+    'response_cache',
+    'ResponseCache',
+    'asset_pipeline',
+    'AssetPipeline',
+    'page_cache',
+    'PageCache',
+    'serializers',
+    'SerializerRegistry',
+    'Campo',
+    'Perfiles',
+    'ProjectionError',
+    'query_budget',
+    'QueryBudget',
+    'QueryBudgetExceeded',
+    'pool_monitor',
+    'PoolMonitor',
+    'InstrumentedQueuePool',
+    'replica_router',
+    'ReplicaRouter',
+    'view_counter',
+    'ViewCounter',
+    'keyset_paginate',
+    'offset_paginate',
+    'count_cache',
+    'CountCache',
+    'CursorError'
 ]
\ No newline at end of file
@@ -0,0 +1,366 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+from flask import url_for, send_from_directory, request, abort
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se generan variantes .gz
+    brotli = None
+
+COMPRIMIBLES = ('.js', '.css', '.svg', '.json', '.txt', '.html')
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+
+# ==================== MINIFICACIÓN ====================
+
+_PALABRAS_ANTES_DE_REGEX = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'yield', 'await')
+_SIN_ESPACIO = set('{}()[];,:=<>!?&|.*%^~')
+
+
+def _fin_cadena(codigo, i):
+    """Índice después de la cadena que empieza en i (incluye `${...}` anidados)"""
+    comilla = codigo[i]
+    j = i + 1
+    while j < len(codigo):
+        c = codigo[j]
+        if c == '\\':
+            j += 2
+            continue
+        if c == comilla:
+            return j + 1
+        if comilla == '`' and codigo.startswith('${', j):
+            j = _fin_expresion(codigo, j + 2)
+            continue
+        j += 1
+    return len(codigo)
+
+
+def _fin_expresion(codigo, j):
+    """Índice después de la llave que cierra un `${` de template literal"""
+    profundidad = 1
+    while j < len(codigo):
+        c = codigo[j]
+        if c in '"\'`':
+            j = _fin_cadena(codigo, j)
+            continue
+        if c == '{':
+            profundidad += 1
+        elif c == '}':
+            profundidad -= 1
+            if profundidad == 0:
+                return j + 1
+        j += 1
+    return len(codigo)
+
+
+def _fin_regex(codigo, i):
+    """Índice después de un literal /regex/flags, o None si no lo es"""
+    j = i + 1
+    en_clase = False
+    while j < len(codigo):
+        c = codigo[j]
+        if c == '\n':
+            return None
+        if c == '\\':
+            j += 2
+            continue
+        if c == '[':
+            en_clase = True
+        elif c == ']':
+            en_clase = False
+        elif c == '/' and not en_clase:
+            j += 1
+            while j < len(codigo) and codigo[j].isalpha():
+                j += 1
+            return j
+        j += 1
+    return None
+
+
+def _puede_ser_regex(salida):
+    texto = ''.join(salida[-3:]).rstrip()
+    if not texto:
+        return True
+    if texto[-1] in '(,=:[!&|?{};+-*%<>~^\n':
+        return True
+    palabra = re.search(r'[A-Za-z_$]+$', texto)
+    return bool(palabra) and palabra.group(0) in _PALABRAS_ANTES_DE_REGEX
+
+
+def minify_js(codigo):
+    """
+    Minificación conservadora de JavaScript: quita comentarios, sangría,
+    líneas vacías y espacios redundantes. Conserva los saltos de línea para
+    no cambiar la inserción automática de punto y coma, y copia literalmente
+    cadenas, template literals y expresiones regulares.
+    """
+    salida = []
+    i, n = 0, len(codigo)
+    while i < n:
+        c = codigo[i]
+        if c in '"\'`':
+            j = _fin_cadena(codigo, i)
+            salida.append(codigo[i:j])
+            i = j
+        elif codigo.startswith('//', i):
+            j = codigo.find('\n', i)
+            i = n if j == -1 else j
+        elif codigo.startswith('/*', i):
+            j = codigo.find('*/', i + 2)
+            j = n if j == -1 else j + 2
+            salida.append('\n' if '\n' in codigo[i:j] else ' ')
+            i = j
+        elif c == '/' and _puede_ser_regex(salida) and _fin_regex(codigo, i):
+            j = _fin_regex(codigo, i)
+            salida.append(codigo[i:j])
+            i = j
+        elif c.isspace():
+            j = i
+            while j < n and codigo[j].isspace():
+                j += 1
+            salida.append('\n' if '\n' in codigo[i:j] else ' ')
+            i = j
+        else:
+            salida.append(c)
+            i += 1
+
+    # Primer carácter del siguiente token que no es espacio ni salto, para
+    # cada posición (una pasada de atrás hacia adelante)
+    siguientes = [''] * len(salida)
+    siguiente = ''
+    for k in range(len(salida) - 1, -1, -1):
+        siguientes[k] = siguiente
+        if salida[k] not in (' ', '\n'):
+            siguiente = salida[k][:1]
+
+    # Compactar los espacios y saltos emitidos
+    resultado = []
+    for k, parte in enumerate(salida):
+        if parte not in (' ', '\n'):
+            resultado.append(parte)
+            continue
+        anterior = resultado[-1][-1:] if resultado else ''
+        if anterior in ('', '\n'):
+            continue
+        if parte == '\n':
+            if anterior == ' ':
+                resultado.pop()
+            resultado.append('\n')
+            continue
+        siguiente = siguientes[k]
+        if anterior == ' ' or anterior in _SIN_ESPACIO or siguiente in _SIN_ESPACIO or not siguiente:
+            continue
+        resultado.append(' ')
+    return ''.join(resultado).strip() + '\n'
+
+
+def minify_css(codigo):
+    """Quitar comentarios y espacios innecesarios de una hoja de estilos"""
+    partes = []
+    i, n = 0, len(codigo)
+    while i < n:
+        c = codigo[i]
+        if c in '"\'':
+            j = _fin_cadena(codigo, i)
+            partes.append(('cadena', codigo[i:j]))
+            i = j
+        elif codigo.startswith('/*', i):
+            j = codigo.find('*/', i + 2)
+            i = n if j == -1 else j + 2
+        else:
+            j = i
+            while j < n and codigo[j] not in '"\'' and not codigo.startswith('/*', j):
+                j += 1
+            texto = re.sub(r'\s+', ' ', codigo[i:j])
+            texto = re.sub(r'\s*([{};,>])\s*', r'\1', texto)
+            texto = re.sub(r':\s+', ':', texto)
+            partes.append(('css', texto))
+            i = j
+    resultado = ''.join(texto for _, texto in partes)
+    return resultado.replace(';}', '}').strip() + '\n'
+
+
+MINIFICADORES = {'.js': minify_js, '.css': minify_css}
+
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def reescribir_urls_css(texto, origen, destino, manifest):
+    """
+    Apuntar los url(...) relativos de una hoja (ubicada en `origen`) a los
+    archivos versionados, con rutas relativas a `destino` (nombre lógico)
+    """
+    def reemplazar(m):
+        referencia = m.group(2).strip()
+        if referencia.startswith(('data:', 'http:', 'https:', '//', '#', '/')):
+            return m.group(0)
+        ruta, sufijo = re.match(r'([^?#]*)(.*)', referencia).groups()
+        logico = posixpath.normpath(posixpath.join(posixpath.dirname(origen), ruta))
+        if logico not in manifest:
+            return m.group(0)
+        relativa = posixpath.relpath(manifest[logico], posixpath.dirname(destino) or '.')
+        return f'url("{relativa}{sufijo}")'
+    return _CSS_URL.sub(reemplazar, texto)
+
+
+class AssetPipeline:
+    """
+    Versiona los archivos estáticos por contenido.
+    Al construir, cada archivo de static/ (o bundle configurado) se minifica
+    si es JS/CSS, se escribe en static/dist con un hash en el nombre junto con
+    sus variantes .gz y .br, y se registra en manifest.json. Las plantillas
+    usan asset_url('js/productos.js') y los archivos se sirven desde /assets
+    con Cache-Control immutable y la variante comprimida que acepte el cliente.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.source = None
+        self.output = None
+        self.bundles = {}
+        self.manifest = {}
+
+    def init_app(self, app):
+        """Registrar asset_url, la ruta /assets y el comando `flask assets-build`"""
+        self.app = app
+        self.enabled = app.config.get('ASSETS_ENABLED', True)
+        self.source = app.static_folder
+        self.output = app.config.get('ASSETS_OUTPUT') or os.path.join(self.source, 'dist')
+        self.bundles = app.config.get('ASSET_BUNDLES', {})
+        app.jinja_env.globals['asset_url'] = self.url
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.serve)
+
+        @app.cli.command('assets-build')
+        def assets_build():
+            """Generar static/dist y su manifest"""
+            manifest = self.build()
+            print(f"✅ Assets generados: {len(manifest)} archivos en {self.output}")
+
+        if self.enabled:
+            if app.config.get('ASSETS_BUILD_ON_STARTUP', True):
+                self.build()
+            else:
+                self.load_manifest()
+
+    # ==================== CONSTRUCCIÓN ====================
+
+    def _fuentes(self):
+        """{nombre lógico: [archivos]} de todo static/ más los bundles configurados"""
+        fuentes = {}
+        salida = os.path.abspath(self.output)
+        for raiz, dirs, archivos in os.walk(self.source):
+            dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(raiz, d)) != salida]
+            for archivo in archivos:
+                ruta = os.path.join(raiz, archivo)
+                nombre = os.path.relpath(ruta, self.source).replace(os.sep, '/')
+                fuentes[nombre] = [nombre]
+        fuentes.update({nombre: list(partes) for nombre, partes in self.bundles.items()})
+        return fuentes
+
+    def _leer(self, nombre, partes, manifest):
+        extension = os.path.splitext(nombre)[1]
+        contenidos = []
+        for parte in partes:
+            with open(os.path.join(self.source, parte), 'rb') as f:
+                contenidos.append(f.read())
+        if extension not in MINIFICADORES:
+            return b''.join(contenidos)
+        textos = [c.decode('utf-8') for c in contenidos]
+        if extension == '.css':
+            textos = [reescribir_urls_css(t, parte, nombre, manifest) for t, parte in zip(textos, partes)]
+        # Cada parte se separa con ';' / salto para que una no continúe la anterior
+        separador = ';\n' if extension == '.js' else '\n'
+        return MINIFICADORES[extension](separador.join(textos)).encode('utf-8')
+
+    @staticmethod
+    def _escribir(ruta, datos):
+        if os.path.exists(ruta):
+            return  # Mismo hash, mismo contenido
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        with open(temporal, 'wb') as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+
+    def build(self):
+        """Generar los archivos versionados y el manifest; regresa el manifest"""
+        manifest = {}
+        # Las hojas de estilo al final: sus url(...) apuntan a imágenes ya versionadas
+        fuentes = sorted(self._fuentes().items(), key=lambda item: (item[0].endswith('.css'), item[0]))
+        for nombre, partes in fuentes:
+            try:
+                datos = self._leer(nombre, partes, manifest)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"⚠️ No se pudo procesar el asset {nombre}: {e}")
+                continue
+            base, extension = os.path.splitext(nombre)
+            version = hashlib.sha256(datos).hexdigest()[:12]
+            versionado = f'{base}.{version}{extension}'
+            destino = os.path.join(self.output, versionado)
+
+            self._escribir(destino, datos)
+            if extension in COMPRIMIBLES:
+                self._escribir(destino + '.gz', gzip.compress(datos, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    self._escribir(destino + '.br', brotli.compress(datos, quality=11))
+            manifest[nombre] = versionado
+
+        self._escribir_manifest(manifest)
+        self.manifest = manifest
+        return manifest
+
+    def _escribir_manifest(self, manifest):
+        ruta = os.path.join(self.output, 'manifest.json')
+        os.makedirs(self.output, exist_ok=True)
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        with open(temporal, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(temporal, ruta)
+
+    def load_manifest(self):
+        """Leer el manifest generado por `flask assets-build`"""
+        try:
+            with open(os.path.join(self.output, 'manifest.json')) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        return self.manifest
+
+    # ==================== PLANTILLAS Y SERVIDOR ====================
+
+    def url(self, nombre):
+        """URL versionada de un asset; sin manifest (o en DEBUG) apunta a /static"""
+        versionado = self.manifest.get(nombre) if self.enabled else None
+        if versionado is None or (self.app is not None and self.app.debug):
+            return url_for('static', filename=nombre)
+        return url_for('assets', filename=versionado)
+
+    def serve(self, filename):
+        """Servir un asset versionado con la mejor variante precomprimida"""
+        if filename.endswith(('.gz', '.br', '.json')):
+            abort(404)
+        extension = os.path.splitext(filename)[1]
+        mimetype = mimetypes.guess_type(filename)[0]
+
+        archivo, codificacion = filename, None
+        for sufijo, nombre in (('.br', 'br'), ('.gz', 'gzip')):
+            if request.accept_encodings[nombre] and os.path.exists(os.path.join(self.output, filename + sufijo)):
+                archivo, codificacion = filename + sufijo, nombre
+                break
+
+        respuesta = send_from_directory(self.output, archivo, mimetype=mimetype, max_age=31536000)
+        if codificacion:
+            respuesta.headers['Content-Encoding'] = codificacion
+        if extension in COMPRIMIBLES:
+            respuesta.vary.add('Accept-Encoding')
+        respuesta.headers['Cache-Control'] = CACHE_INMUTABLE
+        return respuesta
+
+
+# Instancia global del pipeline de assets
+asset_pipeline = AssetPipeline()
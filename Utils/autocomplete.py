@@ -0,0 +1,301 @@
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from sqlalchemy import event, inspect
+from DataBase.models.database import db
+from DataBase.models.producto import Producto, CategoriaProducto
+from DataBase.models.servicio import Servicio
+from .background import PeriodicTask
+from .search_index import plegar, STOPWORDS
+
+# tipo -> (modelo, columnas con texto sugerible, peso en el orden)
+FUENTES = {
+    'categoria': (CategoriaProducto, ('nombre',), 3),
+    'servicio': (Servicio, ('nombre',), 2),
+    'producto': (Producto, ('nombre', 'sku'), 1),
+}
+TIPO_POR_MODELO = {modelo: tipo for tipo, (modelo, _, _) in FUENTES.items()}
+
+MAX_CLAVE = 48       # caracteres por clave
+MAX_POSICIONES = 4   # palabras desde las que se puede empezar a escribir
+ESCANEO_POR_RESULTADO = 4  # claves revisadas por tipo y por resultado pedido
+
+
+def claves_texto(texto, posiciones=MAX_POSICIONES):
+    """
+    Claves de prefijo de un texto: el texto plegado completo y el resto a partir
+    de cada palabra significativa ("cable utp cat 6" -> "utp cat 6", "cat 6")
+    """
+    palabras = plegar(texto)
+    claves = []
+    for i in range(min(len(palabras), posiciones)):
+        if i and (palabras[i] in STOPWORDS or palabras[i].isdigit()):
+            continue
+        clave = ' '.join(palabras[i:])[:MAX_CLAVE]
+        if clave not in claves:
+            claves.append(clave)
+    return claves
+
+
+class Autocomplete:
+    """
+    Sugerencias de búsqueda en memoria para autocompletado.
+    Las claves de cada tipo se guardan en un arreglo ordenado (con otro
+    paralelo de ids), así que un prefijo es un bisect y un recorrido de unas
+    cuantas posiciones: ninguna consulta toca la base de datos. Los cambios del catálogo se aplican al confirmar
+    la transacción y una reconstrucción periódica recoge lo escrito por otros
+    procesos. El número total de claves está acotado.
+    La primera construcción corre en un hilo desde init_app; mientras no
+    termina, sugerir() responde vacío en lugar de bloquear la petición.
+    """
+
+    CAMBIOS_KEY = 'autocompletado_cambios'
+
+    def __init__(self):
+        self.app = None
+        self.max_entries = 200000
+        self.refresher = None
+        self.descartadas = 0
+        self._lock = threading.Lock()
+        self._construido = False
+        self._arreglos = {tipo: ([], []) for tipo in FUENTES}  # tipo -> (claves, sids)
+        self._total = 0
+        self._sugerencias = {}     # sid -> (texto, tipo, ref_id, claves)
+        self._por_documento = {}   # (tipo, ref_id) -> sid
+        self._siguiente = 0
+        self._durante = None       # cambios confirmados mientras corre rebuild()
+        self._construccion = None  # hilo de la primera construcción
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # El lock pudo quedar tomado por un hilo del padre que no existe en el hijo
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Registrar eventos del catálogo y la tarea de reconstrucción"""
+        self.app = app
+        self.max_entries = app.config.get('AUTOCOMPLETE_MAX_ENTRIES', 200000)
+
+        for modelo in TIPO_POR_MODELO:
+            for nombre, handler in (('after_insert', self._marcar),
+                                    ('after_update', self._marcar),
+                                    ('after_delete', self._marcar_borrado)):
+                if not event.contains(modelo, nombre, handler):
+                    event.listen(modelo, nombre, handler)
+        for nombre, handler in (('after_commit', self._after_commit),
+                                ('after_rollback', self._after_rollback)):
+            if not event.contains(db.session, nombre, handler):
+                event.listen(db.session, nombre, handler)
+
+        interval = app.config.get('AUTOCOMPLETE_REFRESH_INTERVAL', 600)
+        if self.refresher is None:
+            self.refresher = PeriodicTask('autocomplete-refresh', interval, self._refresh_job)
+        else:
+            self.refresher.interval = interval
+        self.construir_en_segundo_plano()
+
+    # ==================== SINCRONIZACIÓN ====================
+
+    @staticmethod
+    def _datos(tipo, valores):
+        """(texto, claves) de una fila, o None si no aporta sugerencias"""
+        texto = valores[0]
+        if not texto:
+            return None
+        claves = claves_texto(texto)
+        # Los demás campos (SKU) solo se sugieren desde su inicio
+        claves.extend(c for v in valores[1:] if v for c in claves_texto(v, 1) if c not in claves)
+        return (texto, claves) if claves else None
+
+    def _marcar(self, mapper, connection, target, borrado=False):
+        # Los valores se leen ahora: después del commit los objetos están expirados
+        tipo = TIPO_POR_MODELO[mapper.class_]
+        datos = None
+        if not borrado and target.activo:
+            datos = self._datos(tipo, [getattr(target, c) for c in FUENTES[tipo][1]])
+        inspect(target).session.info.setdefault(self.CAMBIOS_KEY, {})[(tipo, target.id)] = datos
+
+    def _marcar_borrado(self, mapper, connection, target):
+        self._marcar(mapper, connection, target, borrado=True)
+
+    def _after_commit(self, session):
+        cambios = session.info.pop(self.CAMBIOS_KEY, None)
+        if not cambios:
+            return
+        with self._lock:
+            if self._durante is not None:
+                # rebuild() puede haber leído la fila antes de este commit
+                self._durante.append(cambios)
+            if self._construido:
+                self._aplicar(cambios)
+
+    def _after_rollback(self, session):
+        session.info.pop(self.CAMBIOS_KEY, None)
+
+    def aplicar(self, cambios):
+        """Aplicar {(tipo, ref_id): (texto, claves) | None} a la estructura en memoria"""
+        with self._lock:
+            self._aplicar(cambios)
+
+    def _aplicar(self, cambios):
+        for (tipo, ref_id), datos in cambios.items():
+            self._quitar((tipo, ref_id))
+            if datos is not None:
+                self._agregar(tipo, ref_id, *datos)
+
+    def _quitar(self, documento):
+        sid = self._por_documento.pop(documento, None)
+        if sid is None:
+            return
+        claves, sids = self._arreglos[documento[0]]
+        for clave in self._sugerencias.pop(sid)[3]:
+            i = bisect_left(claves, clave)
+            while i < len(claves) and claves[i] == clave:
+                if sids[i] == sid:
+                    del claves[i]
+                    del sids[i]
+                    self._total -= 1
+                    break
+                i += 1
+
+    def _agregar(self, tipo, ref_id, texto, nuevas):
+        if self._total + len(nuevas) > self.max_entries:
+            self.descartadas += 1
+            return
+        sid = self._siguiente
+        self._siguiente += 1
+        self._sugerencias[sid] = (texto, tipo, ref_id, nuevas)
+        self._por_documento[(tipo, ref_id)] = sid
+        claves, sids = self._arreglos[tipo]
+        for clave in nuevas:
+            i = bisect_right(claves, clave)
+            claves.insert(i, clave)
+            sids.insert(i, sid)
+        self._total += len(nuevas)
+
+    # ==================== CONSTRUCCIÓN ====================
+
+    def rebuild(self):
+        """Construir la estructura completa desde la base de datos (requiere app context)"""
+        with self._lock:
+            self._durante = []
+        try:
+            arreglos, sugerencias, por_documento, total, descartadas = self._leer_catalogo()
+        except Exception:
+            with self._lock:
+                self._durante = None
+            raise
+
+        with self._lock:
+            self._arreglos = arreglos
+            self._total = total
+            self._sugerencias = sugerencias
+            self._por_documento = por_documento
+            self._siguiente = len(sugerencias)
+            self.descartadas = descartadas
+            for cambios in self._durante:
+                self._aplicar(cambios)
+            self._durante = None
+            self._construido = True
+        return len(sugerencias)
+
+    def _leer_catalogo(self):
+        """(arreglos, sugerencias, por_documento, total, descartadas) leídos de la base de datos"""
+        arreglos = {}
+        sugerencias = {}
+        por_documento = {}
+        descartadas = 0
+        total = 0
+        for tipo, (modelo, columnas, _) in FUENTES.items():
+            pares = []
+            filas = db.session.query(modelo.id, *[getattr(modelo, c) for c in columnas]).filter(
+                modelo.activo == True
+            ).order_by(modelo.id)
+            for ref_id, *valores in filas:
+                datos = self._datos(tipo, valores)
+                if datos is None:
+                    continue
+                texto, claves = datos
+                if total + len(claves) > self.max_entries:
+                    descartadas += 1
+                    continue
+                sid = len(sugerencias)
+                sugerencias[sid] = (texto, tipo, ref_id, claves)
+                por_documento[(tipo, ref_id)] = sid
+                pares.extend((clave, sid) for clave in claves)
+                total += len(claves)
+            pares.sort()
+            arreglos[tipo] = ([clave for clave, _ in pares], [sid for _, sid in pares])
+        return arreglos, sugerencias, por_documento, total, descartadas
+
+    def _refresh_job(self):
+        if self.app is None:
+            return
+        with self.app.app_context():
+            self.rebuild()
+
+    def construir_en_segundo_plano(self):
+        """Lanzar la primera construcción en un hilo si no está hecha ni en curso"""
+        if self._construido or self.app is None:
+            return
+        with self._lock:
+            if self._construccion is not None and self._construccion.is_alive():
+                return
+            self._construccion = threading.Thread(target=self._construir, name='autocomplete-build', daemon=True)
+            self._construccion.start()
+
+    def _construir(self):
+        try:
+            self._refresh_job()
+        except Exception as e:
+            print(f"❌ Error al construir el autocompletado: {e}")
+
+    # ==================== CONSULTA ====================
+
+    def sugerir(self, texto, limite=8, tipo=None):
+        """Sugerencias [{'texto', 'tipo', 'id'}] cuyo texto contiene una palabra que empieza con `texto`"""
+        prefijo = ' '.join(plegar(texto))
+        if not prefijo:
+            return []
+        if self.refresher is not None:
+            self.refresher.ensure_started()
+        if not self._construido:
+            # En un worker recién creado (o si la construcción falló) se lanza de nuevo
+            self.construir_en_segundo_plano()
+            return []
+
+        tipos = [tipo] if tipo in FUENTES else list(FUENTES)
+        escaneo = limite * ESCANEO_POR_RESULTADO
+        encontradas = {}
+        with self._lock:
+            for t in tipos:
+                claves, sids = self._arreglos[t]
+                i = bisect_left(claves, prefijo)
+                fin = min(len(claves), i + escaneo)
+                while i < fin and claves[i].startswith(prefijo):
+                    encontradas.setdefault(sids[i], self._sugerencias[sids[i]])
+                    i += 1
+
+        # Primero las que empiezan con el prefijo, luego por tipo y por longitud
+        ordenadas = sorted(encontradas.values(), key=lambda s: (
+            not s[3][0].startswith(prefijo), -FUENTES[s[1]][2], len(s[0]), s[0]
+        ))
+        return [{'texto': texto, 'tipo': tipo, 'id': ref_id}
+                for texto, tipo, ref_id, _ in ordenadas[:limite]]
+
+    def estado(self):
+        """Tamaño actual de la estructura"""
+        with self._lock:
+            return {
+                'construido': self._construido,
+                'construyendo': self._construccion is not None and self._construccion.is_alive(),
+                'sugerencias': len(self._sugerencias),
+                'claves': self._total,
+                'max_claves': self.max_entries,
+                'descartadas': self.descartadas
+            }
+
+
+# Instancia global del autocompletado
+autocomplete = Autocomplete()
@@ -0,0 +1,71 @@
+import atexit
+import os
+import threading
+
+
+class PeriodicTask:
+    """
+    Hilo en segundo plano que ejecuta una función cada N segundos.
+    Se arranca de forma perezosa, se reinicia en procesos hijos (fork de gunicorn)
+    y ejecuta una última pasada al detenerse para no perder trabajo pendiente.
+    """
+
+    def __init__(self, name, interval, target):
+        self.name = name
+        self.interval = interval
+        self.target = target
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._start_lock = threading.Lock()
+        atexit.register(self.stop)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Los hilos no sobreviven al fork; se vuelve a arrancar en el primer uso
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self):
+        """Arrancar el hilo si aún no corre en este proceso"""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._stop_event.clear()
+                    thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    thread.start()
+                    self._thread = thread
+
+    def _run(self):
+        while True:
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                return
+            self.run_once()
+
+    def wake(self):
+        """Ejecutar la siguiente pasada ya, sin esperar el intervalo"""
+        self.ensure_started()
+        self._wake_event.set()
+
+    def run_once(self):
+        """Ejecutar la tarea una vez sin dejar que una excepción mate el hilo"""
+        try:
+            self.target()
+        except Exception as e:
+            print(f"❌ Error en tarea periódica {self.name}: {e}")
+
+    def stop(self, timeout=5):
+        """Detener el hilo y ejecutar una última pasada"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop_event.set()
+        self._wake_event.set()
+        thread.join(timeout)
+        self._thread = None
+        self.run_once()
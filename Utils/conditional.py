@@ -0,0 +1,120 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, make_response
+from .table_versions import table_versions
+
+
+# Carpetas del código y las plantillas que forman la versión desplegada
+# (además de los .py de la raíz); el virtualenv y los datos no se recorren
+CARPETAS_RELEASE = ('Routes', 'Utils', 'DataBase', 'templates', 'Config')
+IGNORAR_CARPETAS = frozenset(('__pycache__', 'data', 'static', 'uploads', 'venv', 'env', 'm', 'site-packages',
+                              'node_modules'))
+EXTENSIONES_RELEASE = ('.py', '.html', '.jinja', '.txt')
+
+
+def request_key():
+    """Ruta + argumentos ordenados, sin los vacíos (?search= equivale a no enviarlo)"""
+    argumentos = sorted((k, v) for k, v in request.args.items(multi=True) if v != '')
+    return request.path + '?' + '&'.join(f'{k}={v}' for k, v in argumentos)
+
+
+def _release(root_path, carpetas):
+    """Fecha del archivo más reciente del código y las plantillas (igual en todos los workers)"""
+    def mtime(ruta):
+        try:
+            return os.path.getmtime(ruta)
+        except OSError:
+            return 0
+
+    # Solo los archivos de la raíz (app.py, run.py...), sin bajar a subcarpetas
+    ultimo = max((mtime(entrada.path) for entrada in os.scandir(root_path)
+                  if entrada.is_file() and entrada.name.endswith(EXTENSIONES_RELEASE)), default=0)
+    for carpeta in carpetas:
+        for raiz, dirs, archivos in os.walk(os.path.join(root_path, carpeta)):
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in IGNORAR_CARPETAS]
+            for archivo in archivos:
+                if archivo.endswith(EXTENSIONES_RELEASE):
+                    ultimo = max(ultimo, mtime(os.path.join(raiz, archivo)))
+    return int(ultimo)
+
+
+class ConditionalGet:
+    """
+    Validadores HTTP (ETag / Last-Modified) calculados antes de ejecutar la vista.
+    El ETag sale de la ruta, los argumentos, la versión de las tablas de las
+    que depende la respuesta y la versión desplegada del código y plantillas;
+    si el cliente ya tiene esa versión se responde 304 sin consultar ni
+    serializar nada.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.release = '0'
+        self.release_time = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def init_app(self, app):
+        """Calcular la versión desplegada (APP_RELEASE o fecha de los archivos)"""
+        self.enabled = app.config.get('CONDITIONAL_GET_ENABLED', True)
+        momento = _release(app.root_path, CARPETAS_RELEASE)
+        if momento:
+            self.release_time = datetime.fromtimestamp(momento, timezone.utc)
+        self.release = app.config.get('APP_RELEASE') or str(momento)
+
+    def validators(self, tablas, versiones=None):
+        """(etag, last_modified) de la petición actual"""
+        if versiones is None:
+            versiones = table_versions.versions(tablas)
+        firma = '|'.join((self.release, request_key()) + tuple(versiones))
+        etag = hashlib.blake2b(firma.encode('utf-8'), digest_size=12).hexdigest()
+        last_modified = table_versions.last_modified(tablas)
+        if last_modified is None or last_modified < self.release_time:
+            last_modified = self.release_time
+        return etag, last_modified
+
+    @staticmethod
+    def is_not_modified(etag, last_modified):
+        """If-None-Match tiene prioridad; If-Modified-Since solo se usa sin él"""
+        if request.if_none_match:
+            return request.if_none_match.contains(etag)
+        if request.if_modified_since is not None:
+            return last_modified <= request.if_modified_since
+        return False
+
+    @staticmethod
+    def apply(respuesta, etag, last_modified, private=False):
+        respuesta.set_etag(etag)
+        respuesta.last_modified = last_modified
+        # no-cache: el cliente puede guardar la respuesta pero debe revalidarla
+        respuesta.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+        return respuesta
+
+    def not_modified(self, etag, last_modified, private=False):
+        return self.apply(make_response('', 304), etag, last_modified, private)
+
+    def conditional(self, *tablas, private=False):
+        """
+        GET condicional para una vista que solo lee de `tablas` (sin tablas: páginas
+        que solo dependen de la plantilla). Usar debajo de @jwt_required().
+        """
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method not in ('GET', 'HEAD'):
+                    return f(*args, **kwargs)
+
+                etag, last_modified = self.validators(tablas)
+                if self.is_not_modified(etag, last_modified):
+                    return self.not_modified(etag, last_modified, private)
+
+                respuesta = make_response(f(*args, **kwargs))
+                if respuesta.status_code == 200:
+                    self.apply(respuesta, etag, last_modified, private)
+                return respuesta
+            return wrapper
+        return decorator
+
+
+# Instancia global de GET condicional
+conditional_get = ConditionalGet()
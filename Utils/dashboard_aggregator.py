@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta
+from DataBase.models.database import db
+from DataBase.models.producto import Producto, CategoriaProducto
+from DataBase.models.servicio import Servicio, SolicitudServicio
+from DataBase.models.cliente import Cliente
+from DataBase.models.contacto import Contacto, Sugerencia
+from DataBase.models.noticia import Noticia
+from .dashboard_counters import dashboard_counters
+
+
+def _contar(condicion=None):
+    """COUNT condicional: cuenta solo las filas donde se cumple la condición"""
+    if condicion is None:
+        return db.func.count()
+    return db.func.count(db.case((condicion, 1)))
+
+
+class DashboardAggregator:
+    """
+    Calcula las cifras del dashboard con agregación condicional.
+    Los totales salen de una sola sentencia (una subconsulta de una fila por
+    tabla, unidas entre sí) y todas las agrupaciones de otra con UNION ALL,
+    en lugar de un COUNT por cifra. Cada payload pide solo las tablas que
+    usa. Si los contadores materializados están activos se leen de ahí y
+    estas consultas quedan como respaldo.
+    """
+
+    TABLAS = ('productos', 'servicios', 'solicitudes', 'clientes', 'contactos', 'sugerencias', 'noticias')
+
+    def _totales_stmt(self, ahora, tablas=TABLAS):
+        """Sentencia con las subconsultas de `tablas` (nombres de TABLAS)"""
+        hace_30_dias = ahora - timedelta(days=30)
+        inicio_hoy = ahora.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        subconsultas = {
+            'productos': lambda: db.select(
+                _contar(Producto.activo == True).label('total_productos'),
+                _contar((Producto.activo == True) & (Producto.estatus == 'agotado')).label('productos_agotados')
+            ),
+            'servicios': lambda: db.select(
+                _contar(Servicio.activo == True).label('total_servicios')
+            ),
+            'solicitudes': lambda: db.select(
+                _contar().label('total_solicitudes'),
+                _contar(SolicitudServicio.estado == 'pendiente').label('solicitudes_pendientes'),
+                _contar(SolicitudServicio.estado == 'completado').label('solicitudes_completadas'),
+                _contar(SolicitudServicio.fecha_creacion >= hace_30_dias).label('nuevas_solicitudes_30d')
+            ).select_from(SolicitudServicio),
+            'clientes': lambda: db.select(
+                _contar(Cliente.activo == True).label('total_clientes')
+            ),
+            'contactos': lambda: db.select(
+                _contar().label('total_contactos'),
+                _contar(Contacto.fecha_creacion >= hace_30_dias).label('nuevos_contactos_30d'),
+                _contar(Contacto.fecha_creacion >= inicio_hoy).label('contactos_hoy')
+            ).select_from(Contacto),
+            'sugerencias': lambda: db.select(
+                _contar().label('total_sugerencias'),
+                _contar(Sugerencia.fecha_creacion >= hace_30_dias).label('sugerencias_30d')
+            ).select_from(Sugerencia),
+            'noticias': lambda: db.select(
+                _contar(Noticia.activo == True).label('total_noticias')
+            ),
+        }
+
+        partes = [subconsultas[tabla]().subquery() for tabla in self.TABLAS if tabla in tablas]
+        origen = partes[0]
+        for parte in partes[1:]:
+            # Cada subconsulta regresa exactamente una fila: el producto cruzado es una fila
+            origen = origen.join(parte, db.true())
+
+        columnas = [columna for parte in partes for columna in parte.c]
+        return db.select(*columnas).select_from(origen)
+
+    def totales(self, tablas=TABLAS):
+        """Conteos del dashboard: contadores materializados o, si no, agregación SQL"""
+        if dashboard_counters.enabled:
+            return dashboard_counters.totales()
+        return self.totales_sql(tablas)
+
+    def totales_sql(self, tablas=TABLAS):
+        """Los conteos de `tablas` en un solo viaje a la base de datos"""
+        fila = db.session.execute(self._totales_stmt(datetime.utcnow(), tablas)).mappings().one()
+        return {clave: int(valor or 0) for clave, valor in fila.items()}
+
+    def agrupaciones(self):
+        """Distribuciones del dashboard: contadores materializados o, si no, agregación SQL"""
+        if dashboard_counters.enabled:
+            return dashboard_counters.agrupaciones()
+        return self.agrupaciones_sql()
+
+    def agrupaciones_sql(self):
+        """Las cuatro distribuciones del dashboard en una sola sentencia UNION ALL"""
+        por_categoria = db.select(
+            db.literal('categoria').label('tipo'),
+            CategoriaProducto.nombre.label('clave'),
+            db.func.count(Producto.id).label('cantidad')
+        ).join(Producto).where(
+            Producto.activo == True
+        ).group_by(CategoriaProducto.id, CategoriaProducto.nombre)
+
+        por_servicio = db.select(
+            db.literal('servicio').label('tipo'),
+            Servicio.nombre.label('clave'),
+            db.func.count(SolicitudServicio.id).label('cantidad')
+        ).join(SolicitudServicio).group_by(Servicio.id, Servicio.nombre)
+
+        por_estado = db.select(
+            db.literal('estado').label('tipo'),
+            SolicitudServicio.estado.label('clave'),
+            db.func.count(SolicitudServicio.id).label('cantidad')
+        ).group_by(SolicitudServicio.estado)
+
+        por_estatus = db.select(
+            db.literal('estatus').label('tipo'),
+            Producto.estatus.label('clave'),
+            db.func.count(Producto.id).label('cantidad')
+        ).where(Producto.activo == True).group_by(Producto.estatus)
+
+        stmt = db.union_all(por_categoria, por_servicio, por_estado, por_estatus)
+
+        grupos = {'categoria': [], 'servicio': [], 'estado': [], 'estatus': []}
+        for tipo, clave, cantidad in db.session.execute(stmt):
+            grupos[tipo].append((clave, int(cantidad)))
+        return grupos
+
+    def estadisticas(self):
+        """Payload completo de /api/dashboard/estadisticas (dos sentencias)"""
+        totales = self.totales()
+        grupos = self.agrupaciones()
+
+        return {
+            'productos_por_categoria': [
+                {'categoria': cat, 'cantidad': cant}
+                for cat, cant in grupos['categoria']
+            ],
+            'servicios_solicitados': [
+                {'servicio': serv, 'solicitudes': cant}
+                for serv, cant in grupos['servicio']
+            ],
+            'solicitudes_por_estado': [
+                {'estado': est, 'cantidad': cant}
+                for est, cant in grupos['estado']
+            ],
+            'productos_por_estatus': [
+                {'estatus': est, 'cantidad': cant}
+                for est, cant in grupos['estatus']
+            ],
+            'estadisticas_generales': {
+                'total_productos': totales['total_productos'],
+                'total_servicios': totales['total_servicios'],
+                'total_clientes': totales['total_clientes'],
+                'total_contactos': totales['total_contactos'],
+                'total_sugerencias': totales['total_sugerencias'],
+                'total_noticias': totales['total_noticias'],
+                'solicitudes_pendientes': totales['solicitudes_pendientes'],
+                'productos_agotados': totales['productos_agotados'],
+                'nuevas_solicitudes_30d': totales['nuevas_solicitudes_30d'],
+                'nuevos_contactos_30d': totales['nuevos_contactos_30d']
+            }
+        }
+
+    def resumen(self):
+        """Payload de /api/dashboard/resumen (una sentencia)"""
+        totales = self.totales(('productos', 'servicios', 'clientes', 'contactos'))
+        return {
+            'productos': totales['total_productos'],
+            'servicios': totales['total_servicios'],
+            'clientes': totales['total_clientes'],
+            'contactos_total': totales['total_contactos'],
+            'contactos_hoy': totales['contactos_hoy']
+        }
+
+    def estadisticas_servicios(self):
+        """Payload de /api/servicios/estadisticas (una sentencia)"""
+        totales = self.totales(('servicios', 'solicitudes'))
+        return {
+            'total_servicios': totales['total_servicios'],
+            'total_solicitudes': totales['total_solicitudes'],
+            'solicitudes_pendientes': totales['solicitudes_pendientes'],
+            'solicitudes_completadas': totales['solicitudes_completadas']
+        }
+
+    def estadisticas_contactos(self):
+        """Payload de /api/contactos/estadisticas (una sentencia)"""
+        totales = self.totales(('contactos', 'sugerencias'))
+        return {
+            'total_contactos': totales['total_contactos'],
+            'contactos_30_dias': totales['nuevos_contactos_30d'],
+            'total_sugerencias': totales['total_sugerencias'],
+            'sugerencias_30_dias': totales['sugerencias_30d']
+        }
+
+
+# Instancia global del agregador
+dashboard_aggregator = DashboardAggregator()
@@ -0,0 +1,363 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from sqlalchemy import event, inspect
+from DataBase.models.database import db
+from DataBase.models.estadistica import ContadorDashboard
+from DataBase.models.producto import Producto, CategoriaProducto
+from DataBase.models.servicio import Servicio, SolicitudServicio
+from DataBase.models.cliente import Cliente
+from DataBase.models.contacto import Contacto, Sugerencia
+from DataBase.models.noticia import Noticia
+from .background import PeriodicTask
+
+
+def _dia(valor):
+    """Normalizar una fecha (datetime, date o texto de DATE()) a 'YYYY-MM-DD'"""
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor)[:10]
+
+
+def _claves_producto(v):
+    if not v['activo']:
+        return []
+    return ['productos.total', f"productos.estatus.{v['estatus']}", f"productos.categoria.{v['categoria_id']}"]
+
+
+def _claves_solicitud(v):
+    claves = ['solicitudes.total', f"solicitudes.estado.{v['estado']}", f"solicitudes.servicio.{v['servicio_id']}"]
+    if v['fecha_creacion'] is not None:
+        claves.append(f"solicitudes.dia.{_dia(v['fecha_creacion'])}")
+    return claves
+
+
+def _claves_por_dia(prefijo):
+    def claves(v):
+        resultado = [f'{prefijo}.total']
+        if v['fecha_creacion'] is not None:
+            resultado.append(f"{prefijo}.dia.{_dia(v['fecha_creacion'])}")
+        return resultado
+    return claves
+
+
+def _claves_activos(prefijo):
+    return lambda v: [f'{prefijo}.total'] if v['activo'] else []
+
+
+# Modelo -> (columnas que determinan las claves, función valores -> claves)
+CONTRIBUCIONES = {
+    Producto: (('activo', 'estatus', 'categoria_id'), _claves_producto),
+    Servicio: (('activo',), _claves_activos('servicios')),
+    SolicitudServicio: (('estado', 'servicio_id', 'fecha_creacion'), _claves_solicitud),
+    Contacto: (('fecha_creacion',), _claves_por_dia('contactos')),
+    Sugerencia: (('fecha_creacion',), _claves_por_dia('sugerencias')),
+    Cliente: (('activo',), _claves_activos('clientes')),
+    Noticia: (('activo',), _claves_activos('noticias')),
+}
+
+
+def _valores_actuales(target, campos):
+    return {campo: getattr(target, campo) for campo in campos}
+
+
+def _cargar_anterior(target, value, oldvalue, initiator):
+    """Sin efecto: existe para registrar las columnas con active_history"""
+
+
+def _valores_anteriores(target, campos):
+    """
+    Valores previos al flush según el historial de atributos; las columnas
+    se registran con active_history, así el valor anterior está aunque el
+    objeto estuviera expirado al asignarlas.
+    """
+    estado = inspect(target)
+    valores = {}
+    for campo in campos:
+        historial = estado.attrs[campo].history
+        if historial.deleted:
+            valores[campo] = historial.deleted[0]
+        else:
+            valores[campo] = getattr(target, campo)
+    return valores
+
+
+# Días hacia atrás que leen los totales (la ventana más grande es de 30 días);
+# las claves .dia. más viejas se borran al reconciliar
+VENTANA_DIAS = 30
+PREFIJOS_DIA = ('solicitudes', 'contactos', 'sugerencias')
+
+
+def _es_clave_dia(clave):
+    return '.dia.' in clave
+
+
+def _claves_dia(hoy, dias=VENTANA_DIAS):
+    """Claves .dia. de los últimos `dias` días para cada prefijo con conteo diario"""
+    return [f'{prefijo}.dia.{(hoy - timedelta(days=n)).isoformat()}'
+            for prefijo in PREFIJOS_DIA for n in range(dias)]
+
+
+def _upsert(connection, valores, sumar):
+    """
+    Escribir {clave: valor} en contadores_dashboard con el upsert nativo del
+    dialecto: con `sumar` el valor se suma al existente, si no lo reemplaza.
+    """
+    tabla = ContadorDashboard.__table__
+    ahora = datetime.utcnow()
+    filas = [
+        {'clave': clave, 'valor': valor, 'fecha_creacion': ahora, 'fecha_actualizacion': ahora, 'activo': True}
+        for clave, valor in valores.items() if valor or not sumar
+    ]
+    if not filas:
+        return
+
+    dialecto = connection.dialect.name
+    if dialecto == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(tabla)
+        stmt = stmt.on_duplicate_key_update(
+            valor=tabla.c.valor + stmt.inserted.valor if sumar else stmt.inserted.valor,
+            fecha_actualizacion=stmt.inserted.fecha_actualizacion
+        )
+        connection.execute(stmt, filas)
+    elif dialecto in ('sqlite', 'postgresql'):
+        if dialecto == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(tabla)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[tabla.c.clave],
+            set_={'valor': tabla.c.valor + stmt.excluded.valor if sumar else stmt.excluded.valor,
+                  'fecha_actualizacion': stmt.excluded.fecha_actualizacion}
+        )
+        connection.execute(stmt, filas)
+    else:
+        for fila in filas:
+            actualizadas = connection.execute(
+                tabla.update().where(tabla.c.clave == fila['clave']).values(
+                    valor=tabla.c.valor + fila['valor'] if sumar else fila['valor'],
+                    fecha_actualizacion=ahora
+                )
+            ).rowcount
+            if not actualizadas:
+                connection.execute(tabla.insert().values(**fila))
+
+
+def _upsert_incrementos(connection, deltas):
+    """Sumar deltas a contadores_dashboard"""
+    _upsert(connection, deltas, sumar=True)
+
+
+def _upsert_valores(connection, valores):
+    """Fijar valores absolutos en contadores_dashboard"""
+    _upsert(connection, valores, sumar=False)
+
+
+class DashboardCounters:
+    """
+    Contadores del dashboard mantenidos de forma incremental.
+    Los eventos after_insert/after_update/after_delete de cada modelo acumulan
+    deltas en session.info y after_flush los aplica con un upsert por clave,
+    dentro de la misma transacción que la escritura. Leer el dashboard es
+    leer una tabla pequeña, sin importar el tamaño de las tablas contadas.
+    La reconciliación escribe valores absolutos, así dos workers que
+    reconcilian a la vez dejan el mismo resultado, y borra las claves por
+    día que ya quedaron fuera de VENTANA_DIAS.
+    """
+
+    DELTAS_KEY = 'contadores_dashboard'
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.reconciler = None
+
+    def init_app(self, app):
+        """Registrar eventos y la tarea de reconciliación"""
+        self.app = app
+        self.enabled = app.config.get('DASHBOARD_COUNTERS_ENABLED', True)
+        if not self.enabled:
+            return
+
+        for modelo in CONTRIBUCIONES:
+            for nombre, handler in (('after_insert', self._after_insert),
+                                    ('after_update', self._after_update),
+                                    ('after_delete', self._after_delete)):
+                if not event.contains(modelo, nombre, handler):
+                    event.listen(modelo, nombre, handler)
+            for campo in CONTRIBUCIONES[modelo][0]:
+                atributo = getattr(modelo, campo)
+                if not event.contains(atributo, 'set', _cargar_anterior):
+                    event.listen(atributo, 'set', _cargar_anterior, active_history=True)
+        if not event.contains(db.session, 'after_flush', self._after_flush):
+            event.listen(db.session, 'after_flush', self._after_flush)
+
+        interval = app.config.get('DASHBOARD_RECONCILE_INTERVAL', 600)
+        if self.reconciler is None:
+            self.reconciler = PeriodicTask('dashboard-reconcile', interval, self._reconcile_job)
+        else:
+            self.reconciler.interval = interval
+
+    # ==================== EVENTOS ====================
+
+    def _deltas(self, target):
+        session = inspect(target).session
+        return session.info.setdefault(self.DELTAS_KEY, Counter())
+
+    def _after_insert(self, mapper, connection, target):
+        campos, claves = CONTRIBUCIONES[mapper.class_]
+        self._deltas(target).update(claves(_valores_actuales(target, campos)))
+
+    def _after_update(self, mapper, connection, target):
+        campos, claves = CONTRIBUCIONES[mapper.class_]
+        deltas = self._deltas(target)
+        deltas.subtract(claves(_valores_anteriores(target, campos)))
+        deltas.update(claves(_valores_actuales(target, campos)))
+
+    def _after_delete(self, mapper, connection, target):
+        campos, claves = CONTRIBUCIONES[mapper.class_]
+        self._deltas(target).subtract(claves(_valores_anteriores(target, campos)))
+
+    def _after_flush(self, session, flush_context):
+        deltas = session.info.pop(self.DELTAS_KEY, None)
+        if deltas:
+            _upsert_incrementos(session.connection(), deltas)
+
+    # ==================== RECONCILIACIÓN ====================
+
+    def _conteos_reales(self, desde):
+        """Recalcular las claves con un GROUP BY por modelo (las .dia. desde `desde`)"""
+        conteos = Counter()
+        for modelo, (campos, claves) in CONTRIBUCIONES.items():
+            columnas = [
+                db.func.date(modelo.fecha_creacion).label(campo) if campo == 'fecha_creacion'
+                else getattr(modelo, campo).label(campo)
+                for campo in campos
+            ]
+            filas = db.session.execute(
+                db.select(*columnas, db.func.count().label('n')).select_from(modelo).group_by(*columnas)
+            ).mappings()
+            for fila in filas:
+                for clave in claves(fila):
+                    if _es_clave_dia(clave) and clave.rsplit('.', 1)[1] < desde:
+                        continue
+                    conteos[clave] += fila['n']
+        return conteos
+
+    def reconcile(self):
+        """
+        Reemplazar los contadores por los conteos reales (requiere app context).
+        Regresa {clave: diferencia} de las claves que estaban mal.
+        """
+        desde = (datetime.utcnow().date() - timedelta(days=VENTANA_DIAS)).isoformat()
+        conteos = self._conteos_reales(desde)
+        tabla = ContadorDashboard.__table__
+        try:
+            existentes = dict(db.session.execute(db.select(tabla.c.clave, tabla.c.valor)).all())
+            vencidas = [clave for clave in existentes
+                        if _es_clave_dia(clave) and clave.rsplit('.', 1)[1] < desde]
+            reales = {}
+            deriva = {}
+            for clave in (set(existentes) - set(vencidas)) | set(conteos):
+                real = conteos.get(clave, 0)
+                if real != existentes.get(clave, 0) or clave not in existentes:
+                    reales[clave] = real
+                    deriva[clave] = real - existentes.get(clave, 0)
+            if reales:
+                _upsert_valores(db.session.connection(), reales)
+            if vencidas:
+                db.session.execute(tabla.delete().where(tabla.c.clave.in_(vencidas)))
+            db.session.commit()
+            return {clave: diferencia for clave, diferencia in deriva.items() if diferencia}
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _reconcile_job(self):
+        if self.app is None:
+            return
+        with self.app.app_context():
+            deriva = self.reconcile()
+            if deriva:
+                print(f"📊 Contadores del dashboard reconciliados: {len(deriva)} claves corregidas")
+
+    # ==================== LECTURA ====================
+
+    def valores(self):
+        """
+        Diccionario {clave: valor} con los totales y las claves por día de la
+        ventana; reconcilia la primera vez si la tabla está vacía.
+        """
+        if self.reconciler is not None:
+            self.reconciler.ensure_started()
+        tabla = ContadorDashboard.__table__
+        consulta = db.select(tabla.c.clave, tabla.c.valor).where(
+            db.or_(tabla.c.clave.not_like('%.dia.%'),
+                   tabla.c.clave.in_(_claves_dia(datetime.utcnow().date())))
+        )
+        valores = dict(db.session.execute(consulta).all())
+        if not valores:
+            self.reconcile()
+            valores = dict(db.session.execute(consulta).all())
+        return valores
+
+    @staticmethod
+    def _suma_dias(valores, prefijo, hoy, dias=VENTANA_DIAS):
+        return sum(valores.get(f'{prefijo}.dia.{(hoy - timedelta(days=n)).isoformat()}', 0) for n in range(dias))
+
+    def totales(self):
+        """Mismas claves que DashboardAggregator.totales(), leídas de los contadores"""
+        v = self.valores()
+        hoy = datetime.utcnow().date()
+        return {
+            'total_productos': v.get('productos.total', 0),
+            'productos_agotados': v.get('productos.estatus.agotado', 0),
+            'total_servicios': v.get('servicios.total', 0),
+            'total_solicitudes': v.get('solicitudes.total', 0),
+            'solicitudes_pendientes': v.get('solicitudes.estado.pendiente', 0),
+            'solicitudes_completadas': v.get('solicitudes.estado.completado', 0),
+            'nuevas_solicitudes_30d': self._suma_dias(v, 'solicitudes', hoy),
+            'total_clientes': v.get('clientes.total', 0),
+            'total_contactos': v.get('contactos.total', 0),
+            'nuevos_contactos_30d': self._suma_dias(v, 'contactos', hoy),
+            'contactos_hoy': v.get(f'contactos.dia.{hoy.isoformat()}', 0),
+            'total_sugerencias': v.get('sugerencias.total', 0),
+            'sugerencias_30d': self._suma_dias(v, 'sugerencias', hoy),
+            'total_noticias': v.get('noticias.total', 0),
+        }
+
+    def agrupaciones(self):
+        """Mismo formato que DashboardAggregator.agrupaciones(), leído de los contadores"""
+        v = self.valores()
+
+        def con_prefijo(prefijo):
+            return [(clave[len(prefijo):], valor) for clave, valor in v.items()
+                    if clave.startswith(prefijo) and valor > 0]
+
+        por_categoria = con_prefijo('productos.categoria.')
+        por_servicio = con_prefijo('solicitudes.servicio.')
+
+        nombres_categoria = dict(db.session.query(CategoriaProducto.id, CategoriaProducto.nombre).filter(
+            CategoriaProducto.id.in_([int(i) for i, _ in por_categoria if i.isdigit()])
+        ).all()) if por_categoria else {}
+        nombres_servicio = dict(db.session.query(Servicio.id, Servicio.nombre).filter(
+            Servicio.id.in_([int(i) for i, _ in por_servicio if i.isdigit()])
+        ).all()) if por_servicio else {}
+
+        return {
+            'categoria': [(nombres_categoria[int(i)], n) for i, n in por_categoria
+                          if i.isdigit() and int(i) in nombres_categoria],
+            'servicio': [(nombres_servicio[int(i)], n) for i, n in por_servicio
+                         if i.isdigit() and int(i) in nombres_servicio],
+            'estado': con_prefijo('solicitudes.estado.'),
+            'estatus': con_prefijo('productos.estatus.'),
+        }
+
+
+# Instancia global de los contadores
+dashboard_counters = DashboardCounters()
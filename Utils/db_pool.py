@@ -0,0 +1,160 @@
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from DataBase.models.database import db
+
+# Opciones que solo entienden los pools con tamaño (QueuePool)
+OPCIONES_QUEUE_POOL = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_use_lifo')
+
+# Espera a partir de la cual una obtención de conexión cuenta como lenta
+ESPERA_LENTA = 0.1  # segundos
+
+
+class PoolMetrics:
+    """Contadores de un pool de conexiones (protegidos por lock, se leen desde el dashboard)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.waits_slow = 0
+        self.peak_checked_out = 0
+
+    def espera(self, segundos, agotado=False):
+        with self._lock:
+            self.checkouts += 0 if agotado else 1
+            self.timeouts += 1 if agotado else 0
+            self.wait_total += segundos
+            self.wait_max = max(self.wait_max, segundos)
+            if segundos >= ESPERA_LENTA:
+                self.waits_slow += 1
+
+    def incrementar(self, contador):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def pico(self, en_uso):
+        with self._lock:
+            self.peak_checked_out = max(self.peak_checked_out, en_uso)
+
+    def snapshot(self):
+        with self._lock:
+            intentos = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'soft_invalidations': self.soft_invalidations,
+                'timeouts': self.timeouts,
+                'wait_ms_avg': round(self.wait_total / intentos * 1000, 3) if intentos else 0.0,
+                'wait_ms_max': round(self.wait_max * 1000, 3),
+                'waits_slow': self.waits_slow,
+                'peak_checked_out': self.peak_checked_out
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool que mide cuánto tarda cada obtención de conexión (incluye la
+    espera cuando el pool y el overflow están llenos) y cuántas terminan en
+    TimeoutError. Conexiones nuevas e invalidaciones se cuentan con eventos.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        metrics = self.metrics
+        event.listen(self, 'connect', lambda conexion, registro: metrics.incrementar('connects'))
+        event.listen(self, 'checkout', lambda conexion, registro, proxy: metrics.pico(self.checkedout()))
+        event.listen(self, 'invalidate', lambda conexion, registro, error: metrics.incrementar('invalidations'))
+        event.listen(self, 'soft_invalidate',
+                     lambda conexion, registro, error: metrics.incrementar('soft_invalidations'))
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.espera(time.perf_counter() - inicio, agotado=True)
+            raise
+        self.metrics.espera(time.perf_counter() - inicio)
+        return conexion
+
+
+def engine_options(uri, opciones):
+    """
+    Opciones de create_engine para `uri` a partir de SQLALCHEMY_ENGINE_OPTIONS:
+    usa el pool instrumentado y quita las de tamaño de pool para SQLite en
+    memoria (que no usa QueuePool).
+    """
+    opciones = dict(opciones or {})
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        for clave in OPCIONES_QUEUE_POOL:
+            opciones.pop(clave, None)
+        return opciones
+    opciones.setdefault('poolclass', InstrumentedQueuePool)
+    return opciones
+
+
+class PoolMonitor:
+    """Configuración y telemetría de los pools de conexiones de la aplicación"""
+
+    def __init__(self):
+        self.app = None
+
+    def init_app(self, app):
+        """
+        Ajustar SQLALCHEMY_ENGINE_OPTIONS y las opciones de cada bind, que
+        Flask-SQLAlchemy no hereda de ellas (llamar antes de init_db)
+        """
+        self.app = app
+        base = app.config.get('SQLALCHEMY_ENGINE_OPTIONS')
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], base)
+
+        binds = {}
+        for clave, valor in (app.config.get('SQLALCHEMY_BINDS') or {}).items():
+            opciones = dict(valor) if isinstance(valor, dict) else {'url': valor}
+            binds[clave] = {**engine_options(opciones['url'], base), **opciones}
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+    @staticmethod
+    def _estado(engine):
+        pool = engine.pool
+        estado = {
+            'pool_class': type(pool).__name__,
+            'url': engine.url.render_as_string(hide_password=True)
+        }
+        if isinstance(pool, QueuePool):
+            estado.update({
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,
+                'timeout': pool.timeout(),
+                'recycle': pool._recycle,
+                'pre_ping': pool._pre_ping
+            })
+        metrics = getattr(pool, 'metrics', None)
+        if metrics is not None:
+            estado.update(metrics.snapshot())
+        return estado
+
+    def stats(self):
+        """Estado de cada engine ('default' y binds adicionales)"""
+        return {
+            bind or 'default': self._estado(engine)
+            for bind, engine in db.engines.items()
+        }
+
+
+# Instancia global del monitor de pools
+pool_monitor = PoolMonitor()
@@ -0,0 +1,193 @@
+import random
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import insert, select, update
+from DataBase.models.database import db
+from DataBase.models.replica import LatidoReplica
+from .background import PeriodicTask
+from .table_versions import table_versions
+
+# Nombre de los binds de réplica en SQLALCHEMY_BINDS: replica1, replica2, ...
+PREFIJO_BIND = 'replica'
+
+
+class ReplicaRouter:
+    """
+    Lecturas públicas desde réplicas de la base de datos.
+    Cada URI de DB_REPLICA_URIS se registra como un bind de Flask-SQLAlchemy
+    y las vistas GET decoradas con @replica_router.prefer_replica(tablas) leen de una
+    réplica elegida al azar entre las sanas (RoutingSession manda las
+    escrituras al primario). Una tarea periódica escribe un latido en el
+    primario y lo lee en cada réplica; una réplica solo se usa si:
+    - respondió en la última verificación,
+    - su retraso no pasa de DB_REPLICA_MAX_LAG segundos, y
+    - ya tiene la última escritura confirmada por cualquier worker en las
+      tablas que lee la vista (su latido es posterior a
+      table_versions.ultima_escritura(tablas)), para que una lectura tras una
+      escritura no devuelva (ni deje en caché) datos viejos. Las escrituras
+      internas (agregados de visitas, contadores, outbox...) no cuentan.
+    En cualquier otro caso se lee del primario.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.binds = []
+        self.max_lag = 5.0
+        self.interval = 1.0
+        self.monitor = None
+        self._lock = threading.Lock()
+        self._estado = {}  # bind -> {'marca', 'lag', 'verificado', 'error'}
+        self.lecturas = Counter()  # 'replica' o motivo de usar el primario
+
+    def init_app(self, app):
+        """Registrar las réplicas como binds (llamar antes de pool_monitor.init_app e init_db)"""
+        self.app = app
+        uris = app.config.get('DB_REPLICA_URIS') or []
+        if isinstance(uris, str):
+            uris = [uri.strip() for uri in uris.split(',') if uri.strip()]
+
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        self.binds = []
+        for numero, uri in enumerate(uris, 1):
+            bind = f'{PREFIJO_BIND}{numero}'
+            binds[bind] = uri
+            self.binds.append(bind)
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+        self.max_lag = float(app.config.get('DB_REPLICA_MAX_LAG', 5))
+        self.interval = float(app.config.get('DB_REPLICA_CHECK_INTERVAL', 1))
+        with self._lock:
+            self._estado = {}
+            self.lecturas = Counter()
+
+        if self.binds:
+            if self.monitor is None:
+                self.monitor = PeriodicTask('replica-lag', self.interval, self._verificar_job)
+            else:
+                self.monitor.interval = self.interval
+
+    # ==================== MONITOR DE RETRASO ====================
+
+    def verificar(self):
+        """Escribir el latido en el primario y medir el retraso de cada réplica"""
+        tabla = LatidoReplica.__table__
+        # Por el engine y no por la sesión: el latido no cambia la versión de ninguna tabla
+        with db.engine.begin() as conexion:
+            if not conexion.execute(update(tabla).where(tabla.c.id == 1).values(marca=time.time())).rowcount:
+                conexion.execute(insert(tabla).values(id=1, marca=time.time()))
+
+        estados = {}
+        for bind in self.binds:
+            ahora = time.time()
+            try:
+                with db.engines[bind].connect() as conexion:
+                    marca = conexion.execute(select(tabla.c.marca).where(tabla.c.id == 1)).scalar()
+                estados[bind] = {
+                    'marca': marca,
+                    'lag': ahora - marca if marca is not None else None,
+                    'verificado': ahora,
+                    'error': None if marca is not None else 'sin latido'
+                }
+            except Exception as e:
+                estados[bind] = {'marca': None, 'lag': None, 'verificado': ahora, 'error': str(e)}
+
+        with self._lock:
+            self._estado = estados
+        return estados
+
+    def _verificar_job(self):
+        if self.app is None:
+            return
+        with self.app.app_context():
+            self.verificar()
+
+    # ==================== ENRUTAMIENTO ====================
+
+    def _motivo(self, estado, ahora, ultima_escritura):
+        """None si la réplica se puede usar; si no, el motivo para ir al primario"""
+        if estado is None or ahora - estado['verificado'] > 3 * self.interval:
+            return 'sin_verificar'
+        if estado['error'] is not None:
+            return 'error'
+        if estado['lag'] > self.max_lag:
+            return 'retraso'
+        if ultima_escritura is not None and estado['marca'] < ultima_escritura:
+            return 'escritura_reciente'
+        return None
+
+    def elegir(self, tablas):
+        """(bind, 'replica') o (None, motivo para leer del primario) para leer `tablas`"""
+        if not self.binds:
+            return None, 'sin_replicas'
+        self.monitor.ensure_started()
+
+        ahora = time.time()
+        ultima_escritura = table_versions.ultima_escritura(tablas)
+        with self._lock:
+            estados = dict(self._estado)
+
+        sanas = []
+        motivo = 'sin_verificar'
+        for bind in self.binds:
+            rechazo = self._motivo(estados.get(bind), ahora, ultima_escritura)
+            if rechazo is None:
+                sanas.append(bind)
+            else:
+                motivo = rechazo
+
+        bind = random.choice(sanas) if sanas else None
+        motivo = 'replica' if bind else motivo
+        with self._lock:
+            self.lecturas[motivo] += 1
+        return bind, motivo
+
+    def prefer_replica(self, *tablas):
+        """
+        Vista GET de solo lectura de `tablas` que puede leer de una réplica.
+        Usar debajo de las cachés (una respuesta en caché no consulta la base
+        de datos). La respuesta lleva X-DB-Route con el bind usado ('primary'
+        si ninguno). Uso: @replica_router.prefer_replica('productos')
+        """
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if not self.binds or request.method not in ('GET', 'HEAD'):
+                    return f(*args, **kwargs)
+
+                bind, _ = self.elegir(tablas)
+                if bind is not None:
+                    db.session.info['replica'] = db.engines[bind]
+                try:
+                    respuesta = make_response(f(*args, **kwargs))
+                finally:
+                    db.session.info.pop('replica', None)
+                respuesta.headers['X-DB-Route'] = bind or 'primary'
+                return respuesta
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Estado de cada réplica y cuántas lecturas fueron a réplica / primario (por motivo)"""
+        with self._lock:
+            estados = dict(self._estado)
+            lecturas = dict(self.lecturas)
+        replicas = {}
+        for bind in self.binds:
+            estado = estados.get(bind)
+            replicas[bind] = {
+                'lag': round(estado['lag'], 3) if estado and estado['lag'] is not None else None,
+                'error': estado['error'] if estado else None,
+                'verificado_hace': round(time.time() - estado['verificado'], 3) if estado else None
+            }
+        return {
+            'replicas': replicas,
+            'max_lag': self.max_lag,
+            'lecturas': lecturas
+        }
+
+
+# Instancia global del enrutador de réplicas
+replica_router = ReplicaRouter()
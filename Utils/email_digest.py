@@ -0,0 +1,266 @@
+import threading
+import uuid
+from datetime import datetime
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import event, func, insert, select, update
+from DataBase.models.database import db
+from DataBase.models.email_outbox import EmailOutbox
+from .background import PeriodicTask
+from .email_outbox import email_outbox
+from .email_templates import email_templates
+
+
+class EmailDigest:
+    """
+    Resumen de las notificaciones al administrador en campañas de mucho tráfico.
+    Con EMAIL_DIGEST_ENABLED los tipos de EMAIL_DIGEST_TYPES no se envían uno
+    por uno: retener() guarda la notificación en email_outbox como retenida
+    (en la transacción del registro, igual que add()) junto con sus campos
+    para el resumen. Una tarea en segundo plano junta, por tipo, las
+    retenidas cuando llegan a `máximo` o cuando la más vieja cumple la
+    `ventana`, y en la misma transacción las marca como resumidas y deja un
+    único email pendiente con todas; lo envía el relay del outbox. Si el
+    proceso muere antes, las filas siguen retenidas y entran en el siguiente
+    resumen. Las solicitudes de los servicios de EMAIL_DIGEST_PRIORITY_SERVICES
+    se envían al momento, y las retenidas de un tipo que deja de resumirse
+    se liberan como emails individuales.
+    """
+
+    RETENIDOS_KEY = 'email_digest_retenidos'
+
+    ETIQUETAS = {
+        'contacto': 'mensajes de contacto',
+        'sugerencia': 'sugerencias',
+        'solicitud_servicio': 'solicitudes de servicio'
+    }
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.umbrales = {}  # tipo -> (ventana en segundos, máximo de eventos)
+        self.prioritarios = frozenset()  # ids o nombres de servicio en minúsculas
+        self.tarea = None
+        self._lock = threading.Lock()
+        self.resumenes = 0
+        self.resumidos = 0
+        self.liberados = 0
+
+    def init_app(self, app):
+        """Leer los umbrales por tipo y arrancar la tarea que arma los resúmenes"""
+        self.app = app
+        self.enabled = app.config.get('EMAIL_DIGEST_ENABLED', False)
+        self.umbrales = self.parse_umbrales(
+            app.config.get('EMAIL_DIGEST_TYPES', ''),
+            float(app.config.get('EMAIL_DIGEST_WINDOW', 300)),
+            int(app.config.get('EMAIL_DIGEST_MAX_EVENTS', 20))
+        )
+        self.prioritarios = frozenset(
+            str(servicio).strip().lower() for servicio in app.config.get('EMAIL_DIGEST_PRIORITY_SERVICES', [])
+        )
+        interval = app.config.get('EMAIL_DIGEST_CHECK_INTERVAL', 15)
+        if self.tarea is None:
+            self.tarea = PeriodicTask('email-digest', interval, self._job)
+        else:
+            self.tarea.interval = interval
+
+        for nombre, handler in (('after_commit', self._after_commit),
+                                ('after_rollback', self._after_rollback)):
+            if not event.contains(db.session, nombre, handler):
+                event.listen(db.session, nombre, handler)
+
+        if email_outbox.enabled:
+            # Retenidas de una ejecución anterior (o que hay que liberar si se desactivó)
+            self.tarea.ensure_started()
+
+    @staticmethod
+    def parse_umbrales(valor, ventana, maximo):
+        """
+        'contacto:600:50,sugerencia' -> {'contacto': (600.0, 50), 'sugerencia': (ventana, maximo)}
+        La ventana y el máximo de cada tipo son opcionales.
+        """
+        umbrales = {}
+        for entrada in str(valor or '').split(','):
+            partes = [parte.strip() for parte in entrada.split(':')]
+            if not partes[0]:
+                continue
+            try:
+                ventana_tipo = float(partes[1]) if len(partes) > 1 and partes[1] else ventana
+                maximo_tipo = int(partes[2]) if len(partes) > 2 and partes[2] else maximo
+            except ValueError:
+                print(f"⚠️ EMAIL_DIGEST_TYPES: entrada inválida '{entrada.strip()}', se usan los valores por defecto")
+                ventana_tipo, maximo_tipo = ventana, maximo
+            umbrales[partes[0]] = (max(0.0, ventana_tipo), max(1, maximo_tipo))
+        return umbrales
+
+    # ==================== ESCRITURA ====================
+
+    def agrupa(self, tipo):
+        """True si las notificaciones de `tipo` van al resumen"""
+        return self.enabled and email_outbox.enabled and tipo in self.umbrales
+
+    def prioritario(self, servicio):
+        """True si las solicitudes de `servicio` se envían al momento (por id o nombre)"""
+        if not self.prioritarios or servicio is None:
+            return False
+        return (str(servicio.id) in self.prioritarios
+                or (servicio.nombre or '').strip().lower() in self.prioritarios)
+
+    def retener(self, mensaje, tipo, datos, session=None):
+        """
+        Guardar la notificación para el resumen de `tipo` en la transacción de
+        `session` (db.session por defecto). `datos` son los campos que muestra
+        el resumen; el mensaje completo queda por si hay que enviarlo solo.
+        """
+        session = session or db.session
+        fila = email_outbox.add(mensaje, tipo, session=session, estado='retenido', datos=datos)
+        session.info[self.RETENIDOS_KEY] = True
+        return fila
+
+    def _after_commit(self, session):
+        # Revisar ya el máximo de eventos, sin esperar el intervalo
+        if session.info.pop(self.RETENIDOS_KEY, None) and self.tarea is not None:
+            self.tarea.wake()
+
+    def _after_rollback(self, session):
+        session.info.pop(self.RETENIDOS_KEY, None)
+
+    # ==================== RESÚMENES ====================
+
+    @staticmethod
+    def _grupos():
+        """(tipo, retenidas, creación de la más vieja) por cada tipo con filas retenidas"""
+        tabla = EmailOutbox.__table__
+        with db.engine.connect() as conexion:
+            return conexion.execute(
+                select(tabla.c.tipo, func.count(), func.min(tabla.c.fecha_creacion))
+                .where(tabla.c.estado == 'retenido')
+                .group_by(tabla.c.tipo)
+            ).all()
+
+    def _mensaje(self, tipo, filas):
+        """Email con el resumen de `filas` (id, datos, fecha_creacion) de `tipo`"""
+        etiqueta = self.ETIQUETAS.get(tipo, tipo)
+        eventos = [dict(fila.datos or {}, fecha=fila.fecha_creacion) for fila in filas]
+        msg = Message(
+            subject=f"📬 Resumen: {len(eventos)} {etiqueta}",
+            sender=current_app.config['MAIL_USERNAME'],
+            recipients=[current_app.config['MAIL_USERNAME']]
+        )
+        msg.html, msg.body = email_templates.render(
+            'resumen',
+            etiqueta=etiqueta,
+            eventos=eventos,
+            desde=eventos[0]['fecha'],
+            hasta=eventos[-1]['fecha']
+        )
+        return msg
+
+    def resumir(self, tipo, limite):
+        """
+        Juntar hasta `limite` retenidas de `tipo` en un email pendiente
+        (requiere app context). Regresa cuántas entraron en el resumen.
+        """
+        tabla = EmailOutbox.__table__
+        token = uuid.uuid4().hex
+        retenidas = (tabla.c.estado == 'retenido', tabla.c.tipo == tipo)
+        consulta = (
+            select(tabla.c.id)
+            .where(*retenidas)
+            .order_by(tabla.c.id)
+            .limit(limite)
+            .with_for_update(skip_locked=email_outbox.skip_locked)
+        )
+        # Marcar las retenidas y guardar el resumen en una sola transacción:
+        # o se resumen y el resumen queda pendiente, o siguen retenidas
+        with db.engine.begin() as conexion:
+            ids = conexion.execute(consulta).scalars().all()
+            if not ids:
+                return 0
+            conexion.execute(
+                update(tabla).where(tabla.c.id.in_(ids), *retenidas).values(estado='resumido', reclamo=token)
+            )
+            filas = conexion.execute(
+                select(tabla.c.id, tabla.c.datos, tabla.c.fecha_creacion)
+                .where(tabla.c.id.in_(ids), tabla.c.reclamo == token)
+                .order_by(tabla.c.id)
+            ).all()
+            if not filas:
+                return 0
+            # Los defaults de las columnas la dejan pendiente y vencida
+            conexion.execute(insert(tabla).values(email_outbox.valores(self._mensaje(tipo, filas), f'resumen_{tipo}')))
+        with self._lock:
+            self.resumenes += 1
+            self.resumidos += len(filas)
+        return len(filas)
+
+    def liberar(self, tipo):
+        """Pasar las retenidas de `tipo` a pendientes: se envían como emails individuales"""
+        tabla = EmailOutbox.__table__
+        with db.engine.begin() as conexion:
+            liberadas = conexion.execute(
+                update(tabla)
+                .where(tabla.c.estado == 'retenido', tabla.c.tipo == tipo)
+                .values(estado='pendiente', proximo_intento=datetime.utcnow())
+            ).rowcount
+        with self._lock:
+            self.liberados += liberadas
+        return liberadas
+
+    def procesar(self):
+        """Armar los resúmenes que ya toca enviar (requiere app context). Regresa cuántos se armaron"""
+        ahora = datetime.utcnow()
+        resumenes = 0
+        liberadas = 0
+        for tipo, total, primera in self._grupos():
+            if not self.agrupa(tipo):
+                liberadas += self.liberar(tipo)
+                continue
+            ventana, maximo = self.umbrales[tipo]
+            # Con la ventana vencida se envía todo lo retenido; si no, solo resúmenes completos
+            vencida = (ahora - primera).total_seconds() >= ventana
+            while total >= maximo or (vencida and total > 0):
+                incluidas = self.resumir(tipo, maximo)
+                if not incluidas:
+                    break
+                total -= incluidas
+                resumenes += 1
+        if (resumenes or liberadas) and email_outbox.relay is not None:
+            email_outbox.relay.wake()
+        return resumenes
+
+    def _job(self):
+        if self.app is None or not email_outbox.enabled:
+            return
+        with self.app.app_context():
+            self.procesar()
+
+    # ==================== MÉTRICAS ====================
+
+    def stats(self):
+        """Umbrales y retenidas por tipo, y contadores de resúmenes"""
+        retenidas = {tipo: (total, primera) for tipo, total, primera in self._grupos()}
+        ahora = datetime.utcnow()
+        tipos = {}
+        for tipo in sorted(set(self.umbrales) | set(retenidas)):
+            ventana, maximo = self.umbrales.get(tipo, (None, None))
+            total, primera = retenidas.get(tipo, (0, None))
+            tipos[tipo] = {
+                'ventana_s': ventana,
+                'maximo': maximo,
+                'retenidas': total,
+                'retenida_mas_antigua_s': round((ahora - primera).total_seconds(), 1) if primera else None
+            }
+        with self._lock:
+            return {
+                'habilitado': self.enabled,
+                'tipos': tipos,
+                'servicios_prioritarios': sorted(self.prioritarios),
+                'resumenes': self.resumenes,
+                'resumidos': self.resumidos,
+                'liberados': self.liberados
+            }
+
+
+# Instancia global de los resúmenes de notificaciones
+email_digest = EmailDigest()
@@ -0,0 +1,266 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+POLITICAS = ('block', 'drop_new', 'drop_oldest', 'sync')
+
+# Marca para que un worker termine
+_FIN = object()
+
+
+class EmailDispatcher:
+    """
+    Envío de emails en segundo plano con un número fijo de workers.
+    Los mensajes entran a una cola acotada (EMAIL_QUEUE_SIZE) que atienden
+    EMAIL_WORKERS hilos, en lugar de crear un hilo (y una conexión SMTP) por
+    mensaje. Si la cola está llena se aplica EMAIL_QUEUE_OVERFLOW:
+    - block: esperar hasta EMAIL_QUEUE_TIMEOUT segundos y descartar si no hay lugar
+    - drop_new: descartar el mensaje nuevo
+    - drop_oldest: descartar el más antiguo en espera para hacer lugar
+    - sync: enviarlo en el hilo de la petición
+    Cada worker toma de una vez hasta EMAIL_BATCH_SIZE mensajes ya en cola y
+    los envía dentro de una misma `sesion()` (la misma conexión SMTP).
+    Al detener el proceso se deja de aceptar mensajes y se espera hasta
+    EMAIL_DRAIN_TIMEOUT segundos a que la cola se vacíe.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enviar = None
+        self.sesion = nullcontext
+        self.al_detener = None
+        self.workers = 2
+        self.lote = 10
+        self.capacidad = 100
+        self.politica = 'block'
+        self.espera_maxima = 5.0
+        self.drain_timeout = 10.0
+        self._lock = threading.Lock()
+        self._iniciar_estado()
+        atexit.register(self.shutdown)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._iniciar_estado)
+
+    def _iniciar_estado(self):
+        # También tras un fork: los hilos no sobreviven y la cola del padre no es de este proceso
+        self._lock = threading.Lock()
+        self._cola = None
+        self._hilos = []
+        self._cerrado = False
+        self.encolados = 0
+        self.enviados = 0
+        self.fallidos = 0
+        self.descartados = 0
+        self.en_curso = 0
+        self.ultimo_error = None
+        self._latencias = deque(maxlen=500)  # segundos de cada envío
+        self._esperas = deque(maxlen=500)    # segundos en cola antes de enviarse
+
+    def init_app(self, app, enviar, sesion=None, al_detener=None):
+        """
+        Configurar la cola. `enviar(mensaje)` hace el envío real (dentro de app
+        context), `sesion()` envuelve cada lote y `al_detener()` se llama
+        cuando los workers terminaron (para cerrar conexiones).
+        """
+        self.app = app
+        self.enviar = enviar
+        self.sesion = sesion or nullcontext
+        self.al_detener = al_detener
+        self.workers = max(1, int(app.config.get('EMAIL_WORKERS', 2)))
+        self.lote = max(1, int(app.config.get('EMAIL_BATCH_SIZE', 10)))
+        self.capacidad = max(1, int(app.config.get('EMAIL_QUEUE_SIZE', 100)))
+        politica = str(app.config.get('EMAIL_QUEUE_OVERFLOW', 'block')).lower()
+        self.politica = politica if politica in POLITICAS else 'block'
+        self.espera_maxima = float(app.config.get('EMAIL_QUEUE_TIMEOUT', 5))
+        self.drain_timeout = float(app.config.get('EMAIL_DRAIN_TIMEOUT', 10))
+
+    # ==================== WORKERS ====================
+
+    def _asegurar_workers(self):
+        """Crear la cola y arrancar los workers en el primer envío de este proceso"""
+        if self._cola is None:
+            with self._lock:
+                if self._cola is None:
+                    cola = queue.Queue(maxsize=self.capacidad)
+                    self._hilos = [
+                        threading.Thread(target=self._worker, args=(cola,), name=f'email-worker-{n}', daemon=True)
+                        for n in range(self.workers)
+                    ]
+                    for hilo in self._hilos:
+                        hilo.start()
+                    self._cola = cola
+        return self._cola
+
+    def _worker(self, cola):
+        while True:
+            # Lo que ya está en cola se envía junto, por la misma conexión
+            elementos = [cola.get()]
+            while len(elementos) < self.lote and elementos[-1] is not _FIN:
+                try:
+                    elementos.append(cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self.sesion():
+                    for elemento in elementos:
+                        if elemento is _FIN:
+                            continue
+                        encolado, mensaje, al_terminar = elemento
+                        with self._lock:
+                            self._esperas.append(time.monotonic() - encolado)
+                        self._entregar(mensaje, al_terminar)
+            except Exception as e:
+                print(f"❌ Error en lote de emails: {e}")
+            finally:
+                for _ in elementos:
+                    cola.task_done()
+            if elementos[-1] is _FIN:
+                return
+
+    def _entregar(self, mensaje, al_terminar=None):
+        with self._lock:
+            self.en_curso += 1
+        inicio = time.monotonic()
+        error = None
+        try:
+            with self.app.app_context():
+                self.enviar(mensaje)
+            exito = True
+        except Exception as e:
+            exito = False
+            error = f'{type(e).__name__}: {e}'
+            print(f"❌ Error enviando email: {e}")
+        self._notificar(al_terminar, exito, error)
+        with self._lock:
+            self.en_curso -= 1
+            self._latencias.append(time.monotonic() - inicio)
+            if exito:
+                self.enviados += 1
+            else:
+                self.fallidos += 1
+                self.ultimo_error = error
+        return exito
+
+    def _notificar(self, al_terminar, exito, error):
+        """Avisar del resultado a quien encoló el mensaje (dentro de app context)"""
+        if al_terminar is None:
+            return
+        try:
+            with self.app.app_context():
+                al_terminar(exito, error)
+        except Exception as e:
+            print(f"❌ Error registrando resultado de email: {e}")
+
+    # ==================== ENVÍO ====================
+
+    def _descartar(self, mensaje, motivo, al_terminar=None):
+        with self._lock:
+            self.descartados += 1
+        print(f"⚠️ Email descartado ({motivo}): {getattr(mensaje, 'subject', '')}")
+        self._notificar(al_terminar, False, f'Descartado: {motivo}')
+        return False
+
+    def libres(self):
+        """Lugares libres en la cola (para no reclamar más de lo que cabe)"""
+        if self._cerrado:
+            return 0
+        cola = self._cola
+        return self.capacidad - (cola.qsize() if cola is not None else 0)
+
+    def submit(self, mensaje, al_terminar=None):
+        """
+        Encolar un mensaje. Regresa True si quedó en cola (o se envió, con la
+        política sync) y False si se descartó. Si se indica, `al_terminar(exito,
+        error)` se llama tras el intento de envío o al descartarlo.
+        """
+        if self._cerrado:
+            return self._descartar(mensaje, 'cerrando', al_terminar)
+        cola = self._asegurar_workers()
+        elemento = (time.monotonic(), mensaje, al_terminar)
+
+        try:
+            cola.put_nowait(elemento)
+        except queue.Full:
+            if self.politica == 'sync':
+                return self._entregar(mensaje, al_terminar)
+            if self.politica == 'drop_new':
+                return self._descartar(mensaje, 'cola llena', al_terminar)
+            if self.politica == 'drop_oldest':
+                try:
+                    _, antiguo, aviso = cola.get_nowait()
+                    cola.task_done()
+                    self._descartar(antiguo, 'cola llena, el más antiguo', aviso)
+                except queue.Empty:
+                    pass
+            try:
+                cola.put(elemento, timeout=self.espera_maxima if self.politica == 'block' else 0)
+            except queue.Full:
+                return self._descartar(mensaje, 'cola llena', al_terminar)
+
+        with self._lock:
+            self.encolados += 1
+        return True
+
+    def shutdown(self, timeout=None):
+        """Dejar de aceptar mensajes, enviar los pendientes y detener los workers"""
+        cola = self._cola
+        self._cerrado = True
+        if cola is None:
+            return True
+        limite = time.monotonic() + (self.drain_timeout if timeout is None else timeout)
+        for _ in self._hilos:
+            # Las marcas de fin van detrás de los mensajes pendientes
+            while time.monotonic() < limite:
+                try:
+                    cola.put(_FIN, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+        for hilo in self._hilos:
+            hilo.join(max(0.0, limite - time.monotonic()))
+        # Lo que queda en la cola, sin las marcas de fin de los workers que siguen vivos
+        pendientes = max(0, cola.qsize() - sum(hilo.is_alive() for hilo in self._hilos))
+        self._cola = None
+        if self.al_detener is not None:
+            self.al_detener()
+        if pendientes:
+            print(f"⚠️ {pendientes} email(s) sin enviar al detener el proceso")
+        return pendientes == 0
+
+    # ==================== MÉTRICAS ====================
+
+    @staticmethod
+    def _resumen(valores):
+        if not valores:
+            return {'avg_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'avg_ms': round(sum(valores) / len(valores) * 1000, 3),
+            'max_ms': round(max(valores) * 1000, 3)
+        }
+
+    def stats(self):
+        """Profundidad de la cola, envíos, fallos, descartes y latencias recientes"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'lote': self.lote,
+                'politica': self.politica,
+                'capacidad': self.capacidad,
+                'en_cola': self._cola.qsize() if self._cola is not None else 0,
+                'en_curso': self.en_curso,
+                'encolados': self.encolados,
+                'enviados': self.enviados,
+                'fallidos': self.fallidos,
+                'descartados': self.descartados,
+                'ultimo_error': self.ultimo_error,
+                'latencia_envio': self._resumen(self._latencias),
+                'espera_en_cola': self._resumen(self._esperas)
+            }
+
+
+# Instancia global del despachador de emails
+email_dispatcher = EmailDispatcher()
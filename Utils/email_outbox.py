@@ -0,0 +1,269 @@
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.utils import formataddr
+from functools import partial
+from flask_mail import Message
+from sqlalchemy import and_, delete, event, func, or_, select, update
+from DataBase.models.database import db
+from DataBase.models.email_outbox import EmailOutbox
+from .background import PeriodicTask
+from .email_dispatcher import email_dispatcher
+
+
+class EmailOutboxRelay:
+    """
+    Envío garantizado de emails a través de la tabla email_outbox.
+    add() guarda el mensaje en la sesión actual: se confirma (o se descarta)
+    junto con el registro que lo origina, y la petición no espera al SMTP.
+    Un relay en segundo plano reclama lotes de filas vencidas (SELECT ...
+    FOR UPDATE SKIP LOCKED y un UPDATE condicionado, así dos workers nunca
+    toman la misma fila), las pasa a la cola de Utils.email_dispatcher y
+    marca cada una como enviada o la reprograma con backoff exponencial
+    (EMAIL_OUTBOX_BACKOFF_BASE * 2^(intentos-1), con jitter y tope
+    EMAIL_OUTBOX_BACKOFF_MAX). Tras EMAIL_OUTBOX_MAX_ATTEMPTS queda fallida.
+    Una fila reclamada por un worker que murió vuelve a estar disponible al
+    vencer su reclamo (EMAIL_OUTBOX_LEASE): la entrega es al menos una vez.
+    """
+
+    PENDIENTES_KEY = 'email_outbox_pendientes'
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.lote = 20
+        self.max_intentos = 8
+        self.backoff_base = 30.0
+        self.backoff_max = 3600.0
+        self.reclamo = 300.0
+        self.skip_locked = True
+        self.retencion_dias = 30
+        self.relay = None
+        self._lock = threading.Lock()
+        self._ultima_purga = 0.0
+        self.reclamados = 0
+        self.enviados = 0
+        self.reintentos = 0
+        self.fallidos = 0
+        self.perdidos = 0  # resultados que llegaron con el reclamo ya vencido
+
+    def init_app(self, app):
+        """Configurar el relay y avisarle cuando se confirman emails nuevos"""
+        self.app = app
+        self.enabled = app.config.get('EMAIL_OUTBOX_ENABLED', True)
+        self.lote = max(1, int(app.config.get('EMAIL_OUTBOX_BATCH', 20)))
+        self.max_intentos = max(1, int(app.config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 8)))
+        self.backoff_base = float(app.config.get('EMAIL_OUTBOX_BACKOFF_BASE', 30))
+        self.backoff_max = float(app.config.get('EMAIL_OUTBOX_BACKOFF_MAX', 3600))
+        self.reclamo = float(app.config.get('EMAIL_OUTBOX_LEASE', 300))
+        self.skip_locked = app.config.get('EMAIL_OUTBOX_SKIP_LOCKED', True)
+        self.retencion_dias = int(app.config.get('EMAIL_OUTBOX_RETENTION_DAYS', 30))
+        interval = app.config.get('EMAIL_OUTBOX_POLL_INTERVAL', 5)
+        if self.relay is None:
+            self.relay = PeriodicTask('email-outbox', interval, self._job)
+        else:
+            self.relay.interval = interval
+
+        for nombre, handler in (('after_commit', self._after_commit),
+                                ('after_rollback', self._after_rollback)):
+            if not event.contains(db.session, nombre, handler):
+                event.listen(db.session, nombre, handler)
+
+        if self.enabled:
+            # Lo que quedó pendiente de una ejecución anterior
+            self.relay.ensure_started()
+
+    # ==================== ESCRITURA ====================
+
+    @staticmethod
+    def valores(mensaje, tipo):
+        """Columnas de una fila del outbox para `mensaje` (flask_mail.Message)"""
+        remitente = mensaje.sender
+        if isinstance(remitente, tuple):
+            remitente = formataddr(remitente)
+        return {
+            'tipo': tipo,
+            'asunto': mensaje.subject,
+            'remitente': remitente,
+            'destinatarios': list(mensaje.recipients),
+            'reply_to': mensaje.reply_to,
+            'cuerpo_texto': mensaje.body,
+            'cuerpo_html': mensaje.html
+        }
+
+    def add(self, mensaje, tipo, session=None, estado='pendiente', datos=None):
+        """
+        Guardar `mensaje` (flask_mail.Message) en el outbox dentro de la
+        transacción de `session` (db.session por defecto). Se envía cuando
+        esa transacción se confirma (estado='retenido' la deja para un resumen).
+        """
+        session = session or db.session
+        fila = EmailOutbox(estado=estado, datos=datos, **self.valores(mensaje, tipo))
+        session.add(fila)
+        if estado == 'pendiente':
+            session.info[self.PENDIENTES_KEY] = True
+        return fila
+
+    def _after_commit(self, session):
+        if session.info.pop(self.PENDIENTES_KEY, None) and self.relay is not None:
+            self.relay.wake()
+
+    def _after_rollback(self, session):
+        session.info.pop(self.PENDIENTES_KEY, None)
+
+    # ==================== RECLAMO ====================
+
+    @staticmethod
+    def _disponibles(tabla, ahora):
+        """Filas vencidas o con el reclamo de otro relay ya expirado"""
+        return or_(
+            and_(tabla.c.estado == 'pendiente', tabla.c.proximo_intento <= ahora),
+            and_(tabla.c.estado == 'enviando', tabla.c.bloqueado_hasta < ahora)
+        )
+
+    def reclamar(self, limite):
+        """Tomar hasta `limite` filas para este relay. Regresa las filas reclamadas"""
+        tabla = EmailOutbox.__table__
+        ahora = datetime.utcnow()
+        token = uuid.uuid4().hex
+        consulta = (
+            select(tabla.c.id)
+            .where(self._disponibles(tabla, ahora))
+            .order_by(tabla.c.proximo_intento, tabla.c.id)
+            .limit(limite)
+            .with_for_update(skip_locked=self.skip_locked)
+        )
+        # Por el engine (primario) y no por la sesión: no cambia la versión de la tabla
+        with db.engine.begin() as conexion:
+            ids = conexion.execute(consulta).scalars().all()
+            if not ids:
+                return []
+            # Condicionado al estado leído: si otro relay ganó la fila, aquí no se toca
+            conexion.execute(
+                update(tabla)
+                .where(tabla.c.id.in_(ids), self._disponibles(tabla, ahora))
+                .values(estado='enviando', reclamo=token,
+                        bloqueado_hasta=ahora + timedelta(seconds=self.reclamo))
+            )
+            filas = conexion.execute(
+                select(tabla).where(tabla.c.id.in_(ids), tabla.c.reclamo == token).order_by(tabla.c.id)
+            ).all()
+        with self._lock:
+            self.reclamados += len(filas)
+        return filas
+
+    # ==================== ENVÍO ====================
+
+    @staticmethod
+    def _mensaje(fila):
+        return Message(
+            subject=fila.asunto,
+            sender=fila.remitente,
+            recipients=list(fila.destinatarios or []),
+            reply_to=fila.reply_to,
+            body=fila.cuerpo_texto,
+            html=fila.cuerpo_html
+        )
+
+    def espera(self, intentos):
+        """Segundos hasta el siguiente intento tras `intentos` fallos (backoff exponencial con jitter)"""
+        espera = min(self.backoff_max, self.backoff_base * 2 ** max(0, intentos - 1))
+        return random.uniform(espera / 2, espera)
+
+    def _resultado(self, fila, exito, error):
+        """Marcar la fila como enviada, reprogramarla o darla por fallida"""
+        tabla = EmailOutbox.__table__
+        ahora = datetime.utcnow()
+        intentos = fila.intentos + 1
+        valores = {'intentos': intentos, 'reclamo': None, 'bloqueado_hasta': None}
+        if exito:
+            valores.update(estado='enviado', fecha_envio=ahora, ultimo_error=None)
+        elif intentos >= self.max_intentos:
+            valores.update(estado='fallido', ultimo_error=error)
+        else:
+            valores.update(estado='pendiente', ultimo_error=error,
+                           proximo_intento=ahora + timedelta(seconds=self.espera(intentos)))
+
+        with db.engine.begin() as conexion:
+            actualizadas = conexion.execute(
+                update(tabla).where(tabla.c.id == fila.id, tabla.c.reclamo == fila.reclamo).values(valores)
+            ).rowcount
+
+        with self._lock:
+            if not actualizadas:
+                self.perdidos += 1
+            elif exito:
+                self.enviados += 1
+            elif valores['estado'] == 'fallido':
+                self.fallidos += 1
+            else:
+                self.reintentos += 1
+        if actualizadas and valores['estado'] == 'fallido':
+            print(f"❌ Email {fila.id} descartado tras {intentos} intentos: {error}")
+
+    def procesar(self):
+        """Reclamar filas mientras haya lugar en la cola de envío (requiere app context). Regresa cuántas se encolaron"""
+        total = 0
+        while True:
+            limite = min(self.lote, email_dispatcher.libres())
+            if limite <= 0:
+                break
+            filas = self.reclamar(limite)
+            for fila in filas:
+                email_dispatcher.submit(self._mensaje(fila), partial(self._resultado, fila))
+            total += len(filas)
+            if len(filas) < limite:
+                break
+        self._purgar()
+        return total
+
+    def _purgar(self):
+        """Borrar, como mucho una vez por hora, los enviados (y resumidos) más viejos que EMAIL_OUTBOX_RETENTION_DAYS"""
+        if self.retencion_dias <= 0 or time.monotonic() - self._ultima_purga < 3600:
+            return
+        self._ultima_purga = time.monotonic()
+        tabla = EmailOutbox.__table__
+        limite = datetime.utcnow() - timedelta(days=self.retencion_dias)
+        with db.engine.begin() as conexion:
+            conexion.execute(delete(tabla).where(or_(
+                and_(tabla.c.estado == 'enviado', tabla.c.fecha_envio < limite),
+                and_(tabla.c.estado == 'resumido', tabla.c.fecha_actualizacion < limite)
+            )))
+
+    def _job(self):
+        if self.app is None or not self.enabled:
+            return
+        with self.app.app_context():
+            self.procesar()
+
+    # ==================== MÉTRICAS ====================
+
+    def stats(self):
+        """Filas por estado, antigüedad del pendiente más viejo y contadores del relay"""
+        tabla = EmailOutbox.__table__
+        with db.engine.connect() as conexion:
+            por_estado = dict(conexion.execute(
+                select(tabla.c.estado, func.count()).group_by(tabla.c.estado)
+            ).all())
+            mas_antiguo = conexion.execute(
+                select(func.min(tabla.c.fecha_creacion)).where(tabla.c.estado.in_(('pendiente', 'enviando')))
+            ).scalar()
+        with self._lock:
+            return {
+                'habilitado': self.enabled,
+                'filas': {estado: por_estado.get(estado, 0) for estado in EmailOutbox.ESTADOS},
+                'pendiente_mas_antiguo_s': (
+                    round((datetime.utcnow() - mas_antiguo).total_seconds(), 1) if mas_antiguo else None
+                ),
+                'reclamados': self.reclamados,
+                'enviados': self.enviados,
+                'reintentos': self.reintentos,
+                'fallidos': self.fallidos,
+                'perdidos': self.perdidos
+            }
+
+
+# Instancia global del outbox de emails
+email_outbox = EmailOutboxRelay()
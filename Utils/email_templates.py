@@ -0,0 +1,156 @@
+import re
+from html import unescape
+from markupsafe import Markup, escape
+
+
+def nl2br(valor):
+    """Filtro de Jinja: escapar el texto y convertir los saltos de línea en <br>"""
+    if valor is None:
+        return ''
+    return Markup('<br>\n').join(escape(linea) for linea in str(valor).splitlines())
+
+
+# Conversión HTML -> texto con expresiones compiladas (un HTMLParser cuesta varias veces más)
+_IGNORADO = re.compile(r'<(head|style|script|title)\b.*?</\1\s*>', re.S | re.I)
+_TITULO = re.compile(r'<h[12]\b[^>]*>(.*?)</h[12]\s*>', re.S | re.I)
+_ENLACE = re.compile(r'<a\b[^>]*?href=["\']([^"\']+)["\'][^>]*>(.*?)</a\s*>', re.S | re.I)
+_ETIQUETA = re.compile(r'<(/?)([a-zA-Z0-9]+)[^>]*>')
+_DECLARACION = re.compile(r'<![^>]*>')
+_PARRAFOS = re.compile(r'\s*(?:\x01\s*)+')
+_BLOQUE_CONTENIDO = re.compile(r'{%-?\s*block\s+contenido\s*-?%}(.*?){%-?\s*endblock', re.S)
+
+# Qué deja cada etiqueta en el texto (\x01 = línea en blanco); las demás desaparecen
+_APERTURA = dict.fromkeys(('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'), '\x01')
+_APERTURA.update(dict.fromkeys(('div', 'table', 'tr', 'ul', 'ol', 'br'), '\n'), li='\n• ')
+_CIERRE = dict.fromkeys(('div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table', 'tr', 'ul', 'ol', 'li'), '\n')
+_CIERRE['p'] = '\x01'
+
+
+def _etiqueta(coincidencia):
+    tabla = _CIERRE if coincidencia.group(1) else _APERTURA
+    return tabla.get(coincidencia.group(2).lower(), '')
+
+
+def _enlace(coincidencia):
+    href, texto = coincidencia.group(1), coincidencia.group(2)
+    return texto if _ETIQUETA.sub('', texto).strip() == href else f'{texto} ({href})'
+
+
+def html_a_texto(html, mayusculas=True):
+    """
+    Alternativa de texto plano de un email HTML: sin <head>/<style>, una
+    línea por bloque, una línea en blanco antes de cada título o párrafo y
+    (con `mayusculas`) los títulos h1/h2 en mayúsculas.
+    """
+    texto = html
+    if '<!' in texto:
+        texto = _DECLARACION.sub('', texto)
+    if '<head' in texto or '<style' in texto:
+        texto = _IGNORADO.sub('', texto)
+    if mayusculas and ('<h1' in texto or '<h2' in texto):
+        texto = _TITULO.sub(lambda m: f'<h2>{m.group(1).upper()}</h2>', texto)
+    if '<a ' in texto:
+        texto = _ENLACE.sub(_enlace, texto)
+    texto = unescape(_ETIQUETA.sub(_etiqueta, texto))
+    lineas = (' '.join(linea.split()) for linea in texto.split('\n'))
+    texto = '\n'.join(linea for linea in lineas if linea)
+    return _PARRAFOS.sub('\n\n', texto).strip() + '\n'
+
+
+def _sin_html(valor):
+    """nl2br de las plantillas de texto: el valor tal cual"""
+    return '' if valor is None else str(valor)
+
+
+class _Plantilla:
+    """
+    Plantilla compilada con su layout ya renderizado (HTML y texto) y la
+    versión de texto del bloque contenido, también compilada.
+    """
+
+    __slots__ = ('contenido', 'nuevo_contexto', 'prefijo', 'sufijo', 'texto', 'prefijo_texto', 'sufijo_texto')
+
+    MARCA = '\x00contenido\x00'
+
+    def __init__(self, entorno, nombre):
+        plantilla = entorno.get_template(nombre)
+        self.contenido = plantilla.blocks['contenido']
+        self.nuevo_contexto = plantilla.new_context
+
+        # El layout una sola vez, con una marca en lugar del bloque contenido
+        contexto = plantilla.new_context({})
+        contexto.blocks['contenido'] = [lambda _: iter((self.MARCA,))]
+        self.prefijo, self.sufijo = ''.join(plantilla.root_render_func(contexto)).split(self.MARCA)
+        self.prefijo_texto = html_a_texto(self.prefijo).strip()
+        self.sufijo_texto = html_a_texto(self.sufijo).strip()
+
+        # El bloque contenido pasado a texto desde su fuente: una plantilla de texto
+        # compilada, así por mensaje no se convierte HTML
+        self.texto = None
+        fuente = _BLOQUE_CONTENIDO.search(entorno.loader.get_source(entorno, nombre)[0])
+        if fuente and '{%' not in fuente.group(1):
+            entorno_texto = entorno.overlay(autoescape=False)
+            entorno_texto.filters = dict(entorno.filters, nl2br=_sin_html)
+            self.texto = entorno_texto.from_string(html_a_texto(fuente.group(1), mayusculas=False))
+
+    def render(self, contexto):
+        # shared=True: el bloque solo usa los campos del mensaje, sin copiar los globales de la app
+        cuerpo = ''.join(self.contenido(self.nuevo_contexto(contexto, shared=True)))
+        if self.texto is not None:
+            cuerpo_texto = ''.join(self.texto.root_render_func(self.texto.new_context(contexto, shared=True))).strip()
+        else:
+            cuerpo_texto = html_a_texto(cuerpo).strip()
+        texto = '\n\n'.join(parte for parte in (self.prefijo_texto, cuerpo_texto, self.sufijo_texto) if parte)
+        return self.prefijo + cuerpo + self.sufijo, texto + '\n'
+
+
+class EmailTemplates:
+    """
+    Plantillas de email (templates/email/*.html) compiladas una vez por proceso.
+    Usan el entorno Jinja de la app, con autoescape (los datos del formulario
+    se escapan) y la caché de bytecode de Utils.page_cache. El layout común
+    (estilos, cabecera, pie) se renderiza una vez por plantilla, en HTML y en
+    texto; en cada mensaje solo se evalúa el bloque `contenido` con sus
+    campos. La versión de texto plano se genera del HTML: el bloque
+    contenido se convierte una vez en una plantilla de texto compilada.
+    """
+
+    CARPETA = 'email'
+
+    def __init__(self):
+        self.app = None
+        self._plantillas = {}  # nombre -> _Plantilla
+
+    def init_app(self, app):
+        """Registrar el filtro nl2br y olvidar las plantillas de otra app"""
+        self.app = app
+        self._plantillas = {}
+        app.jinja_env.filters['nl2br'] = nl2br
+
+    def plantilla(self, nombre):
+        """Plantilla `email/<nombre>.html` compilada (se vuelve a leer si cambia, solo con auto_reload)"""
+        entorno = self.app.jinja_env
+        if entorno.auto_reload:
+            return _Plantilla(entorno, f'{self.CARPETA}/{nombre}.html')
+        plantilla = self._plantillas.get(nombre)
+        if plantilla is None:
+            plantilla = _Plantilla(entorno, f'{self.CARPETA}/{nombre}.html')
+            self._plantillas[nombre] = plantilla
+        return plantilla
+
+    def render(self, nombre, **contexto):
+        """(html, texto) de la plantilla `nombre` con los campos del mensaje"""
+        return self.plantilla(nombre).render(contexto)
+
+    def precompilar(self):
+        """Compilar todas las plantillas de email (al arrancar, para no hacerlo en el primer envío)"""
+        nombres = self.app.jinja_env.list_templates(
+            filter_func=lambda ruta: ruta.startswith(f'{self.CARPETA}/') and ruta != f'{self.CARPETA}/base.html'
+        )
+        for ruta in nombres:
+            self.plantilla(ruta[len(self.CARPETA) + 1:].rsplit('.', 1)[0])
+        return len(nombres)
+
+
+# Instancia global de las plantillas de email
+email_templates = EmailTemplates()
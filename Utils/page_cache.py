@@ -0,0 +1,165 @@
+import gzip
+import hashlib
+import os
+import threading
+from functools import wraps
+from flask import Response, render_template, request
+from jinja2 import FileSystemBytecodeCache, TemplateNotFound, meta
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se genera la variante gzip
+    brotli = None
+
+# Variables que una plantilla puede usar y seguir siendo la misma página para todos
+GLOBALES_ESTATICOS = frozenset(('url_for', 'asset_url', 'config'))
+
+
+class PaginaRenderizada:
+    """HTML ya renderizado de una página con su ETag y variantes comprimidas"""
+
+    __slots__ = ('cuerpo', 'etag', 'variantes')
+
+    def __init__(self, cuerpo):
+        self.cuerpo = cuerpo
+        self.etag = hashlib.blake2b(cuerpo, digest_size=12).hexdigest()
+        self.variantes = {'gzip': gzip.compress(cuerpo, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.variantes['br'] = brotli.compress(cuerpo, quality=11)
+
+
+class PageCache:
+    """
+    Páginas del frontend pre-renderizadas.
+    Cada vista decorada con @page_cache.page('plantilla.html', 'respaldo.html')
+    resuelve al arrancar qué plantilla existe (sin TemplateNotFound por
+    petición). Si la plantilla y las que incluye solo usan url_for, asset_url
+    y config, la página es igual para todos: se renderiza una vez, se guarda
+    con su ETag y sus variantes gzip/br y se sirve tal cual (304 si el
+    cliente ya la tiene). Las demás se renderizan en cada petición.
+    Además las plantillas compiladas se guardan en JINJA_BYTECODE_CACHE_DIR
+    para que los workers nuevos no vuelvan a compilarlas.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._paginas = {}      # endpoint -> plantilla resuelta (None si no existe ninguna)
+        self._estaticas = set()  # endpoints sin contexto de petición
+        self._renderizadas = {}  # (endpoint, script_root) -> PaginaRenderizada
+
+    def init_app(self, app):
+        """Configurar la caché de bytecode de Jinja y el modo de la caché de páginas"""
+        self.app = app
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', True) and not app.debug
+        self._paginas = {}
+        self._estaticas = set()
+        self._renderizadas = {}
+
+        directorio = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directorio)
+
+    # ==================== RESOLUCIÓN ====================
+
+    def _variables(self, nombre, vistas=None):
+        """Variables sin declarar de una plantilla y de las que extiende o incluye"""
+        vistas = set() if vistas is None else vistas
+        if nombre in vistas:
+            return set()
+        vistas.add(nombre)
+        entorno = self.app.jinja_env
+        fuente = entorno.loader.get_source(entorno, nombre)[0]
+        arbol = entorno.parse(fuente)
+        variables = set(meta.find_undeclared_variables(arbol))
+        for referida in meta.find_referenced_templates(arbol):
+            if referida is None:
+                return {None}  # nombre dinámico: no se puede saber qué usa
+            variables |= self._variables(referida, vistas)
+        return variables
+
+    def _resolver(self, endpoint, plantillas):
+        """Primera plantilla existente; compilarla y decidir si es estática"""
+        for nombre in plantillas:
+            try:
+                self.app.jinja_env.get_template(nombre)
+            except TemplateNotFound:
+                continue
+            self._paginas[endpoint] = nombre
+            if self._variables(nombre) <= GLOBALES_ESTATICOS:
+                self._estaticas.add(endpoint)
+            return nombre
+        self._paginas[endpoint] = None
+        return None
+
+    def page(self, *plantillas):
+        """
+        Vista que sirve la primera de `plantillas` que exista. La función
+        decorada no se ejecuta; basta con su docstring.
+        """
+        def decorator(f):
+            endpoint = f.__name__
+            if self.app is not None:
+                self._resolver(endpoint, plantillas)
+
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if endpoint not in self._paginas:
+                    self._resolver(endpoint, plantillas)
+                return self.serve(endpoint)
+            return wrapper
+        return decorator
+
+    # ==================== SERVIDOR ====================
+
+    def _renderizar(self, endpoint):
+        nombre = self._paginas[endpoint]
+        if self.app.debug or not self.enabled or endpoint not in self._estaticas:
+            return None, render_template(nombre)
+
+        clave = (endpoint, request.script_root)
+        pagina = self._renderizadas.get(clave)
+        if pagina is None:
+            pagina = PaginaRenderizada(render_template(nombre).encode('utf-8'))
+            with self._lock:
+                self._renderizadas[clave] = pagina
+        return pagina, None
+
+    def serve(self, endpoint):
+        """Respuesta de la página `endpoint` (pre-renderizada si es estática)"""
+        if self._paginas.get(endpoint) is None:
+            return Response('Página no encontrada', status=404, mimetype='text/plain')
+
+        pagina, html = self._renderizar(endpoint)
+        if pagina is None:
+            return html
+
+        cuerpo, codificacion = pagina.cuerpo, None
+        for nombre in ('br', 'gzip'):
+            if nombre in pagina.variantes and request.accept_encodings[nombre]:
+                cuerpo, codificacion = pagina.variantes[nombre], nombre
+                break
+
+        respuesta = Response(cuerpo, mimetype='text/html')
+        if codificacion:
+            respuesta.headers['Content-Encoding'] = codificacion
+        respuesta.vary.add('Accept-Encoding')
+        # Débil: el mismo ETag vale para el HTML sin comprimir y sus variantes
+        respuesta.set_etag(pagina.etag, weak=True)
+        respuesta.headers['Cache-Control'] = 'no-cache'
+        return respuesta.make_conditional(request)
+
+    def warm(self):
+        """Pre-renderizar las páginas estáticas (llamar después de registrar las rutas)"""
+        if not self.enabled:
+            return 0
+        with self.app.test_request_context('/'):
+            for endpoint in sorted(self._estaticas):
+                self._renderizar(endpoint)
+        return len(self._renderizadas)
+
+
+# Instancia global de la caché de páginas
+page_cache = PageCache()
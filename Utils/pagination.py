@@ -0,0 +1,197 @@
+import base64
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import and_, or_, text
+
+
+class CursorError(ValueError):
+    """Cursor de paginación mal formado o de otro listado"""
+
+
+def _firma(orden):
+    return ','.join(f"{columna.class_.__tablename__}.{columna.key}:{'d' if desc else 'a'}" for columna, desc in orden)
+
+
+def _a_json(valor):
+    if isinstance(valor, datetime):
+        return {'dt': valor.isoformat()}
+    return valor
+
+
+def _de_json(valor):
+    if isinstance(valor, dict) and 'dt' in valor:
+        return datetime.fromisoformat(valor['dt'])
+    return valor
+
+
+def encode_cursor(orden, valores):
+    """Cursor opaco (base64 url-safe) con los valores de la última fila"""
+    carga = {'o': _firma(orden), 'v': [_a_json(v) for v in valores]}
+    texto = json.dumps(carga, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(texto).decode('ascii').rstrip('=')
+
+
+def decode_cursor(orden, cursor):
+    """Valores guardados en el cursor; CursorError si no corresponde a `orden`"""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        carga = json.loads(texto)
+        valores = [_de_json(v) for v in carga['v']]
+    except (ValueError, TypeError, KeyError) as e:
+        raise CursorError('Cursor inválido') from e
+    if carga.get('o') != _firma(orden) or len(valores) != len(orden):
+        raise CursorError('El cursor no corresponde a este listado')
+    return valores
+
+
+def _despues_de(orden, valores):
+    """
+    Condición "fila posterior al cursor" para un orden de varias columnas,
+    expandida como (a < x) OR (a = x AND b < y) para que use el índice en
+    cualquier motor (MySQL no aprovecha bien la comparación de tuplas).
+    """
+    alternativas = []
+    for i, (columna, desc) in enumerate(orden):
+        iguales = [c == v for (c, _), v in zip(orden[:i], valores[:i])]
+        siguiente = columna < valores[i] if desc else columna > valores[i]
+        alternativas.append(and_(*iguales, siguiente))
+    return or_(*alternativas)
+
+
+def keyset_paginate(query, orden, cursor, per_page):
+    """
+    Paginación por cursor (keyset): en vez de OFFSET filtra por los valores
+    de la última fila vista, y no ejecuta COUNT(*). `orden` es una lista de
+    (columna, descendente) que debe terminar en una columna única (id) y
+    cuyas columnas no sean nulas. `cursor` vacío pide la primera página.
+    Regresa (items, {'next_cursor', 'has_more', 'per_page'}).
+    """
+    per_page = max(1, per_page)
+    if cursor:
+        query = query.filter(_despues_de(orden, decode_cursor(orden, cursor)))
+    query = query.order_by(*[columna.desc() if desc else columna.asc() for columna, desc in orden])
+
+    filas = query.limit(per_page + 1).all()
+    items = filas[:per_page]
+    has_more = len(filas) > per_page
+    next_cursor = None
+    if has_more:
+        ultimo = items[-1]
+        next_cursor = encode_cursor(orden, [getattr(ultimo, columna.key) for columna, _ in orden])
+
+    return items, {'next_cursor': next_cursor, 'has_more': has_more, 'per_page': per_page}
+
+
+# ==================== TOTALES ====================
+
+MODOS_TOTAL = ('exact', 'estimate', 'false')
+
+
+def parse_include_total(valor, default='exact'):
+    """Normalizar ?include_total= a 'exact', 'estimate' o 'false'"""
+    valor = (valor or default).strip().lower()
+    if valor in ('false', '0', 'no', 'none'):
+        return 'false'
+    return valor if valor in MODOS_TOTAL else default
+
+
+class CountCache:
+    """
+    Conteos aproximados para paginación. Se guardan por firma de filtros
+    (SQL compilado + parámetros) durante un TTL; si la consulta no tiene
+    filtros y el motor es MySQL se usan las estadísticas de la tabla.
+    """
+
+    def __init__(self, ttl=60, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conteos = OrderedDict()  # firma -> (total, expira)
+
+    def init_app(self, app):
+        """Leer TTL y tamaño desde la configuración"""
+        self.ttl = app.config.get('PAGINATION_COUNT_TTL', 60)
+        self.max_entries = app.config.get('PAGINATION_COUNT_CACHE_SIZE', 1024)
+
+    @staticmethod
+    def _firma(stmt):
+        compilado = stmt.compile()
+        parametros = sorted((k, repr(v)) for k, v in compilado.params.items())
+        return hashlib.blake2b(f'{compilado}|{parametros}'.encode('utf-8'), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _estadistica_mysql(query, stmt):
+        """TABLE_ROWS de information_schema para consultas sin WHERE en MySQL"""
+        if stmt.whereclause is not None or len(query.column_descriptions) != 1:
+            return None
+        sesion = query.session
+        if sesion.get_bind().dialect.name != 'mysql':
+            return None
+        entidad = query.column_descriptions[0].get('entity')
+        tabla = getattr(entidad, '__tablename__', None)
+        if tabla is None:
+            return None
+        return sesion.execute(text(
+            'SELECT TABLE_ROWS FROM information_schema.TABLES '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabla'
+        ), {'tabla': tabla}).scalar()
+
+    def estimate(self, query):
+        """Total aproximado de filas de `query`"""
+        query = query.order_by(None)
+        stmt = query.statement
+        total = self._estadistica_mysql(query, stmt)
+        if total is not None:
+            return int(total)
+
+        firma = self._firma(stmt)
+        ahora = time.monotonic()
+        with self._lock:
+            guardado = self._conteos.get(firma)
+            if guardado is not None and guardado[1] > ahora:
+                self._conteos.move_to_end(firma)
+                return guardado[0]
+
+        total = query.count()
+        with self._lock:
+            self._conteos[firma] = (total, ahora + self.ttl)
+            self._conteos.move_to_end(firma)
+            while len(self._conteos) > self.max_entries:
+                self._conteos.popitem(last=False)
+        return total
+
+    def clear(self):
+        with self._lock:
+            self._conteos.clear()
+
+
+# Instancia global de conteos aproximados
+count_cache = CountCache()
+
+
+def offset_paginate(query, page, per_page, include_total='exact'):
+    """
+    Paginación por OFFSET con total opcional:
+    - 'exact': paginate() de Flask-SQLAlchemy (COUNT(*) en cada página)
+    - 'estimate': total de count_cache, marcado con total_estimated
+    - 'false': sin total; has_more se calcula pidiendo una fila extra
+    Regresa (items, paginación) con current_page y, según el modo, total/pages.
+    """
+    page = max(1, page)
+    per_page = max(1, per_page)
+    if include_total == 'exact':
+        paginado = query.paginate(page=page, per_page=per_page, error_out=False)
+        return paginado.items, {'total': paginado.total, 'pages': paginado.pages, 'current_page': page}
+
+    filas = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    items = filas[:per_page]
+    paginacion = {'current_page': page, 'has_more': len(filas) > per_page}
+    if include_total == 'estimate':
+        total = count_cache.estimate(query)
+        paginacion.update(total=total, pages=math.ceil(total / per_page), total_estimated=True)
+    return items, paginacion
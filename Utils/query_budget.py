@@ -0,0 +1,72 @@
+from functools import wraps
+from flask import g, has_app_context, request, make_response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+MODOS = ('off', 'warn', 'raise')
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Un endpoint ejecutó más consultas SQL que su presupuesto"""
+
+
+class QueryBudget:
+    """
+    Presupuesto de consultas SQL por endpoint, para detectar N+1.
+    Cada vista decorada con @query_budget.limit(n) declara cuántas consultas
+    puede ejecutar como máximo sin importar cuántas filas devuelva. Con
+    QUERY_BUDGET_MODE='warn' se registra el exceso y con 'raise' se lanza
+    QueryBudgetExceeded (pensado para pruebas); en ambos modos la respuesta
+    lleva X-Query-Count. Con 'off' (por defecto) no se cuenta nada.
+    """
+
+    CONTADOR = '_consultas_sql'
+
+    def __init__(self):
+        self.mode = 'off'
+        self.excedidos = 0
+
+    def init_app(self, app):
+        """Leer el modo y registrar el contador de consultas"""
+        modo = str(app.config.get('QUERY_BUDGET_MODE', 'off')).lower()
+        self.mode = modo if modo in MODOS else 'off'
+        if self.mode != 'off' and not event.contains(Engine, 'before_cursor_execute', self._contar):
+            event.listen(Engine, 'before_cursor_execute', self._contar)
+
+    def _contar(self, conn, cursor, statement, parameters, context, executemany):
+        if has_app_context() and self.CONTADOR in g:
+            setattr(g, self.CONTADOR, getattr(g, self.CONTADOR) + 1)
+
+    def limit(self, maximo):
+        """
+        Máximo de consultas de la vista. Usar como decorador más interno
+        (debajo de las cachés) para que solo cuente el trabajo de la vista.
+        """
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if self.mode == 'off':
+                    return f(*args, **kwargs)
+
+                setattr(g, self.CONTADOR, 0)
+                try:
+                    respuesta = make_response(f(*args, **kwargs))
+                finally:
+                    consultas = g.pop(self.CONTADOR, 0)
+
+                respuesta.headers['X-Query-Count'] = str(consultas)
+                if consultas > maximo:
+                    self.excedidos += 1
+                    mensaje = (f"{request.method} {request.path} ejecutó {consultas} consultas "
+                               f"(presupuesto: {maximo})")
+                    if self.mode == 'raise':
+                        raise QueryBudgetExceeded(mensaje)
+                    print(f"⚠️ {mensaje}")
+                return respuesta
+            return wrapper
+        return decorator
+
+
+# Instancia global del presupuesto de consultas
+query_budget = QueryBudget()
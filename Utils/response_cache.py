@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response
+from .table_versions import table_versions
+from .conditional import conditional_get, request_key
+
+
+class ResponseCache:
+    """
+    Caché en memoria de respuestas GET completas.
+    La clave es la ruta más los argumentos normalizados; cada entrada guarda
+    la versión de las tablas de las que depende y deja de ser válida en
+    cuanto alguna cambia (ver TableVersions), así que una escritura del admin
+    se refleja en la siguiente petición en cualquier worker. El TTL es solo
+    una red de seguridad para cambios hechos fuera de la aplicación.
+    """
+
+    CACHEABLE_STATUS = (200, 404)
+
+    def __init__(self):
+        self.enabled = True
+        self.ttl = 300
+        self.max_entries = 2048
+        self.max_bytes = 64 * 1024 * 1024
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # clave -> (versiones, expira, status, mimetype, body)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.not_modified = 0
+
+    def init_app(self, app):
+        """Leer la configuración de la caché"""
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', 300)
+        self.max_entries = app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 2048)
+        self.max_bytes = app.config.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+
+    # ==================== ALMACENAMIENTO ====================
+
+    def get(self, clave, versiones):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.misses += 1
+                return None
+            if entrada[0] != versiones or entrada[1] < time.monotonic():
+                self._quitar(clave)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.hits += 1
+            return entrada
+
+    def set(self, clave, versiones, status, mimetype, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = (versiones, time.monotonic() + self.ttl, status, mimetype, body)
+            self._bytes += len(body)
+            while self._entradas and (len(self._entradas) > self.max_entries or self._bytes > self.max_bytes):
+                self._quitar(next(iter(self._entradas)))
+                self.evictions += 1
+
+    def _quitar(self, clave):
+        entrada = self._entradas.pop(clave)
+        self._bytes -= len(entrada[4])
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Contadores de la caché"""
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entradas),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / consultas, 4) if consultas else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'not_modified': self.not_modified
+            }
+
+    # ==================== DECORADOR ====================
+
+    def cached(self, *tablas):
+        """
+        Cachear la respuesta de un endpoint GET que solo lee de `tablas`.
+        También responde 304 con los mismos validadores que conditional_get.
+        Uso: @response_cache.cached('productos', 'categorias_productos')
+        """
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET' or not (self.enabled or conditional_get.enabled):
+                    return f(*args, **kwargs)
+
+                clave = request_key()
+                # Versiones leídas antes de consultar: si hay una escritura en medio,
+                # la entrada queda con la versión vieja y se descarta en la siguiente lectura
+                versiones = table_versions.versions(tablas)
+
+                validadores = None
+                if conditional_get.enabled:
+                    validadores = conditional_get.validators(tablas, versiones)
+                    if conditional_get.is_not_modified(*validadores):
+                        with self._lock:
+                            self.not_modified += 1
+                        return conditional_get.not_modified(*validadores)
+
+                entrada = self.get(clave, versiones) if self.enabled else None
+                if entrada is not None:
+                    _, _, status, mimetype, body = entrada
+                    respuesta = make_response(body, status)
+                    respuesta.mimetype = mimetype
+                    respuesta.headers['X-Cache'] = 'HIT'
+                else:
+                    respuesta = make_response(f(*args, **kwargs))
+                    if (self.enabled and respuesta.status_code in self.CACHEABLE_STATUS
+                            and not respuesta.direct_passthrough):
+                        self.set(clave, versiones, respuesta.status_code, respuesta.mimetype, respuesta.get_data())
+                    respuesta.headers['X-Cache'] = 'MISS'
+
+                if validadores is not None and respuesta.status_code == 200:
+                    conditional_get.apply(respuesta, *validadores)
+                return respuesta
+            return wrapper
+        return decorator
+
+
+# Instancia global de la caché de respuestas
+response_cache = ResponseCache()
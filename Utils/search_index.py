@@ -0,0 +1,260 @@
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import event, inspect
+from DataBase.models.database import db
+from DataBase.models.busqueda import TerminoBusqueda
+from DataBase.models.producto import Producto
+from DataBase.models.servicio import Servicio
+from DataBase.models.noticia import Noticia
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Palabras vacías en español que no aportan a la búsqueda
+STOPWORDS = frozenset((
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'es', 'la', 'las', 'lo', 'los',
+    'para', 'por', 'que', 'se', 'su', 'sus', 'un', 'una', 'unos', 'unas', 'y', 'o'
+))
+
+MAX_TERMINO = 64
+
+
+def plegar(texto):
+    """Minúsculas, sin acentos (á -> a, ñ -> n) y dividido en palabras"""
+    if not texto:
+        return []
+    if not isinstance(texto, str):
+        texto = ' '.join(str(t) for t in texto) if isinstance(texto, (list, tuple)) else str(texto)
+    plano = unicodedata.normalize('NFKD', texto.lower())
+    plano = ''.join(c for c in plano if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(plano)
+
+
+def normalizar(texto):
+    """Términos indexables: palabras plegadas sin palabras vacías"""
+    return [t[:MAX_TERMINO] for t in plegar(texto) if t not in STOPWORDS]
+
+
+# tipo -> (modelo, [(campo, peso)])
+DOCUMENTOS = {
+    'producto': (Producto, [('nombre', 5.0), ('sku', 5.0), ('descripcion_corta', 2.0), ('descripcion_larga', 1.0)]),
+    'servicio': (Servicio, [('nombre', 5.0), ('area', 2.0), ('descripcion', 1.0)]),
+    'noticia': (Noticia, [('titulo', 5.0), ('etiquetas', 3.0), ('resumen', 2.0), ('contenido', 1.0)]),
+}
+TIPO_POR_MODELO = {modelo: tipo for tipo, (modelo, _) in DOCUMENTOS.items()}
+
+
+def terminos_documento(obj, campos):
+    """Pesos por término de un documento; la frecuencia suma pero con tope"""
+    pesos = Counter()
+    for campo, peso in campos:
+        for termino, frecuencia in Counter(normalizar(getattr(obj, campo, None))).items():
+            pesos[termino] += peso * min(frecuencia, 3)
+    return pesos
+
+
+class SearchIndex:
+    """
+    Índice invertido en la base de datos (tabla indice_busqueda).
+    Se mantiene en la misma transacción que las escrituras de los modelos
+    mediante eventos del ORM, soporta búsqueda por prefijo con el índice de
+    `termino` y ordena por relevancia sumando pesos.
+    """
+
+    DIRTY_KEY = 'indice_busqueda_pendientes'
+
+    def __init__(self):
+        self.app = None
+        self._verificado = False
+
+    def init_app(self, app):
+        """Registrar eventos de sincronización y el comando `flask search-rebuild`"""
+        self.app = app
+        for modelo in TIPO_POR_MODELO:
+            for nombre, handler in (('after_insert', self._marcar),
+                                    ('after_update', self._marcar),
+                                    ('after_delete', self._marcar_borrado)):
+                if not event.contains(modelo, nombre, handler):
+                    event.listen(modelo, nombre, handler)
+        if not event.contains(db.session, 'after_flush', self._after_flush):
+            event.listen(db.session, 'after_flush', self._after_flush)
+
+        # Comprobar (o construir) el índice al arrancar para que la primera
+        # búsqueda no pague esa consulta extra; si la base no responde aún,
+        # se comprueba en la primera búsqueda
+        with app.app_context():
+            try:
+                self._asegurar_construido()
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️ Índice de búsqueda sin comprobar: {e}")
+
+        @app.cli.command('search-rebuild')
+        def search_rebuild():
+            """Reconstruir el índice de búsqueda completo"""
+            total = self.rebuild()
+            print(f"✅ Índice de búsqueda reconstruido: {total} términos")
+
+    # ==================== SINCRONIZACIÓN ====================
+
+    def _marcar(self, mapper, connection, target, borrado=False):
+        session = inspect(target).session
+        session.info.setdefault(self.DIRTY_KEY, {})[(TIPO_POR_MODELO[mapper.class_], target.id)] = (
+            None if borrado else target
+        )
+
+    def _marcar_borrado(self, mapper, connection, target):
+        self._marcar(mapper, connection, target, borrado=True)
+
+    def _after_flush(self, session, flush_context):
+        pendientes = session.info.pop(self.DIRTY_KEY, None)
+        if not pendientes:
+            return
+        connection = session.connection()
+        tabla = TerminoBusqueda.__table__
+        for tipo in DOCUMENTOS:
+            ids = [doc_id for (t, doc_id) in pendientes if t == tipo]
+            if ids:
+                connection.execute(tabla.delete().where(tabla.c.tipo == tipo, tabla.c.documento_id.in_(ids)))
+
+        filas = []
+        for (tipo, doc_id), obj in pendientes.items():
+            if obj is None or not obj.activo:
+                continue
+            filas.extend(self._filas(tipo, doc_id, obj))
+        if filas:
+            connection.execute(tabla.insert(), filas)
+
+    @staticmethod
+    def _filas(tipo, doc_id, obj):
+        ahora = datetime.utcnow()
+        return [
+            {'termino': termino, 'tipo': tipo, 'documento_id': doc_id, 'peso': peso,
+             'fecha_creacion': ahora, 'fecha_actualizacion': ahora, 'activo': True}
+            for termino, peso in terminos_documento(obj, DOCUMENTOS[tipo][1]).items()
+        ]
+
+    def rebuild(self, lote=500):
+        """Vaciar y regenerar el índice completo (requiere app context)"""
+        tabla = TerminoBusqueda.__table__
+        total = 0
+        try:
+            db.session.execute(tabla.delete())
+            for tipo, (modelo, _) in DOCUMENTOS.items():
+                filas = []
+                for obj in modelo.query.filter(modelo.activo == True).yield_per(lote):
+                    filas.extend(self._filas(tipo, obj.id, obj))
+                    if len(filas) >= lote * 10:
+                        db.session.execute(tabla.insert(), filas)
+                        total += len(filas)
+                        filas = []
+                if filas:
+                    db.session.execute(tabla.insert(), filas)
+                    total += len(filas)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self._verificado = True
+        return total
+
+    def _asegurar_construido(self):
+        """Construir el índice la primera vez que se usa si la tabla está vacía"""
+        if self._verificado:
+            return
+        if db.session.query(TerminoBusqueda.id).first() is None:
+            self.rebuild()
+        self._verificado = True
+
+    # ==================== CONSULTA ====================
+
+    @staticmethod
+    def _consulta(terminos, tipo, limite):
+        """SELECT documento_id, puntaje de un tipo, en orden de relevancia"""
+        t = TerminoBusqueda
+        partes = []
+        for termino in terminos:
+            peso = db.case((t.termino == termino, t.peso * 2), else_=t.peso)
+            partes.append(
+                db.select(t.documento_id.label('documento_id'), db.func.max(peso).label('puntaje'))
+                .where(t.tipo == tipo, t.termino.like(f'{termino}%'))
+                .group_by(t.documento_id)
+            )
+        coincidencias = (partes[0] if len(partes) == 1 else db.union_all(*partes)).subquery()
+
+        return db.select(
+            coincidencias.c.documento_id,
+            db.func.sum(coincidencias.c.puntaje).label('puntaje')
+        ).group_by(coincidencias.c.documento_id).having(
+            db.func.count() == len(terminos)
+        ).order_by(db.desc('puntaje'), coincidencias.c.documento_id.desc()).limit(limite)
+
+    def buscar(self, texto, tipo, limite=50):
+        """
+        Regresa [(documento_id, puntaje)] de un tipo ordenados por relevancia.
+        Todos los términos de la consulta deben coincidir (por prefijo);
+        una coincidencia exacta pesa el doble que una por prefijo.
+        """
+        return self.buscar_tipos(texto, (tipo,), limite)[tipo]
+
+    def buscar_tipos(self, texto, tipos, limite=50):
+        """
+        Como buscar(), para varios tipos en una sola consulta (UNION ALL de
+        la consulta de cada tipo): {tipo: [(documento_id, puntaje)]}
+        """
+        resultados = {tipo: [] for tipo in tipos}
+        terminos = list(dict.fromkeys(normalizar(texto)))
+        if not terminos or not tipos:
+            return resultados
+        self._asegurar_construido()
+
+        if len(tipos) == 1:
+            tipo = tipos[0]
+            stmt = self._consulta(terminos, tipo, limite).add_columns(db.literal(tipo).label('tipo'))
+        else:
+            # Cada parte lleva su ORDER BY/LIMIT: se envuelve en una subconsulta
+            stmt = db.union_all(*[
+                db.select(parte.c.documento_id, parte.c.puntaje, db.literal(tipo).label('tipo'))
+                for tipo in tipos
+                for parte in [self._consulta(terminos, tipo, limite).subquery()]
+            ])
+        for doc_id, puntaje, tipo in db.session.execute(stmt):
+            resultados[tipo].append((doc_id, float(puntaje)))
+        # El orden de cada subconsulta no se garantiza a través del UNION
+        for encontrados in resultados.values():
+            encontrados.sort(key=lambda fila: (fila[1], fila[0]), reverse=True)
+        return resultados
+
+    def ids(self, texto, tipo, limite=50):
+        """Solo los ids, en orden de relevancia"""
+        return [doc_id for doc_id, _ in self.buscar(texto, tipo, limite)]
+
+    def documentos(self, texto, tipo, limite=50):
+        """Objetos del modelo en orden de relevancia"""
+        return self.documentos_tipos(texto, (tipo,), limite)[tipo]
+
+    def documentos_tipos(self, texto, tipos, limite=50):
+        """
+        {tipo: objetos del modelo en orden de relevancia}: una consulta al
+        índice para todos los tipos y una por cada tipo con resultados
+        """
+        documentos = {}
+        for tipo, encontrados in self.buscar_tipos(texto, tipos, limite).items():
+            ids = [doc_id for doc_id, _ in encontrados]
+            if not ids:
+                documentos[tipo] = []
+                continue
+            modelo = DOCUMENTOS[tipo][0]
+            por_id = {obj.id: obj for obj in modelo.query.filter(modelo.id.in_(ids)).all()}
+            documentos[tipo] = [por_id[doc_id] for doc_id in ids if doc_id in por_id]
+        return documentos
+
+    @staticmethod
+    def orden_relevancia(modelo, ids):
+        """Expresión ORDER BY que respeta el orden de `ids`"""
+        return db.case({doc_id: posicion for posicion, doc_id in enumerate(ids)}, value=modelo.id)
+
+
+# Instancia global del índice
+search_index = SearchIndex()
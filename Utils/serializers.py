@@ -0,0 +1,305 @@
+import threading
+from sqlalchemy import inspect
+from sqlalchemy.exc import NoInspectionAvailable
+from sqlalchemy.orm import joinedload, load_only
+from DataBase.models.database import db
+
+
+class Campo:
+    """
+    Campo de salida de un serializador.
+    - fuente: atributo del modelo (ruta con puntos para relaciones: 'categoria.nombre');
+      None para un valor constante
+    - default: valor si el modelo no tiene el atributo (o la relación es None)
+    - vacio: usar también el default cuando el valor es falso ('' / None / 0)
+    - tipo: 'float' (None cuenta como 0) o 'iso' (datetime.isoformat())
+    """
+
+    __slots__ = ('fuente', 'default', 'vacio', 'tipo')
+
+    def __init__(self, fuente, default=None, vacio=False, tipo=None):
+        self.fuente = fuente
+        self.default = default
+        self.vacio = vacio
+        self.tipo = tipo
+
+    def firma(self):
+        return (self.fuente, repr(self.default), self.vacio, self.tipo)
+
+
+def _tiene(clase, atributo):
+    return clase is not None and hasattr(clase, atributo)
+
+
+def _mapeado(clase, atributo):
+    """True si el atributo es una columna o relación mapeada (su valor cargado vive en __dict__)"""
+    try:
+        return atributo in inspect(clase).attrs
+    except NoInspectionAvailable:
+        return False
+
+
+def _clase_relacion(clase, atributo):
+    """Clase destino de una relación (None si el atributo no es una relación)"""
+    try:
+        relaciones = inspect(clase).relationships
+    except NoInspectionAvailable:
+        return None
+    return relaciones[atributo].mapper.class_ if atributo in relaciones else None
+
+
+def _leer(objeto, clase, atributo, rapido):
+    """Acceso a un atributo: directo al estado cargado o por el descriptor"""
+    if rapido and _mapeado(clase, atributo):
+        return f"d['{atributo}']" if objeto == 'o' else f"{objeto}.__dict__['{atributo}']"
+    return f'{objeto}.{atributo}'
+
+
+class ProjectionError(ValueError):
+    """Perfil o campos pedidos (?profile= / ?fields=) que el endpoint no ofrece"""
+
+
+def _convertir(valor, tipo):
+    if tipo == 'float':
+        return float(valor or 0)
+    if tipo == 'iso':
+        return valor.isoformat() if valor is not None else None
+    return valor
+
+
+class SerializerRegistry:
+    """
+    Serializadores objeto -> dict compilados una vez por modelo y conjunto de campos.
+    En vez de recorrer columnas o hacer getattr(obj, nombre, default) por fila,
+    se genera el código de una función con un literal de diccionario; los
+    campos que el modelo no tiene se resuelven al compilar como constantes.
+    Los valores se leen del estado ya cargado (__dict__) sin pasar por los
+    descriptores de SQLAlchemy; si falta alguno (atributo expirado, diferido
+    o relación sin cargar) esa fila se serializa con acceso normal, que lo carga.
+    """
+
+    # Con ?fields= cada subconjunto es un serializador distinto; pasado este
+    # número se siguen compilando pero ya no se guardan
+    MAX_COMPILADOS = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._compilados = {}  # (modelo, campos) -> función
+        self._columnas = {}    # modelo -> función con todas las columnas
+
+    def init_app(self, app):
+        """Compilar el serializador de columnas de todos los modelos mapeados"""
+        for mapper in db.Model.registry.mappers:
+            if not mapper.class_.__dict__.get('__abstract__'):
+                self.columnas(mapper.class_)
+
+    # ==================== COMPILACIÓN ====================
+
+    @staticmethod
+    def _expresion(clase, campo, constantes, rapido):
+        """Código Python que evalúa `campo` sobre el objeto `o`"""
+        def constante(valor):
+            nombre = f'_c{len(constantes)}'
+            constantes[nombre] = valor
+            return nombre
+
+        default = _convertir(campo.default, campo.tipo) if campo.tipo == 'float' else campo.default
+        if campo.fuente is None:
+            return constante(default)
+        partes = campo.fuente.split('.')
+        if len(partes) == 2:
+            relacion = _clase_relacion(clase, partes[0])
+            if relacion is None or not _tiene(relacion, partes[1]):
+                return constante(default)
+            valor = (f"({_leer('_r', relacion, partes[1], rapido)} "
+                     f"if (_r := {_leer('o', clase, partes[0], rapido)}) is not None else {constante(default)})")
+        elif len(partes) == 1 and _tiene(clase, partes[0]):
+            valor = _leer('o', clase, partes[0], rapido)
+        elif len(partes) == 1:
+            return constante(default)
+        else:
+            raise ValueError(f'Ruta de campo no soportada: {campo.fuente}')
+
+        if campo.vacio:
+            valor = f'({valor} or {constante(default)})'
+        if campo.tipo == 'float':
+            valor = f'float({valor} or 0)'
+        elif campo.tipo == 'iso':
+            valor = f'(_v.isoformat() if (_v := {valor}) is not None else None)'
+        elif campo.tipo is not None:
+            raise ValueError(f'Tipo de campo desconocido: {campo.tipo}')
+        return valor
+
+    def _compilar(self, clase, campos):
+        constantes = {}
+
+        def cuerpo(rapido, sangria):
+            return '\n'.join(f'{sangria}{clave!r}: {self._expresion(clase, campo, constantes, rapido)},'
+                             for clave, campo in campos)
+
+        codigo = (
+            'def lento(o):\n'
+            '    return {\n' + cuerpo(False, ' ' * 8) + '\n    }\n\n'
+            'def serializar(o):\n'
+            '    d = o.__dict__\n'
+            '    try:\n'
+            '        return {\n' + cuerpo(True, ' ' * 12) + '\n        }\n'
+            '    except KeyError:\n'
+            '        return lento(o)\n'
+        )
+        espacio = dict(constantes)
+        exec(compile(codigo, f'<serializador {clase.__name__}>', 'exec'), espacio)
+        funcion = espacio['serializar']
+        funcion.__doc__ = codigo
+        return funcion
+
+    @staticmethod
+    def _normalizar(campos):
+        """Aceptar {'clave': 'atributo'} o {'clave': Campo(...)}"""
+        return tuple(
+            (clave, campo if isinstance(campo, Campo) else Campo(campo))
+            for clave, campo in campos.items()
+        )
+
+    def compile(self, clase, campos):
+        """
+        Función obj -> dict para `clase` con los `campos` dados (dict ordenado
+        clave de salida -> atributo o Campo). Se compila una sola vez.
+        """
+        campos = self._normalizar(campos)
+        clave = (clase, tuple((nombre, campo.firma()) for nombre, campo in campos))
+        funcion = self._compilados.get(clave)
+        if funcion is None:
+            with self._lock:
+                funcion = self._compilados.get(clave)
+                if funcion is None:
+                    funcion = self._compilar(clase, campos)
+                    if len(self._compilados) < self.MAX_COMPILADOS:
+                        self._compilados[clave] = funcion
+        return funcion
+
+    def projection(self, clase, campos):
+        """Serializador más las opciones de carga con solo las columnas que usa"""
+        return Proyeccion(clase, self._normalizar(campos), self.compile(clase, campos))
+
+    def profiles(self, clase, perfiles):
+        """Perfiles con nombre ('card', 'detail', 'admin', ...) de un mismo modelo"""
+        return Perfiles(self, clase, perfiles)
+
+    def columnas(self, clase):
+        """Serializador con todas las columnas de la tabla (BaseModel.to_dict)"""
+        funcion = self._columnas.get(clase)
+        if funcion is None:
+            mapper = inspect(clase)
+            campos = {}
+            for columna in clase.__table__.columns:
+                atributo = mapper.get_property_by_column(columna).key
+                campos[columna.name] = atributo
+            funcion = self.compile(clase, campos)
+            self._columnas[clase] = funcion
+        return funcion
+
+    def estado(self):
+        return {
+            'compilados': len(self._compilados),
+            'modelos': sorted(clase.__name__ for clase in self._columnas)
+        }
+
+
+class Proyeccion:
+    """
+    Serializador de un conjunto de campos junto con las columnas que necesita.
+    options() regresa load_only(...) con esas columnas (el resto, como textos
+    largos o JSON, no se leen de la base de datos) y un joinedload por cada
+    relación usada, limitado también a sus columnas.
+    """
+
+    def __init__(self, clase, campos, serializar):
+        self.clase = clase
+        self.campos = tuple(clave for clave, _ in campos)
+        self.serializar = serializar
+        mapper = inspect(clase)
+        # La llave primaria siempre se carga (identidad de la fila)
+        self.columnas = [mapper.get_property_by_column(c).class_attribute for c in mapper.primary_key]
+        self.relaciones = {}
+        self.completa = False  # algún campo no es un atributo mapeado: se carga la fila entera
+
+        for _, campo in campos:
+            if campo.fuente is None:
+                continue
+            partes = campo.fuente.split('.')
+            if not _tiene(clase, partes[0]):
+                continue
+            if len(partes) == 2 and partes[0] in mapper.relationships:
+                destino = mapper.relationships[partes[0]].mapper.class_
+                atributos = self.relaciones.setdefault(partes[0], [])
+                if _mapeado(destino, partes[1]):
+                    atributos.append(getattr(destino, partes[1]))
+            elif partes[0] in mapper.column_attrs:
+                atributo = getattr(clase, partes[0])
+                if not any(atributo is columna for columna in self.columnas):
+                    self.columnas.append(atributo)
+            else:
+                self.completa = True
+
+    def __call__(self, objeto):
+        return self.serializar(objeto)
+
+    def options(self, *extra):
+        """Opciones para query.options(); `extra`: columnas que la consulta también lee (orden del cursor)"""
+        opciones = [] if self.completa else [load_only(*self.columnas, *extra)]
+        for nombre, atributos in self.relaciones.items():
+            carga = joinedload(getattr(self.clase, nombre))
+            opciones.append(carga.load_only(*atributos) if atributos else carga)
+        return opciones
+
+
+class Perfiles:
+    """
+    Conjuntos de campos con nombre para un modelo. El cliente elige el perfil
+    con ?profile= y puede pedir solo algunos de sus campos con ?fields=a,b,c;
+    cada combinación se compila una vez y solo se leen las columnas usadas.
+    """
+
+    def __init__(self, registro, clase, perfiles):
+        self.registro = registro
+        self.clase = clase
+        self.perfiles = {nombre: dict(campos) for nombre, campos in perfiles.items()}
+        self._proyecciones = {}
+        for nombre, campos in self.perfiles.items():
+            self._proyecciones[(nombre, None)] = registro.projection(clase, campos)
+
+    def __getitem__(self, perfil):
+        return self._proyecciones[(perfil, None)]
+
+    def resolve(self, perfil=None, fields=None, default='card', allowed=None):
+        """
+        Proyección para ?profile=`perfil`&fields=`fields`. `allowed` limita
+        los perfiles que ofrece el endpoint. ProjectionError si no es válido.
+        """
+        perfil = (perfil or default).strip().lower()
+        if perfil not in self.perfiles or (allowed is not None and perfil not in allowed):
+            disponibles = ', '.join(allowed or self.perfiles)
+            raise ProjectionError(f'Perfil no válido: {perfil} (disponibles: {disponibles})')
+        if not fields:
+            return self._proyecciones[(perfil, None)]
+
+        campos = self.perfiles[perfil]
+        pedidos = {f.strip() for f in fields.split(',') if f.strip()}
+        if not pedidos:
+            return self._proyecciones[(perfil, None)]
+        desconocidos = pedidos - campos.keys()
+        if desconocidos:
+            raise ProjectionError(f"Campos no disponibles en el perfil {perfil}: {', '.join(sorted(desconocidos))}")
+        # Mismo orden que el perfil, así ?fields=b,a y ?fields=a,b comparten serializador
+        seleccion = tuple(clave for clave in campos if clave in pedidos)
+        proyeccion = self._proyecciones.get((perfil, seleccion))
+        if proyeccion is None:
+            proyeccion = self.registro.projection(self.clase, {clave: campos[clave] for clave in seleccion})
+            if len(self._proyecciones) < self.registro.MAX_COMPILADOS:
+                self._proyecciones[(perfil, seleccion)] = proyeccion
+        return proyeccion
+
+
+# Instancia global de serializadores
+serializers = SerializerRegistry()
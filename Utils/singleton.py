@@ -1,5 +1,10 @@
 import threading
+import time
 from datetime import datetime, timedelta
+from .background import PeriodicTask
+from .stats_backends import MemoryStatsBackend, create_stats_backend
+from .stats_rollups import RollupBuffer
+from .visit_recorder import VisitRecorder
 
 
 class StatisticsManager:
@@ -25,111 +30,143 @@ class StatisticsManager:
                     self._init_stats()
 
     def _init_stats(self):
-        """Inicializar las estadísticas"""
-        self.visit_count = 0
-        self.active_sessions = {}
-        self.daily_visits = {}
-        self.page_views = {}
-
-        # Inicializar contadores para el día actual
-        today = datetime.now().date()
-        self.daily_visits[today] = 0
+        """Inicializar las estadísticas con el backend en memoria por defecto"""
+        self.backend = MemoryStatsBackend()
+        self.session_timeout = 3600
+        self.expire_step = 500
+        self.cleanup_interval = 60
+        self._last_expiry = 0.0
+        # Las visitas siempre pasan por los buffers por hilo: una petición no toma
+        # ningún lock ni abre una transacción del backend
+        self.recorder = VisitRecorder()
+        self.flusher = PeriodicTask('stats-flusher', 2, self.flush)
+        self.rollups = RollupBuffer()
+        self.rollup_flusher = None
+        self.app = None
+
+    def init_app(self, app):
+        """Configurar el backend de almacenamiento según la configuración de la app"""
+        self.backend = create_stats_backend(app.config)
+        self.session_timeout = app.config.get('STATS_SESSION_TIMEOUT', self.session_timeout)
+        self.expire_step = app.config.get('STATS_EXPIRE_STEP', self.expire_step)
+        self.cleanup_interval = app.config.get('STATS_CLEANUP_INTERVAL', self.cleanup_interval)
+
+        # Los agregados por minuto/hora/día se persisten en la base de datos principal.
+        # Se crea antes que el flusher de visitas: atexit corre en orden inverso y
+        # así el último volcado de visitas todavía alcanza a llegar a los agregados.
+        self.app = app
+        self.rollups.retencion = {
+            'minute': app.config.get('STATS_ROLLUP_MINUTE_RETENTION_DAYS', 2),
+            'hour': app.config.get('STATS_ROLLUP_HOUR_RETENTION_DAYS', 90),
+        }
+        rollup_interval = app.config.get('STATS_ROLLUP_FLUSH_INTERVAL', 60)
+        if self.rollup_flusher is None:
+            self.rollup_flusher = PeriodicTask('stats-rollups', rollup_interval, self.flush_rollups)
+        else:
+            self.rollup_flusher.interval = rollup_interval
+
+        # Lo registrado antes de configurar la app pasa al backend nuevo, no se pierde
+        anterior, self.recorder = self.recorder, VisitRecorder(capacity=app.config.get('STATS_BUFFER_SIZE', 4096))
+        self.recorder.dropped = anterior.dropped
+        pendientes = anterior.drain()
+        if pendientes:
+            self.backend.record_batch(pendientes)
+            self.rollups.add_events(pendientes)
+        self.flusher.interval = app.config.get('STATS_FLUSH_INTERVAL', 2)
 
     def register_visit(self, session_id, ip_address, user_agent, page=None):
         """Registrar una visita al sitio"""
-        with self._lock:
-            self.visit_count += 1
-
-            # Registrar visita diaria
-            today = datetime.now().date()
-            if today not in self.daily_visits:
-                self.daily_visits[today] = 0
-            self.daily_visits[today] += 1
-
-            # Registrar sesión activa
-            self.active_sessions[session_id] = {
-                'ip_address': ip_address,
-                'user_agent': user_agent,
-                'last_activity': datetime.now(),
-                'page': page
-            }
-
-            # Registrar vista de página
-            if page:
-                if page not in self.page_views:
-                    self.page_views[page] = 0
-                self.page_views[page] += 1
+        self.flusher.ensure_started()
+        self.recorder.record(session_id, ip_address, user_agent, page)
+        if self.rollup_flusher is not None:
+            self.rollup_flusher.ensure_started()
+
+    def flush(self):
+        """Volcar al backend las visitas acumuladas en los buffers y expirar sesiones vencidas"""
+        events = self.recorder.drain()
+        if events:
+            self.backend.record_batch(events)
+            self.rollups.add_events(events)
+        self.expire_sessions()
+        return len(events)
+
+    def expire_sessions(self):
+        """
+        Expiración incremental de sesiones (a lo más STATS_EXPIRE_STEP por pasada),
+        como mucho cada STATS_CLEANUP_INTERVAL segundos. La ejecuta el flusher:
+        las lecturas de /api/stats no escriben en el backend.
+        """
+        now = time.monotonic()
+        if now - self._last_expiry < self.cleanup_interval:
+            return 0
+        self._last_expiry = now
+        return self.backend.expire_sessions(time.time() - self.session_timeout, self.expire_step)
+
+    def flush_rollups(self):
+        """Persistir los agregados acumulados en la tabla visitas_rollup"""
+        if self.app is None:
+            return 0
+        with self.app.app_context():
+            return self.rollups.flush()
 
     def remove_session(self, session_id):
         """Remover una sesión activa"""
-        with self._lock:
-            if session_id in self.active_sessions:
-                del self.active_sessions[session_id]
+        self.backend.remove_session(session_id)
 
     def cleanup_old_sessions(self, hours=1):
         """Limpiar sesiones antiguas (más de X horas)"""
-        with self._lock:
-            cutoff_time = datetime.now() - timedelta(hours=hours)
-            expired_sessions = [
-                session_id for session_id, session_data in self.active_sessions.items()
-                if session_data['last_activity'] < cutoff_time
-            ]
-
-            for session_id in expired_sessions:
-                del self.active_sessions[session_id]
-
-            return len(expired_sessions)
+        return self.backend.cleanup_sessions(time.time() - hours * 3600)
 
     def get_visit_count(self):
         """Obtener contador total de visitas"""
-        return self.visit_count
+        return self.backend.get_total_visits()
 
     def get_active_users_count(self):
-        """Obtener número de usuarios activos"""
-        self.cleanup_old_sessions()
-        return len(self.active_sessions)
+        """Obtener número de usuarios activos (solo lectura; las vencidas las expira el flusher)"""
+        # Sin visitas en este worker el flusher no habría arrancado
+        self.flusher.ensure_started()
+        return self.backend.get_active_sessions()
 
     def get_daily_visits(self, days=7):
         """Obtener visitas de los últimos N días"""
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days - 1)
+        counts = self.backend.get_daily_visits(start_date, end_date)
+        uniques = self.backend.get_unique_visitors(start_date, end_date)
 
         daily_data = []
-        current_date = start_date
-
-        while current_date <= end_date:
-            count = self.daily_visits.get(current_date, 0)
+        for offset in range(days):
+            current_date = start_date + timedelta(days=offset)
             daily_data.append({
                 'date': current_date.isoformat(),
-                'visits': count
+                'visits': counts.get(current_date, 0),
+                'unique_visitors': uniques.get(current_date, 0)
             })
-            current_date += timedelta(days=1)
-
         return daily_data
 
+    def get_unique_visitors_today(self):
+        """Estimación (HyperLogLog) de visitantes únicos del día"""
+        today = datetime.now().date()
+        return self.backend.get_unique_visitors(today, today).get(today, 0)
+
     def get_popular_pages(self, limit=10):
         """Obtener páginas más populares"""
-        sorted_pages = sorted(
-            self.page_views.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:limit]
-
         return [
             {'page': page, 'views': views}
-            for page, views in sorted_pages
+            for page, views in self.backend.get_popular_pages(limit)
         ]
 
     def get_stats(self):
         """Obtener todas las estadísticas"""
-        self.cleanup_old_sessions()
+        active = self.get_active_users_count()
 
         return {
-            'total_visits': self.visit_count,
-            'active_users': len(self.active_sessions),
+            'total_visits': self.get_visit_count(),
+            'active_users': active,
+            'unique_visitors_today': self.get_unique_visitors_today(),
             'daily_visits_7d': self.get_daily_visits(7),
             'popular_pages': self.get_popular_pages(5),
-            'active_sessions': len(self.active_sessions)
+            'active_sessions': active
         }
 
 
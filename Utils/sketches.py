@@ -0,0 +1,133 @@
+import hashlib
+import math
+from collections import OrderedDict
+
+
+def _hash64(value):
+    """Hash estable de 64 bits (igual en todos los procesos, a diferencia de hash())"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class SessionTable:
+    """
+    Tabla de sesiones LRU con TTL.
+    El OrderedDict se mantiene ordenado por última actividad, de modo que
+    expirar solo mira el frente de la tabla y el tamaño nunca pasa de max_size.
+    """
+
+    def __init__(self, max_size=10000, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evicted = 0
+        self._sessions = OrderedDict()
+
+    def touch(self, session_id, data, when):
+        """Registrar actividad; desaloja la sesión menos reciente si está llena"""
+        sessions = self._sessions
+        if session_id in sessions:
+            sessions.move_to_end(session_id)
+        sessions[session_id] = (when, data)
+        while len(sessions) > self.max_size:
+            sessions.popitem(last=False)
+            self.evicted += 1
+
+    def remove(self, session_id):
+        return self._sessions.pop(session_id, None) is not None
+
+    def expire(self, now, max_steps=None):
+        """Eliminar sesiones vencidas desde el frente; a lo más max_steps por llamada"""
+        cutoff = now - self.ttl
+        return self.expire_before(cutoff, max_steps)
+
+    def expire_before(self, cutoff, max_steps=None):
+        sessions = self._sessions
+        removed = 0
+        while sessions and (max_steps is None or removed < max_steps):
+            session_id, (when, _) = next(iter(sessions.items()))
+            if when >= cutoff:
+                break
+            del sessions[session_id]
+            removed += 1
+        return removed
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+
+class SpaceSaving:
+    """
+    Contador de elementos frecuentes (algoritmo Space-Saving).
+    Guarda a lo más `capacity` claves; una clave nueva con la tabla llena
+    reemplaza a la mínima heredando su cuenta como error máximo.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self._counts = {}  # clave -> [cuenta, error]
+
+    def add(self, key, count=1):
+        counts = self._counts
+        entry = counts.get(key)
+        if entry is not None:
+            entry[0] += count
+        elif len(counts) < self.capacity:
+            counts[key] = [count, 0]
+        else:
+            min_key = min(counts, key=lambda k: counts[k][0])
+            min_count = counts.pop(min_key)[0]
+            counts[key] = [min_count + count, min_count]
+
+    def top(self, limit):
+        """Lista de (clave, cuenta estimada) de mayor a menor"""
+        ranked = sorted(self._counts.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, count) for key, (count, _) in ranked[:limit]]
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class HyperLogLog:
+    """
+    Estimador de cardinalidad HyperLogLog con 2^precision registros de un byte.
+    Con precision=12 ocupa 4 KB y el error típico es ~1.6 %.
+    """
+
+    def __init__(self, precision=12, registers=None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    def add(self, value):
+        x = _hash64(value)
+        index = x >> (64 - self.precision)
+        rest = (x << self.precision) & ((1 << 64) - 1)
+        rank = (64 - self.precision + 1) if rest == 0 else (65 - rest.bit_length())
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Unir otro HLL de la misma precisión (máximo registro a registro)"""
+        registers = self.registers
+        for i, value in enumerate(other.registers):
+            if value > registers[i]:
+                registers[i] = value
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Corrección para rangos pequeños (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data, precision=12):
+        return cls(precision, data)
@@ -0,0 +1,222 @@
+import os
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+# Errores que indican que la conexión ya no sirve (el servidor la cerró, se cayó la red...)
+ERRORES_CONEXION = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class _ConexionSMTP:
+    """Conexión de Flask-Mail ya autenticada, con su uso"""
+
+    __slots__ = ('conexion', 'enviados', 'ultimo_uso')
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self.enviados = 0
+        self.ultimo_uso = time.monotonic()
+
+
+class SMTPPool:
+    """
+    Conexiones SMTP persistentes para Flask-Mail.
+    mail.send() abre una sesión nueva (TCP + STARTTLS + AUTH) por mensaje y
+    ese saludo es casi todo el tiempo de envío. Aquí se mantienen abiertas
+    hasta MAIL_POOL_SIZE conexiones autenticadas y se reutilizan:
+    - una conexión inactiva más de MAIL_POOL_IDLE_TIMEOUT segundos se cierra
+      y se abre otra (los servidores cortan las sesiones ociosas)
+    - tras MAIL_POOL_MAX_MESSAGES mensajes se renueva (límite por sesión)
+    - si el envío falla porque el servidor cerró la conexión, se reconecta
+      y se reintenta una vez
+    Dentro de sesion() un hilo conserva la misma conexión para todo un lote
+    de mensajes. Con MAIL_POOL_ENABLED=False cada envío usa mail.send().
+    """
+
+    def __init__(self):
+        self.mail = None
+        self.enabled = True
+        self.size = 2
+        self.idle_timeout = 30.0
+        self.max_mensajes = 100
+        self._iniciar_estado()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._iniciar_estado)
+
+    def _iniciar_estado(self):
+        # También tras un fork: los sockets del padre no se comparten con el hijo
+        self._cond = threading.Condition()
+        self._libres = []  # conexiones sin usar, la más reciente al final
+        self._abiertas = 0
+        self._local = threading.local()
+        self.conexiones = 0
+        self.reconexiones = 0
+        self.reutilizadas = 0
+        self.enviados = 0
+
+    def init_app(self, app, mail):
+        """Configurar el pool sobre la extensión Flask-Mail `mail`"""
+        self.close()
+        self.mail = mail
+        self.enabled = app.config.get('MAIL_POOL_ENABLED', True)
+        self.size = max(1, int(app.config.get('MAIL_POOL_SIZE', 2)))
+        self.idle_timeout = float(app.config.get('MAIL_POOL_IDLE_TIMEOUT', 30))
+        self.max_mensajes = max(1, int(app.config.get('MAIL_POOL_MAX_MESSAGES', 100)))
+
+    # ==================== CONEXIONES ====================
+
+    def _abrir(self):
+        """Conectar y autenticar (requiere app context)"""
+        conexion = self.mail.connect()
+        conexion.__enter__()
+        with self._cond:
+            self.conexiones += 1
+        return _ConexionSMTP(conexion)
+
+    @staticmethod
+    def _cerrar(conexion):
+        try:
+            conexion.conexion.__exit__(None, None, None)
+        except Exception:
+            pass  # ya estaba cerrada del lado del servidor
+
+    def _tomar(self):
+        """Una conexión libre y vigente, o una nueva si aún no hay MAIL_POOL_SIZE abiertas"""
+        while True:
+            vencida = None
+            with self._cond:
+                while not self._libres and self._abiertas >= self.size:
+                    self._cond.wait()
+                if self._libres:
+                    conexion = self._libres.pop()
+                    if time.monotonic() - conexion.ultimo_uso <= self.idle_timeout:
+                        self.reutilizadas += 1
+                        return conexion
+                    vencida = conexion
+                else:
+                    self._abiertas += 1
+            if vencida is not None:
+                self._cerrar(vencida)
+                with self._cond:
+                    self._abiertas -= 1
+                continue
+            try:
+                return self._abrir()
+            except Exception:
+                self._liberar_lugar()
+                raise
+
+    def _liberar_lugar(self):
+        with self._cond:
+            self._abiertas -= 1
+            self._cond.notify()
+
+    def _devolver(self, conexion):
+        if conexion.enviados >= self.max_mensajes:
+            self._cerrar(conexion)
+            self._liberar_lugar()
+            return
+        conexion.ultimo_uso = time.monotonic()
+        with self._cond:
+            self._libres.append(conexion)
+            self._cond.notify()
+
+    # ==================== ENVÍO ====================
+
+    def _enviar(self, conexion, mensaje):
+        """
+        Enviar por `conexion` y regresar la conexión que quedó en uso (otra si
+        hubo que reconectar). Si el envío falla, la conexión ya quedó devuelta
+        al pool o descartada.
+        """
+        for intento in (1, 2):
+            try:
+                conexion.conexion.send(mensaje)
+            except ERRORES_CONEXION:
+                self._cerrar(conexion)
+                if intento == 2:
+                    self._liberar_lugar()
+                    raise
+                # El servidor cerró la sesión: otra conexión y un reintento
+                with self._cond:
+                    self.reconexiones += 1
+                try:
+                    conexion = self._abrir()
+                except Exception:
+                    self._liberar_lugar()
+                    raise
+                continue
+            except Exception:
+                # Error del mensaje (destinatario rechazado...): la conexión sigue sirviendo
+                self._devolver(conexion)
+                raise
+            conexion.enviados += 1
+            with self._cond:
+                self.enviados += 1
+            return conexion
+
+    def send(self, mensaje):
+        """Enviar un mensaje por una conexión del pool (requiere app context)"""
+        if not self.enabled:
+            self.mail.send(mensaje)
+            return
+
+        en_sesion = getattr(self._local, 'en_sesion', False)
+        conexion = getattr(self._local, 'conexion', None) if en_sesion else None
+        self._local.conexion = None
+        if conexion is None:
+            conexion = self._tomar()
+
+        conexion = self._enviar(conexion, mensaje)
+        if en_sesion and conexion.enviados < self.max_mensajes:
+            self._local.conexion = conexion
+        else:
+            self._devolver(conexion)
+
+    @contextmanager
+    def sesion(self):
+        """Conservar la conexión de este hilo para todos los envíos del bloque (un lote)"""
+        if getattr(self._local, 'en_sesion', False):
+            yield
+            return
+        self._local.en_sesion = True
+        self._local.conexion = None
+        try:
+            yield
+        finally:
+            conexion = self._local.conexion
+            self._local.en_sesion = False
+            self._local.conexion = None
+            if conexion is not None:
+                self._devolver(conexion)
+
+    def close(self):
+        """Cerrar las conexiones libres (las que están en uso se cierran al devolverse si sobran)"""
+        with self._cond:
+            libres, self._libres = self._libres, []
+            self._abiertas -= len(libres)
+            self._cond.notify_all()
+        for conexion in libres:
+            self._cerrar(conexion)
+
+    # ==================== MÉTRICAS ====================
+
+    def stats(self):
+        """Conexiones abiertas, libres, reconexiones y mensajes por conexión"""
+        with self._cond:
+            return {
+                'habilitado': self.enabled,
+                'tamano': self.size,
+                'abiertas': self._abiertas,
+                'libres': len(self._libres),
+                'conexiones_creadas': self.conexiones,
+                'reconexiones': self.reconexiones,
+                'reutilizadas': self.reutilizadas,
+                'enviados': self.enviados,
+                'mensajes_por_conexion': round(self.enviados / self.conexiones, 2) if self.conexiones else 0.0
+            }
+
+
+# Instancia global del pool de conexiones SMTP
+smtp_pool = SMTPPool()
@@ -0,0 +1,406 @@
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from .sketches import SessionTable, SpaceSaving, HyperLogLog
+
+
+def aggregate_visits(events):
+    """
+    Agregar eventos (when, session_id, ip, user_agent, page) en un lote compacto:
+    total, visitas por día, vistas por página, sesiones únicas por día y
+    último estado de cada sesión.
+    """
+    days = Counter()
+    pages = Counter()
+    uniques = {}
+    sessions = {}
+    for when, session_id, ip_address, user_agent, page in events:
+        day = datetime.fromtimestamp(when).date()
+        days[day] += 1
+        uniques.setdefault(day, set()).add(session_id)
+        if page:
+            pages[page] += 1
+        sessions[session_id] = (ip_address, user_agent, page, when)
+    return len(events), days, pages, uniques, sessions
+
+
+class StatsBackend:
+    """
+    Interfaz de almacenamiento para StatisticsManager.
+    Cada backend decide dónde viven los contadores; el singleton solo delega.
+    Todas las estructuras son acotadas: sesiones LRU/TTL, páginas con
+    Space-Saving y visitantes únicos por día con HyperLogLog.
+    """
+
+    def __init__(self, max_sessions=10000, session_ttl=3600, top_pages=100,
+                 hll_precision=12, retention_days=30):
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.top_pages = top_pages
+        self.hll_precision = hll_precision
+        self.retention_days = retention_days
+
+    def record_visit(self, session_id, ip_address, user_agent, page, when):
+        """Registrar una visita (when es un timestamp epoch)"""
+        self.record_batch([(when, session_id, ip_address, user_agent, page)])
+
+    def record_batch(self, events):
+        """Registrar un lote de eventos (when, session_id, ip, user_agent, page)"""
+        raise NotImplementedError
+
+    def remove_session(self, session_id):
+        """Remover una sesión activa"""
+        raise NotImplementedError
+
+    def cleanup_sessions(self, cutoff):
+        """Eliminar todas las sesiones con última actividad anterior a cutoff; regresa cuántas"""
+        raise NotImplementedError
+
+    def expire_sessions(self, cutoff, max_steps):
+        """Expiración incremental: elimina a lo más max_steps sesiones vencidas"""
+        raise NotImplementedError
+
+    def get_total_visits(self):
+        raise NotImplementedError
+
+    def get_active_sessions(self):
+        """Número de sesiones activas (contador mantenido, no un recorrido)"""
+        raise NotImplementedError
+
+    def get_daily_visits(self, start_date, end_date):
+        """Diccionario {date: visitas} para el rango indicado"""
+        raise NotImplementedError
+
+    def get_unique_visitors(self, start_date, end_date):
+        """Diccionario {date: visitantes únicos estimados} para el rango indicado"""
+        raise NotImplementedError
+
+    def get_popular_pages(self, limit):
+        """Lista de tuplas (página, vistas) ordenadas de mayor a menor"""
+        raise NotImplementedError
+
+    def _retention_cutoff(self):
+        return datetime.now().date() - timedelta(days=self.retention_days)
+
+
+class MemoryStatsBackend(StatsBackend):
+    """
+    Backend en memoria del proceso (un solo worker).
+    Solo escriben el flusher de StatisticsManager y la limpieza manual, así
+    que el lock de escritura nunca lo toma un hilo de petición; las lecturas
+    no lo toman y trabajan sobre copias de los diccionarios.
+    """
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._write_lock = threading.Lock()
+        self.visit_count = 0
+        self.sessions = SessionTable(self.max_sessions, self.session_ttl)
+        self.page_views = SpaceSaving(self.top_pages)
+        self.daily_visits = {}
+        self.daily_uniques = {}
+
+    def record_batch(self, events):
+        if not events:
+            return
+        total, days, pages, uniques, sessions = aggregate_visits(events)
+        with self._write_lock:
+            self.visit_count += total
+            for day, count in days.items():
+                if day not in self.daily_visits:
+                    self._drop_old_days()
+                self.daily_visits[day] = self.daily_visits.get(day, 0) + count
+            for day, session_ids in uniques.items():
+                hll = self.daily_uniques.get(day)
+                if hll is None:
+                    hll = self.daily_uniques[day] = HyperLogLog(self.hll_precision)
+                for session_id in session_ids:
+                    hll.add(session_id)
+            for page, count in pages.items():
+                self.page_views.add(page, count)
+            latest = 0.0
+            for session_id, (ip_address, user_agent, page, when) in sessions.items():
+                latest = max(latest, when)
+                self.sessions.touch(session_id, (ip_address, user_agent, page), when)
+            self.sessions.expire(latest, max_steps=len(sessions))
+
+    def _drop_old_days(self):
+        cutoff = self._retention_cutoff()
+        for store in (self.daily_visits, self.daily_uniques):
+            for day in [d for d in store if d < cutoff]:
+                del store[day]
+
+    def remove_session(self, session_id):
+        with self._write_lock:
+            self.sessions.remove(session_id)
+
+    def cleanup_sessions(self, cutoff):
+        with self._write_lock:
+            return self.sessions.expire_before(cutoff)
+
+    def expire_sessions(self, cutoff, max_steps):
+        with self._write_lock:
+            return self.sessions.expire_before(cutoff, max_steps)
+
+    def get_total_visits(self):
+        return self.visit_count
+
+    def get_active_sessions(self):
+        return len(self.sessions)
+
+    def get_daily_visits(self, start_date, end_date):
+        return {
+            day: count for day, count in list(self.daily_visits.items())
+            if start_date <= day <= end_date
+        }
+
+    def get_unique_visitors(self, start_date, end_date):
+        return {
+            day: hll.count() for day, hll in list(self.daily_uniques.items())
+            if start_date <= day <= end_date
+        }
+
+    def get_popular_pages(self, limit):
+        return self.page_views.top(limit)
+
+
+class SQLiteStatsBackend(StatsBackend):
+    """
+    Backend en un archivo SQLite compartido por todos los workers del host.
+    Usa WAL y conexiones por hilo: la concurrencia la resuelve SQLite con
+    bloqueos de archivo, no un mutex global de Python. Los totales se guardan
+    como contadores para que las lecturas no recorran tablas, y las tablas
+    de sesiones y páginas están acotadas igual que en el backend en memoria.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS daily_visits (day TEXT PRIMARY KEY, visits INTEGER NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS unique_visitors (day TEXT PRIMARY KEY, registers BLOB NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS page_views ("
+        " page TEXT PRIMARY KEY, views INTEGER NOT NULL, error INTEGER NOT NULL DEFAULT 0)",
+        "CREATE INDEX IF NOT EXISTS idx_page_views_views ON page_views (views)",
+        "CREATE TABLE IF NOT EXISTS sessions ("
+        " session_id TEXT PRIMARY KEY, ip_address TEXT, user_agent TEXT,"
+        " page TEXT, last_activity REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_last_activity ON sessions (last_activity)",
+        "INSERT OR IGNORE INTO counters (name, value) VALUES ('total_visits', 0)",
+        "INSERT OR IGNORE INTO counters (name, value) VALUES ('active_sessions', 0)",
+    )
+
+    def __init__(self, path, timeout=5.0, **options):
+        super().__init__(**options)
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+
+    def _connection(self):
+        """Conexión por hilo; se reabre si el proceso fue bifurcado (gunicorn)"""
+        pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != pid:
+            conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = pid
+        return conn
+
+    def _write(self, fn):
+        """Ejecutar fn(conn) dentro de una transacción de escritura"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(conn)
+            conn.execute('COMMIT')
+            return result
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _counter(self, name, conn=None):
+        row = (conn or self._connection()).execute(
+            'SELECT value FROM counters WHERE name = ?', (name,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _adjust_active(conn, delta):
+        if delta:
+            conn.execute("UPDATE counters SET value = value + ? WHERE name = 'active_sessions'", (delta,))
+
+    def record_batch(self, events):
+        if not events:
+            return
+        total, days, pages, uniques, sessions = aggregate_visits(events)
+
+        def apply(conn):
+            conn.execute("UPDATE counters SET value = value + ? WHERE name = 'total_visits'", (total,))
+            conn.executemany(
+                'INSERT INTO daily_visits (day, visits) VALUES (?, ?) '
+                'ON CONFLICT(day) DO UPDATE SET visits = visits + excluded.visits',
+                [(day.isoformat(), count) for day, count in days.items()]
+            )
+            self._merge_uniques(conn, uniques)
+            for page, count in pages.items():
+                self._add_page(conn, page, count)
+            self._touch_sessions(conn, sessions)
+            self._drop_old_days(conn)
+
+        self._write(apply)
+
+    def _merge_uniques(self, conn, uniques):
+        for day, session_ids in uniques.items():
+            row = conn.execute(
+                'SELECT registers FROM unique_visitors WHERE day = ?', (day.isoformat(),)
+            ).fetchone()
+            hll = HyperLogLog.from_bytes(row[0], self.hll_precision) if row else HyperLogLog(self.hll_precision)
+            for session_id in session_ids:
+                hll.add(session_id)
+            conn.execute(
+                'INSERT OR REPLACE INTO unique_visitors (day, registers) VALUES (?, ?)',
+                (day.isoformat(), hll.to_bytes())
+            )
+
+    def _add_page(self, conn, page, count):
+        """Space-Saving sobre la tabla page_views (a lo más top_pages filas)"""
+        if conn.execute('UPDATE page_views SET views = views + ? WHERE page = ?', (count, page)).rowcount:
+            return
+        rows = conn.execute('SELECT COUNT(*) FROM page_views').fetchone()[0]
+        if rows < self.top_pages:
+            conn.execute('INSERT INTO page_views (page, views, error) VALUES (?, ?, 0)', (page, count))
+            return
+        min_page, min_views = conn.execute(
+            'SELECT page, views FROM page_views ORDER BY views ASC LIMIT 1'
+        ).fetchone()
+        conn.execute('DELETE FROM page_views WHERE page = ?', (min_page,))
+        conn.execute(
+            'INSERT INTO page_views (page, views, error) VALUES (?, ?, ?)',
+            (page, min_views + count, min_views)
+        )
+
+    def _touch_sessions(self, conn, sessions):
+        new_sessions = 0
+        latest = 0.0
+        for session_id, (ip_address, user_agent, page, when) in sessions.items():
+            latest = max(latest, when)
+            inserted = conn.execute(
+                'INSERT OR IGNORE INTO sessions '
+                '(session_id, ip_address, user_agent, page, last_activity) VALUES (?, ?, ?, ?, ?)',
+                (session_id, ip_address, user_agent, page, when)
+            ).rowcount
+            if inserted:
+                new_sessions += 1
+            else:
+                conn.execute(
+                    'UPDATE sessions SET ip_address = ?, user_agent = ?, page = ?, last_activity = ? '
+                    'WHERE session_id = ?',
+                    (ip_address, user_agent, page, when, session_id)
+                )
+        self._adjust_active(conn, new_sessions)
+
+        # Expiración incremental por TTL y desalojo LRU si se excede el máximo
+        removed = self._delete_oldest(conn, len(sessions), latest - self.session_ttl)
+        excess = self._counter('active_sessions', conn) - self.max_sessions
+        if excess > 0:
+            removed += self._delete_oldest(conn, excess)
+        self._adjust_active(conn, -removed)
+
+    @staticmethod
+    def _delete_oldest(conn, limit, cutoff=None):
+        if cutoff is None:
+            condition, params = '', (limit,)
+        else:
+            condition, params = 'WHERE last_activity < ? ', (cutoff, limit)
+        return conn.execute(
+            'DELETE FROM sessions WHERE session_id IN ('
+            f'SELECT session_id FROM sessions {condition}ORDER BY last_activity LIMIT ?)',
+            params
+        ).rowcount
+
+    def _drop_old_days(self, conn):
+        cutoff = self._retention_cutoff().isoformat()
+        conn.execute('DELETE FROM daily_visits WHERE day < ?', (cutoff,))
+        conn.execute('DELETE FROM unique_visitors WHERE day < ?', (cutoff,))
+
+    def remove_session(self, session_id):
+        def apply(conn):
+            removed = conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,)).rowcount
+            self._adjust_active(conn, -removed)
+
+        self._write(apply)
+
+    def cleanup_sessions(self, cutoff):
+        def apply(conn):
+            removed = conn.execute('DELETE FROM sessions WHERE last_activity < ?', (cutoff,)).rowcount
+            self._adjust_active(conn, -removed)
+            return removed
+
+        return self._write(apply)
+
+    def expire_sessions(self, cutoff, max_steps):
+        # Lectura previa: sin sesiones vencidas no se toma el bloqueo de escritura
+        if self._connection().execute(
+            'SELECT 1 FROM sessions WHERE last_activity < ? LIMIT 1', (cutoff,)
+        ).fetchone() is None:
+            return 0
+
+        def apply(conn):
+            removed = self._delete_oldest(conn, max_steps, cutoff)
+            self._adjust_active(conn, -removed)
+            return removed
+
+        return self._write(apply)
+
+    def get_total_visits(self):
+        return self._counter('total_visits')
+
+    def get_active_sessions(self):
+        return self._counter('active_sessions')
+
+    def get_daily_visits(self, start_date, end_date):
+        rows = self._connection().execute(
+            'SELECT day, visits FROM daily_visits WHERE day BETWEEN ? AND ?',
+            (start_date.isoformat(), end_date.isoformat())
+        ).fetchall()
+        return {datetime.strptime(day, '%Y-%m-%d').date(): visits for day, visits in rows}
+
+    def get_unique_visitors(self, start_date, end_date):
+        rows = self._connection().execute(
+            'SELECT day, registers FROM unique_visitors WHERE day BETWEEN ? AND ?',
+            (start_date.isoformat(), end_date.isoformat())
+        ).fetchall()
+        return {
+            datetime.strptime(day, '%Y-%m-%d').date(): HyperLogLog.from_bytes(registers, self.hll_precision).count()
+            for day, registers in rows
+        }
+
+    def get_popular_pages(self, limit):
+        return self._connection().execute(
+            'SELECT page, views FROM page_views ORDER BY views DESC LIMIT ?', (limit,)
+        ).fetchall()
+
+
+def create_stats_backend(app_config):
+    """Construir el backend indicado por STATS_BACKEND"""
+    options = {
+        'max_sessions': app_config.get('STATS_MAX_SESSIONS', 10000),
+        'session_ttl': app_config.get('STATS_SESSION_TIMEOUT', 3600),
+        'top_pages': app_config.get('STATS_TOP_PAGES', 100),
+        'hll_precision': app_config.get('STATS_HLL_PRECISION', 12),
+        'retention_days': app_config.get('STATS_RETENTION_DAYS', 30),
+    }
+    kind = (app_config.get('STATS_BACKEND') or 'memory').lower()
+    if kind == 'sqlite':
+        return SQLiteStatsBackend(app_config['STATS_SQLITE_PATH'], **options)
+    if kind == 'memory':
+        return MemoryStatsBackend(**options)
+    raise ValueError(f'Backend de estadísticas desconocido: {kind}')
@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from DataBase.models.database import db
+from DataBase.models.estadistica import VisitaRollup
+
+
+def bucket_start(moment, granularidad):
+    """Truncar un datetime al inicio de su bucket"""
+    if granularidad == 'minute':
+        return moment.replace(second=0, microsecond=0)
+    if granularidad == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularidad == 'day':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f'Granularidad inválida: {granularidad}')
+
+
+def hora_local(momento):
+    """Los periodos se guardan en hora local sin zona: convertir un datetime con zona"""
+    if momento.tzinfo is not None:
+        return momento.astimezone().replace(tzinfo=None)
+    return momento
+
+
+def _upsert_incrementos(connection, counts):
+    """Sumar visitas a cada (granularidad, periodo) con el upsert nativo del dialecto"""
+    tabla = VisitaRollup.__table__
+    ahora = datetime.utcnow()
+    filas = [
+        {'granularidad': granularidad, 'periodo': periodo, 'visitas': visitas,
+         'fecha_creacion': ahora, 'fecha_actualizacion': ahora, 'activo': True}
+        for (granularidad, periodo), visitas in counts.items() if visitas
+    ]
+    if not filas:
+        return
+
+    dialecto = connection.dialect.name
+    if dialecto == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(tabla)
+        stmt = stmt.on_duplicate_key_update(
+            visitas=tabla.c.visitas + stmt.inserted.visitas,
+            fecha_actualizacion=stmt.inserted.fecha_actualizacion
+        )
+        connection.execute(stmt, filas)
+    elif dialecto in ('sqlite', 'postgresql'):
+        if dialecto == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(tabla)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[tabla.c.granularidad, tabla.c.periodo],
+            set_={'visitas': tabla.c.visitas + stmt.excluded.visitas,
+                  'fecha_actualizacion': stmt.excluded.fecha_actualizacion}
+        )
+        connection.execute(stmt, filas)
+    else:
+        for fila in filas:
+            actualizadas = connection.execute(
+                tabla.update().where(
+                    tabla.c.granularidad == fila['granularidad'], tabla.c.periodo == fila['periodo']
+                ).values(visitas=tabla.c.visitas + fila['visitas'], fecha_actualizacion=ahora)
+            ).rowcount
+            if not actualizadas:
+                connection.execute(tabla.insert().values(**fila))
+
+
+class RollupBuffer:
+    """
+    Acumula visitas por bucket de minuto, hora y día entre volcados.
+    Solo guarda un contador por bucket, no los eventos crudos. Los buckets
+    de minuto y hora más viejos que su retención se borran al volcar; los
+    de día se conservan.
+    """
+
+    def __init__(self, retencion=None):
+        self._lock = threading.Lock()
+        self._counts = Counter()  # (granularidad, periodo) -> visitas
+        self.retencion = retencion or {'minute': 2, 'hour': 90}  # granularidad -> días
+        self._ultima_purga = 0.0
+
+    def add_events(self, events):
+        """Agregar eventos (when, session_id, ip, user_agent, page)"""
+        minutes = Counter(int(event[0]) // 60 for event in events)
+        increments = Counter()
+        for minute, count in minutes.items():
+            moment = datetime.fromtimestamp(minute * 60)
+            for granularidad in VisitaRollup.GRANULARIDADES:
+                increments[(granularidad, bucket_start(moment, granularidad))] += count
+        with self._lock:
+            self._counts.update(increments)
+
+    def take(self):
+        """Extraer y reiniciar los contadores acumulados"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return counts
+
+    def restore(self, counts):
+        """Devolver contadores que no se pudieron persistir"""
+        with self._lock:
+            self._counts.update(counts)
+
+    def flush(self):
+        """Sumar los incrementos a visitas_rollup (requiere app context)"""
+        counts = self.take()
+        if counts:
+            try:
+                _upsert_incrementos(db.session.connection(), counts)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.restore(counts)
+                raise
+        self.purgar()
+        return len(counts)
+
+    def purgar(self):
+        """Borrar, como mucho una vez por hora, los buckets de minuto y hora vencidos"""
+        if time.monotonic() - self._ultima_purga < 3600:
+            return 0
+        self._ultima_purga = time.monotonic()
+        tabla = VisitaRollup.__table__
+        ahora = datetime.now()
+        borradas = 0
+        try:
+            for granularidad, dias in self.retencion.items():
+                if dias and dias > 0:
+                    borradas += db.session.execute(tabla.delete().where(
+                        tabla.c.granularidad == granularidad,
+                        tabla.c.periodo < ahora - timedelta(days=dias)
+                    )).rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return borradas
+
+
+def query_rollups(granularidad, desde, hasta):
+    """
+    Serie de visitas por periodo entre desde y hasta (inclusive), leída de
+    los agregados precalculados. Regresa [{'periodo': iso, 'visitas': n}].
+    """
+    if granularidad not in VisitaRollup.GRANULARIDADES:
+        raise ValueError(f'Granularidad inválida: {granularidad}')
+
+    desde, hasta = hora_local(desde), hora_local(hasta)
+    rows = db.session.query(
+        VisitaRollup.periodo,
+        VisitaRollup.visitas
+    ).filter(
+        VisitaRollup.granularidad == granularidad,
+        VisitaRollup.periodo >= bucket_start(desde, granularidad),
+        VisitaRollup.periodo <= hasta
+    ).order_by(VisitaRollup.periodo).all()
+
+    return [
+        {'periodo': periodo.isoformat(), 'visitas': int(visitas or 0)}
+        for periodo, visitas in rows
+    ]
+
+
+def default_range(granularidad, puntos):
+    """Rango por defecto: los últimos `puntos` buckets hasta ahora"""
+    step = {'minute': timedelta(minutes=1), 'hour': timedelta(hours=1), 'day': timedelta(days=1)}[granularidad]
+    hasta = datetime.now()
+    return bucket_start(hasta - step * (puntos - 1), granularidad), hasta
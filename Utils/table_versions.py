@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import event, inspect
+from DataBase.models.database import db
+
+# Columnas cuyo cambio no invalida lo que se sirve de una tabla (contadores de lectura)
+COLUMNAS_VOLATILES = frozenset(('visitas', 'fecha_actualizacion'))
+
+
+class TableVersions:
+    """
+    Versión por tabla compartida entre procesos.
+    Cada tabla tiene un archivo pequeño en TABLE_VERSIONS_PATH cuyo contenido
+    cambia (reemplazo atómico) cada vez que se confirma una transacción que
+    la modificó; leerlo es barato y todos los workers ven el mismo valor, así
+    que sirve para invalidar cachés sin consultar la base de datos.
+    """
+
+    TABLAS_KEY = 'tablas_modificadas'
+
+    def __init__(self):
+        self.app = None
+        self.path = None
+        self._lock = threading.Lock()
+        self._secuencia = 0
+
+    def init_app(self, app):
+        """Crear el directorio y registrar eventos de la sesión"""
+        self.app = app
+        self.path = app.config.get('TABLE_VERSIONS_PATH') or os.path.join(
+            app.config.get('DATA_FOLDER', 'data'), 'versiones'
+        )
+        os.makedirs(self.path, exist_ok=True)
+
+        for nombre, handler in (('after_flush', self._after_flush),
+                                ('do_orm_execute', self._do_orm_execute),
+                                ('after_commit', self._after_commit),
+                                ('after_rollback', self._after_rollback)):
+            if not event.contains(db.session, nombre, handler):
+                event.listen(db.session, nombre, handler)
+
+    # ==================== EVENTOS ====================
+
+    def _marcar(self, session, tablas):
+        session.info.setdefault(self.TABLAS_KEY, set()).update(tablas)
+
+    @staticmethod
+    def _tablas(obj):
+        return [tabla.name for tabla in inspect(obj).mapper.tables]
+
+    def _after_flush(self, session, flush_context):
+        # En after_flush new/dirty/deleted e historial aún reflejan lo escrito
+        tablas = set()
+        for obj in list(session.new) + list(session.deleted):
+            tablas.update(self._tablas(obj))
+        for obj in session.dirty:
+            estado = inspect(obj)
+            cambiadas = {attr.key for attr in estado.attrs if attr.history.has_changes()}
+            if cambiadas - COLUMNAS_VOLATILES:
+                tablas.update(self._tablas(obj))
+        if tablas:
+            self._marcar(session, tablas)
+
+    def _do_orm_execute(self, orm_execute_state):
+        # INSERT/UPDATE/DELETE masivos (query.update(), session.execute(tabla.delete()), ...)
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            tabla = getattr(orm_execute_state.statement, 'table', None)
+            nombre = getattr(tabla, 'name', None)
+            if nombre:
+                self._marcar(orm_execute_state.session, {nombre})
+
+    def _after_commit(self, session):
+        tablas = session.info.pop(self.TABLAS_KEY, None)
+        if tablas:
+            self.bump(*tablas)
+
+    def _after_rollback(self, session):
+        session.info.pop(self.TABLAS_KEY, None)
+
+    # ==================== VERSIONES ====================
+
+    def _archivo(self, tabla):
+        return os.path.join(self.path, tabla)
+
+    def bump(self, *tablas):
+        """Asignar una versión nueva a las tablas indicadas"""
+        if self.path is None:
+            return
+        with self._lock:
+            self._secuencia += 1
+            version = f'{time.time_ns()}-{os.getpid()}-{self._secuencia}'
+        for tabla in tablas:
+            temporal = f'{self._archivo(tabla)}.{os.getpid()}.{threading.get_ident()}.tmp'
+            try:
+                with open(temporal, 'w') as f:
+                    f.write(version)
+                os.replace(temporal, self._archivo(tabla))
+            except OSError as e:
+                print(f"⚠️ No se pudo actualizar la versión de {tabla}: {e}")
+
+    def version(self, tabla):
+        """Versión actual de una tabla; la primera lectura le asigna una"""
+        if self.path is None:
+            return '0'
+        for _ in range(2):
+            try:
+                with open(self._archivo(tabla)) as f:
+                    version = f.read()
+                if version:
+                    return version
+            except FileNotFoundError:
+                pass
+            # Sin archivo (directorio nuevo o borrado) no se puede asumir "sin cambios"
+            self.bump(tabla)
+        return '0'
+
+    def versions(self, tablas):
+        """Tupla con la versión de cada tabla, en el orden dado"""
+        return tuple(self.version(tabla) for tabla in tablas)
+
+    def last_modified(self, tablas):
+        """Fecha UTC del último cambio entre las tablas dadas (None si no hay datos)"""
+        ultimo = None
+        for tabla in tablas:
+            try:
+                momento = os.path.getmtime(self._archivo(tabla))
+            except (OSError, TypeError):
+                continue
+            ultimo = momento if ultimo is None else max(ultimo, momento)
+        return datetime.fromtimestamp(int(ultimo), timezone.utc) if ultimo is not None else None
+
+    def ultima_escritura(self, tablas):
+        """
+        time.time() de la última escritura confirmada en alguna de `tablas`
+        (por cualquier worker): cada bump reemplaza el archivo de la tabla y
+        eso actualiza su mtime. None si ninguna tiene archivo todavía.
+        """
+        ultimo = None
+        for tabla in tablas:
+            try:
+                momento = os.path.getmtime(self._archivo(tabla))
+            except (OSError, TypeError):
+                continue
+            ultimo = momento if ultimo is None else max(ultimo, momento)
+        return ultimo
+
+
+# Instancia global de versiones por tabla
+table_versions = TableVersions()
@@ -0,0 +1,102 @@
+import os
+import threading
+from collections import Counter
+from sqlalchemy import bindparam, func, update
+from DataBase.models.database import db
+from DataBase.models.noticia import Noticia
+from .background import PeriodicTask
+
+
+class ViewCounter:
+    """
+    Contador de lecturas con escritura diferida (write-behind).
+    Cada worker acumula en memoria los incrementos por id y una tarea
+    periódica los vuelca con un solo UPDATE ... SET visitas = visitas + n
+    por registro (un executemany en una transacción), así una lectura no abre
+    una transacción ni bloquea la fila. El volcado final corre al detener el
+    proceso (atexit). Con VIEW_COUNTER_BUFFERED=False cada lectura se escribe
+    al momento, con el mismo UPDATE atómico.
+    """
+
+    def __init__(self, modelo, columna='visitas'):
+        self.modelo = modelo
+        self.columna = columna
+        self.app = None
+        self.buffered = True
+        self.flusher = None
+        self._lock = threading.Lock()
+        self._pendientes = Counter()  # id -> incremento sin volcar
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._descartar)
+
+    def _descartar(self):
+        # El proceso hijo no debe volver a volcar los incrementos del padre
+        self._lock = threading.Lock()
+        self._pendientes = Counter()
+
+    def init_app(self, app):
+        """Configurar el modo y la tarea de volcado"""
+        self.app = app
+        self.buffered = app.config.get('VIEW_COUNTER_BUFFERED', True)
+        interval = app.config.get('VIEW_COUNTER_FLUSH_INTERVAL', 5)
+        if self.flusher is None:
+            self.flusher = PeriodicTask(f'view-counter-{self.modelo.__tablename__}', interval, self._flush_job)
+        else:
+            self.flusher.interval = interval
+
+    # ==================== REGISTRO ====================
+
+    def incrementar(self, registro_id, n=1):
+        """Sumar `n` lecturas a un registro (se escriben en el siguiente volcado)"""
+        with self._lock:
+            self._pendientes[registro_id] += n
+        if not self.buffered:
+            self.flush()
+        elif self.flusher is not None:
+            self.flusher.ensure_started()
+
+    def pendientes(self, registro_id):
+        """Lecturas de este worker aún sin volcar"""
+        return self._pendientes.get(registro_id, 0)
+
+    def valor(self, registro_id, persistido):
+        """Valor aproximado en vivo: lo leído de la base de datos más lo pendiente en este worker"""
+        return (persistido or 0) + self.pendientes(registro_id)
+
+    # ==================== VOLCADO ====================
+
+    def flush(self):
+        """Escribir los incrementos acumulados (requiere app context). Regresa los registros actualizados"""
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, Counter()
+        if not pendientes:
+            return 0
+
+        tabla = self.modelo.__table__
+        columna = tabla.c[self.columna]
+        sentencia = (
+            update(tabla)
+            .where(tabla.c.id == bindparam('registro_id'))
+            .values({self.columna: func.coalesce(columna, 0) + bindparam('incremento')})
+        )
+        # Orden fijo de ids: los workers bloquean las filas siempre en el mismo orden
+        filas = [{'registro_id': registro_id, 'incremento': n} for registro_id, n in sorted(pendientes.items())]
+        try:
+            # Por el engine (primario) y no por la sesión: no cambia la versión de la tabla
+            with db.engine.begin() as conexion:
+                conexion.execute(sentencia, filas)
+        except Exception:
+            with self._lock:
+                self._pendientes.update(pendientes)
+            raise
+        return len(filas)
+
+    def _flush_job(self):
+        if self.app is None:
+            return
+        with self.app.app_context():
+            self.flush()
+
+
+# Instancia global del contador de visitas de noticias
+view_counter = ViewCounter(Noticia)
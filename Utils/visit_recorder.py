@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import deque
+
+
+class VisitRecorder:
+    """
+    Buffer de visitas sin mutex en la ruta de la petición.
+    Cada hilo escribe tuplas compactas en su propio deque acotado (append y
+    popleft son atómicos en CPython); un hilo de fondo los vacía y entrega
+    el lote agregado al backend de estadísticas.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.dropped = 0
+        self._local = threading.local()
+        self._buffers = []
+        self._registry_lock = threading.Lock()  # solo al registrar/podar buffers
+        self._dropped_lock = threading.Lock()  # solo cuando un buffer está lleno
+
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = deque(maxlen=self.capacity)
+            with self._registry_lock:
+                self._buffers.append((threading.current_thread(), buffer))
+            self._local.buffer = buffer
+        return buffer
+
+    def record(self, session_id, ip_address, user_agent, page):
+        """Encolar una visita como tupla (when, session_id, ip, user_agent, page)"""
+        buffer = self._buffer()
+        if len(buffer) >= self.capacity:
+            # El ring buffer descarta la visita más antigua; se contabiliza
+            with self._dropped_lock:
+                self.dropped += 1
+        buffer.append((time.time(), session_id, ip_address, user_agent, page))
+
+    def drain(self):
+        """Vaciar todos los buffers y regresar la lista de eventos"""
+        events = []
+        with self._registry_lock:
+            registered = list(self._buffers)
+        for thread, buffer in registered:
+            popleft = buffer.popleft
+            while True:
+                try:
+                    events.append(popleft())
+                except IndexError:
+                    break
+        self._prune(registered)
+        return events
+
+    def _prune(self, registered):
+        """Olvidar buffers vacíos de hilos que ya terminaron"""
+        dead = {id(b) for t, b in registered if not t.is_alive() and not b}
+        if dead:
+            with self._registry_lock:
+                self._buffers = [entry for entry in self._buffers if id(entry[1]) not in dead]
+
+    def pending(self):
+        """Número aproximado de visitas aún sin volcar"""
+        with self._registry_lock:
+            return sum(len(buffer) for _, buffer in self._buffers)
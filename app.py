@@ -1,10 +1,11 @@
 from datetime import datetime
-from flask import Flask, jsonify, request, send_file, send_from_directory, render_template
+from flask import Flask, jsonify, request, send_file, render_template
 from flask_jwt_extended import JWTManager
 from flask_mail import Mail
 from flask_cors import CORS
 from Config.config import config
 from DataBase.models.database import init_db, db
+from DataBase.models.estadistica import VisitaRollup
 from Routes.auth import auth_bp
 from Routes.productos import productos_bp
 from Routes.servicios import servicios_bp
@@ -12,9 +13,26 @@ from Routes.dashboard import dashboard_bp
 from Routes.contactos import contactos_bp
 from Routes.public import public_bp
 from Utils.email_sender import email_sender
+from Utils.email_templates import email_templates
 from Utils.singleton import stats_manager
+from Utils.stats_rollups import query_rollups, default_range, hora_local
+from Utils.dashboard_counters import dashboard_counters
+from Utils.search_index import search_index
+from Utils.autocomplete import autocomplete
+from Utils.pagination import count_cache
+from Utils.table_versions import table_versions
+from Utils.conditional import conditional_get
+from Utils.response_cache import response_cache
+from Utils.assets import asset_pipeline
+from Utils.page_cache import page_cache
+from Utils.serializers import serializers
+from Utils.query_budget import query_budget
+from Utils.db_pool import pool_monitor
+from Utils.db_replica import replica_router
+from Utils.view_counter import view_counter
 from Utils.pdf_generator import PDFGenerator
 import os
+import zlib
 
 jwt = JWTManager()
 mail = Mail()
@@ -26,6 +44,8 @@ def create_app(config_class=config):
                 template_folder='templates')  # Carpeta para templates
     app.config.from_object(config_class)
 
+    replica_router.init_app(app)
+    pool_monitor.init_app(app)
     init_db(app)
     jwt.init_app(app)
     mail.init_app(app)
@@ -33,6 +53,19 @@ def create_app(config_class=config):
         r"/api/*": {"origins": config.CORS_ORIGINS}
     })
     email_sender.init_app(app)
+    stats_manager.init_app(app)
+    dashboard_counters.init_app(app)
+    search_index.init_app(app)
+    autocomplete.init_app(app)
+    count_cache.init_app(app)
+    table_versions.init_app(app)
+    conditional_get.init_app(app)
+    response_cache.init_app(app)
+    asset_pipeline.init_app(app)
+    page_cache.init_app(app)
+    serializers.init_app(app)
+    query_budget.init_app(app)
+    view_counter.init_app(app)
 
     # Registrar blueprints de API
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -48,7 +81,8 @@ def create_app(config_class=config):
         if request.endpoint and 'static' not in request.endpoint and request.path.startswith('/api/'):
             session_id = request.headers.get('X-Session-ID')
             if not session_id:
-                session_id = f"{request.remote_addr}-{hash(request.user_agent.string)}"
+                # hash() cambia entre procesos; crc32 da el mismo id en todos los workers
+                session_id = f"{request.remote_addr}-{zlib.crc32(request.user_agent.string.encode('utf-8'))}"
             stats_manager.register_visit(
                 session_id=session_id,
                 ip_address=request.remote_addr,
@@ -58,81 +92,63 @@ def create_app(config_class=config):
 
     # ==================== RUTAS DEL FRONTEND ====================
 
+    # Las páginas se resuelven y pre-renderizan al arrancar (Utils/page_cache.py); si
+    # la plantilla no existe se sirve la de respaldo
+
     @app.route('/')
+    @page_cache.page('index.html')
     def index():
         """Servir página principal"""
-        return render_template('index.html')
 
     @app.route('/admin')
+    @page_cache.page('admin.html')
     def admin():
         """Página de administración"""
-        return render_template('admin.html')
 
     @app.route('/contacto')
+    @page_cache.page('contacto.html')
     def contacto():
         """Página de contacto"""
-        return render_template('contacto.html')
 
     @app.route('/noticias')
+    @page_cache.page('noticias.html')
     def noticias():
         """Página de noticias"""
-        return render_template('noticias.html')
 
     @app.route('/productos')
+    @page_cache.page('productos.html')
     def productos():
         """Página de productos"""
-        return render_template('productos.html')
 
     @app.route('/servicios')
+    @page_cache.page('servicios.html')
     def servicios():
         """Página de servicios"""
-        return render_template('servicios.html')
 
     @app.route('/quienes_somos')
+    @page_cache.page('quienes_somos.html', 'index.html')
     def quienes_somos():
         """Página quiénes somos"""
-        # Si no existe el template, servir uno básico
-        try:
-            return render_template('quienes_somos.html')
-        except:
-            return render_template('index.html')
 
     @app.route('/clientes')
+    @page_cache.page('clientes.html', 'index.html')
     def clientes():
         """Página de clientes"""
-        try:
-            return render_template('clientes.html')
-        except:
-            return render_template('index.html')
 
     @app.route('/casos_exito')
+    @page_cache.page('casos_exito.html', 'index.html')
     def casos_exito():
         """Página de casos de éxito"""
-        try:
-            return render_template('casos_exito.html')
-        except:
-            return render_template('index.html')
 
     @app.route('/socios')
+    @page_cache.page('socios.html', 'index.html')
     def socios():
         """Página de socios"""
-        try:
-            return render_template('socios.html')
-        except:
-            return render_template('index.html')
 
     @app.route('/soporte')
+    @page_cache.page('soporte.html', 'index.html')
     def soporte():
         """Página de soporte"""
-        try:
-            return render_template('soporte.html')
-        except:
-            return render_template('index.html')
-
-    # Ruta para servir archivos estáticos
-    @app.route('/static/<path:filename>')
-    def serve_static(filename):
-        return send_from_directory(app.static_folder, filename)
 
     # ==================== RUTAS DE LA API ====================
 
@@ -175,6 +191,64 @@ def create_app(config_class=config):
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
 
+    def _rango_rollups():
+        """Leer granularidad/desde/hasta de la query; regresa (granularidad, desde, hasta)"""
+        granularidad = request.args.get('granularidad', 'day')
+        if granularidad not in VisitaRollup.GRANULARIDADES:
+            raise ValueError(f'Granularidad inválida. Debe ser: {", ".join(VisitaRollup.GRANULARIDADES)}')
+
+        max_puntos = app.config.get('STATS_ROLLUP_MAX_POINTS', 1500)
+        puntos = max(1, min(request.args.get('puntos', 30, type=int), max_puntos))
+        desde, hasta = default_range(granularidad, puntos)
+        # Con zona (p. ej. +00:00) se pasan a hora local, como los periodos guardados
+        if request.args.get('desde'):
+            desde = hora_local(datetime.fromisoformat(request.args['desde']))
+        if request.args.get('hasta'):
+            hasta = hora_local(datetime.fromisoformat(request.args['hasta']))
+        if desde > hasta:
+            raise ValueError('El parámetro desde debe ser anterior a hasta')
+        return granularidad, desde, hasta
+
+    @app.route('/api/stats/visitas')
+    def get_visitas_historicas():
+        """Serie histórica de visitas por minuto, hora o día (agregados precalculados)"""
+        try:
+            granularidad, desde, hasta = _rango_rollups()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        try:
+            serie = query_rollups(granularidad, desde, hasta)
+            return jsonify({
+                'success': True,
+                'granularidad': granularidad,
+                'desde': desde.isoformat(),
+                'hasta': hasta.isoformat(),
+                'visitas': serie[-app.config.get('STATS_ROLLUP_MAX_POINTS', 1500):]
+            })
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/api/stats/visitas/total')
+    def get_total_visitas_rango():
+        """Total de visitas en un rango de fechas (agregados precalculados)"""
+        try:
+            granularidad, desde, hasta = _rango_rollups()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        try:
+            total = sum(punto['visitas'] for punto in query_rollups(granularidad, desde, hasta))
+            return jsonify({
+                'success': True,
+                'granularidad': granularidad,
+                'desde': desde.isoformat(),
+                'hasta': hasta.isoformat(),
+                'total_visitas': total
+            })
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
     @app.route('/api/stats/cleanup', methods=['POST'])
     def cleanup_sessions():
         """Limpiar sesiones expiradas"""
@@ -282,6 +356,9 @@ def create_app(config_class=config):
             return jsonify({'error': 'Error interno del servidor'}), 500
         return render_template('500.html'), 500
 
+    page_cache.warm()
+    email_templates.precompilar()
+
     return app
 
 
@@ -0,0 +1,110 @@
+"""
+Costo del autocompletado con un catálogo de 100k productos.
+
+Genera los productos en una base SQLite temporal y mide cuánto tarda la
+construcción de Utils.autocomplete (la que init_app lanza en segundo plano),
+la memoria que ocupa (total y bytes por clave, para dimensionar
+AUTOCOMPLETE_MAX_ENTRIES) y la latencia de sugerir() contra la consulta
+LIKE equivalente en la base de datos.
+
+    python bench_autocomplete.py --productos 100000
+    python bench_autocomplete.py --consultas 20000 --max-entries 1000000
+"""
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+PALABRAS = ['cable', 'utp', 'fibra', 'óptica', 'switch', 'router', 'ups', 'rack', 'patch', 'panel', 'conector',
+            'módulo', 'sfp', 'antena', 'poe', 'gabinete', 'monomodo', 'multimodo', 'cat6', 'cat5e', 'de', 'para']
+CONSULTAS = ['c', 'ca', 'cab', 'cable ut', 'fib', 'sku-0012', 'opt', 'switch rack', 'x', 'panel 9']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Costo del autocompletado en memoria')
+    parser.add_argument('--productos', type=int, default=100000, help='Productos en el catálogo')
+    parser.add_argument('--consultas', type=int, default=20000, help='Llamadas a sugerir() por medición')
+    parser.add_argument('--max-entries', type=int, default=None, help='AUTOCOMPLETE_MAX_ENTRIES (por defecto el de Config)')
+    return parser.parse_args()
+
+
+def percentiles(latencias):
+    """(p50, p99) en µs"""
+    latencias = sorted(latencias)
+    return latencias[len(latencias) // 2] * 1e6, latencias[int(len(latencias) * 0.99)] * 1e6
+
+
+def medir(funcion, iteraciones):
+    latencias = []
+    reloj = time.perf_counter
+    for i in range(iteraciones):
+        inicio = reloj()
+        funcion(CONSULTAS[i % len(CONSULTAS)])
+        latencias.append(reloj() - inicio)
+    return percentiles(latencias)
+
+
+def main():
+    args = parse_args()
+    directorio = tempfile.mkdtemp()
+
+    from Config.config import Config
+    from app import create_app
+    from DataBase.models.database import db
+    from DataBase.models.producto import Producto, CategoriaProducto
+    from Utils.autocomplete import autocomplete
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{directorio}/bench.db'
+        STATS_SQLITE_PATH = f'{directorio}/stats.sqlite3'
+        ASSETS_BUILD_ON_STARTUP = False
+        if args.max_entries:
+            AUTOCOMPLETE_MAX_ENTRIES = args.max_entries
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        random.seed(1)
+        categoria = CategoriaProducto(nombre='Redes')
+        db.session.add(categoria)
+        db.session.flush()
+        ahora = datetime.utcnow()
+        filas = [{'nombre': ' '.join(random.choices(PALABRAS, k=4)) + f' {i}', 'sku': f'SKU-{i:06d}',
+                  'categoria_id': categoria.id, 'estatus': 'disponible', 'stock': 1, 'destacado': False,
+                  'fecha_creacion': ahora, 'fecha_actualizacion': ahora, 'activo': True}
+                 for i in range(args.productos)]
+        db.session.execute(Producto.__table__.insert(), filas)
+        db.session.commit()
+
+        inicio = time.perf_counter()
+        autocomplete.rebuild()
+        construccion = time.perf_counter() - inicio
+        # Otra construcción con tracemalloc (que la hace más lenta) solo para la memoria
+        tracemalloc.start()
+        autocomplete.rebuild()
+        memoria = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        estado = autocomplete.estado()
+
+        print(f"🔤 {args.productos} productos, {estado['claves']} claves "
+              f"(máximo {estado['max_claves']}, {estado['descartadas']} productos descartados)")
+        print(f"   construcción: {construccion:.2f} s, {memoria / 1e6:.1f} MB "
+              f"({memoria / max(estado['claves'], 1):.0f} bytes por clave)")
+
+        def con_like(texto):
+            patron = f'%{texto}%'
+            return db.session.query(Producto.id, Producto.nombre).filter(
+                Producto.activo == True,
+                db.or_(Producto.nombre.ilike(patron), Producto.sku.ilike(patron))
+            ).limit(8).all()
+
+        print(f"   {'modo':20} {'p50 µs':>9} {'p99 µs':>9}")
+        p50, p99 = medir(lambda texto: autocomplete.sugerir(texto, 8), args.consultas)
+        print(f"   {'en memoria':20} {p50:9.1f} {p99:9.1f}")
+        p50, p99 = medir(con_like, max(args.consultas // 20, 50))
+        print(f"   {'LIKE en la base':20} {p50:9.1f} {p99:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Costo de generar cada email de notificación.
+
+Renderiza las plantillas de templates/email con datos de ejemplo y muestra
+el tiempo por mensaje (HTML y alternativa de texto) con la caché de
+Utils.email_templates, sin el layout en caché (plantilla completa y
+conversión a texto del HTML entero en cada mensaje) y compilando la
+plantilla en cada envío.
+
+    python bench_email_templates.py --iterations 2000
+"""
+import argparse
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Costo de render de las plantillas de email')
+    parser.add_argument('--iterations', type=int, default=2000, help='Mensajes por plantilla')
+    return parser.parse_args()
+
+
+def ejemplos():
+    mensaje = 'Hola, necesitamos cotizar cableado estructurado\npara 40 nodos <Cat 6A> & un rack.\nGracias.'
+    servicio = SimpleNamespace(id=3, nombre='Instalación de fibra óptica')
+    solicitud = SimpleNamespace(id=120, nombre_cliente='Ana López', email='ana@cliente.mx', telefono='5555555555',
+                                empresa='ACME', mensaje=mensaje, estado='pendiente', fecha_creacion=datetime.now())
+    sugerencia = SimpleNamespace(nombre='Ana López', email='ana@cliente.mx', asunto='Horario',
+                                 mensaje=mensaje, fecha_creacion=datetime.now())
+    contacto = {'nombre': 'Ana López', 'email': 'ana@cliente.mx', 'telefono': None,
+                'asunto': 'Cotización', 'mensaje': mensaje}
+    return {
+        'contacto': {'contacto': contacto, 'fecha': datetime.now()},
+        'solicitud_servicio': {'solicitud': solicitud, 'servicio': servicio},
+        'sugerencia': {'sugerencia': sugerencia},
+        'prueba': {'fecha': datetime.now()},
+    }
+
+
+def medir(funcion, iteraciones):
+    """Microsegundos por llamada"""
+    inicio = time.perf_counter()
+    for _ in range(iteraciones):
+        funcion()
+    return (time.perf_counter() - inicio) / iteraciones * 1e6
+
+
+def main():
+    args = parse_args()
+    directorio = tempfile.mkdtemp()
+
+    from Config.config import Config
+    from app import create_app
+    from Utils.email_templates import email_templates, html_a_texto
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{directorio}/bench.db'
+        STATS_SQLITE_PATH = f'{directorio}/stats.sqlite3'
+        ASSETS_BUILD_ON_STARTUP = False
+        JINJA_BYTECODE_CACHE_DIR = ''
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        entorno = app.jinja_env
+        # Mismo entorno sin ninguna caché: compila la plantilla (y su layout) en cada llamada
+        sin_cache = entorno.overlay(cache_size=0, bytecode_cache=None)
+
+        def completo(plantilla, contexto):
+            """Sin el layout en caché: toda la plantilla y el HTML completo a texto en cada mensaje"""
+            html = plantilla.render(**contexto)
+            return html, html_a_texto(html)
+
+        print(f"✉️  {args.iterations} mensajes por plantilla (µs por mensaje, HTML + texto)")
+        print(f"   {'plantilla':20} {'en caché':>9} {'sin layout':>11} {'compilando':>11} {'bytes':>7}")
+        for nombre, contexto in ejemplos().items():
+            ruta = f'email/{nombre}.html'
+            html = email_templates.render(nombre, **contexto)[0]
+            t_cache = medir(lambda: email_templates.render(nombre, **contexto), args.iterations)
+            t_completo = medir(lambda: completo(entorno.get_template(ruta), contexto), args.iterations)
+            t_compilar = medir(lambda: completo(sin_cache.get_template(ruta), contexto), max(1, args.iterations // 20))
+            print(f"   {nombre:20} {t_cache:9.1f} {t_completo:11.1f} {t_compilar:11.1f} {len(html):7d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Costo de serializar los listados: diccionarios armados a mano contra los
+serializadores compilados de Utils.serializers.
+
+Carga productos, noticias, servicios y categorías en una base SQLite
+temporal y mide, por listado, los milisegundos para convertir todas las
+filas a dict con el código anterior de las rutas (getattr con default por
+campo, un dict por fila) y con la función compilada que usan ahora. Antes
+de medir comprueba que ambos producen exactamente lo mismo.
+
+    python bench_serializers.py --rows 500
+    python bench_serializers.py --rows 5000 --repeat 10
+"""
+import argparse
+import tempfile
+import timeit
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Costo de los serializadores de listados')
+    parser.add_argument('--rows', type=int, default=500, help='Filas por modelo')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones (se toma la mejor)')
+    return parser.parse_args()
+
+
+# ==================== CÓDIGO ANTERIOR DE LAS RUTAS ====================
+
+def producto_admin_manual(p):
+    categoria_nombre = None
+    if hasattr(p, "categoria") and p.categoria is not None:
+        categoria_nombre = getattr(p.categoria, "nombre", None)
+    return {
+        "id": p.id,
+        "nombre": getattr(p, "nombre", ""),
+        "descripcion": getattr(p, "descripcion", ""),
+        "descripcion_corta": getattr(p, "descripcion_corta", None),
+        "precio": float(getattr(p, "precio", 0) or 0),
+        "estatus": getattr(p, "estatus", "disponible"),
+        "imagen_url": getattr(p, "imagen_url", None),
+        "categoria_id": getattr(p, "categoria_id", None),
+        "categoria": categoria_nombre,
+        "activo": getattr(p, "activo", True),
+        "stock": getattr(p, "stock", 0),
+        "sku": getattr(p, "sku", None),
+        "destacado": getattr(p, "destacado", False)
+    }
+
+
+def noticia_manual(n):
+    return {
+        "id": getattr(n, "id", None),
+        "titulo": getattr(n, "titulo", "") or "",
+        "resumen": getattr(n, "resumen", "") or "",
+        "contenido": getattr(n, "contenido", "") or "",
+        "fecha_publicacion": getattr(n, "fecha_publicacion", None),
+        "visitas": getattr(n, "visitas", 0),
+        "autor": getattr(n, "autor", "") or "",
+        "imagen_url": getattr(n, "imagen_url", "")
+    }
+
+
+def servicio_manual(serv):
+    return {
+        'id': serv.id,
+        'nombre': serv.nombre,
+        'descripcion': serv.descripcion,
+        'area': serv.area,
+        'imagen': serv.imagen,
+        'caracteristicas': serv.caracteristicas,
+        'orden': serv.orden,
+        'activo': serv.activo
+    }
+
+
+def categoria_manual(cat):
+    return {
+        "id": cat.id,
+        "nombre": getattr(cat, "nombre", ""),
+        "descripcion": getattr(cat, "descripcion", ""),
+        "activo": getattr(cat, "activo", True)
+    }
+
+
+def to_dict_manual(objeto):
+    return {columna.name: getattr(objeto, columna.name) for columna in objeto.__table__.columns}
+
+
+def main():
+    args = parse_args()
+    directorio = tempfile.mkdtemp()
+
+    from Config.config import Config
+    from app import create_app
+    from DataBase.models.database import db
+    from DataBase.models.producto import Producto, CategoriaProducto
+    from DataBase.models.noticia import Noticia
+    from DataBase.models.servicio import Servicio
+    from Routes.productos import producto_admin, categoria_dict
+    from Routes.public import perfiles_noticia
+    from Routes.servicios import servicio_listado
+    from Utils.serializers import serializers
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{directorio}/bench.db'
+        STATS_SQLITE_PATH = f'{directorio}/stats.sqlite3'
+        ASSETS_BUILD_ON_STARTUP = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        categorias = [CategoriaProducto(nombre=f'Categoría {i}', descripcion='Equipo de red') for i in range(args.rows)]
+        db.session.add_all(categorias)
+        db.session.flush()
+        db.session.add_all([
+            Producto(nombre=f'Switch PoE {i} puertos', descripcion_corta='Switch administrable',
+                     sku=f'SW-{i:05d}', precio=1000 + i, categoria_id=categorias[i % len(categorias)].id, stock=i % 7)
+            for i in range(args.rows)
+        ])
+        db.session.add_all([
+            Noticia(titulo=f'Noticia {i}', contenido='Texto de la noticia ' * 20, resumen='Resumen', autor='Parnet')
+            for i in range(args.rows)
+        ])
+        db.session.add_all([
+            Servicio(nombre=f'Servicio {i}', descripcion='Instalación', area='telecomunicaciones',
+                     caracteristicas=['Diseño', 'Instalación'], orden=i)
+            for i in range(args.rows)
+        ])
+        db.session.commit()
+
+        productos = Producto.query.all()
+        for producto in productos:
+            producto.categoria  # relación cargada, como con joinedload en la ruta
+        noticias = Noticia.query.all()
+        servicios = Servicio.query.all()
+        categorias = CategoriaProducto.query.all()
+
+        casos = [
+            ('producto (admin)', producto_admin_manual, producto_admin, productos),
+            ('noticia (detail)', noticia_manual, perfiles_noticia['detail'], noticias),
+            ('servicio', servicio_manual, servicio_listado, servicios),
+            ('categoría', categoria_manual, categoria_dict, categorias),
+            ('to_dict (producto)', to_dict_manual, serializers.columnas(Producto), productos),
+        ]
+
+        print(f"🧾 {args.rows} filas por listado (ms por listado completo, mejor de {args.repeat})")
+        print(f"   {'listado':20} {'a mano':>9} {'compilado':>10} {'mejora':>7}")
+        for nombre, manual, compilado, filas in casos:
+            if [manual(f) for f in filas] != [compilado(f) for f in filas]:
+                raise SystemExit(f'❌ {nombre}: el serializador compilado no produce lo mismo')
+            veces = max(1, 20000 // len(filas))
+            t_manual = min(timeit.repeat(lambda: [manual(f) for f in filas], number=veces, repeat=args.repeat))
+            t_compilado = min(timeit.repeat(lambda: [compilado(f) for f in filas], number=veces, repeat=args.repeat))
+            t_manual, t_compilado = t_manual / veces * 1000, t_compilado / veces * 1000
+            print(f"   {nombre:20} {t_manual:9.3f} {t_compilado:10.3f} {t_manual / t_compilado:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Prueba de rendimiento del envío de emails contra un SMTP local.
+
+Levanta un servidor SMTP de prueba en 127.0.0.1 que simula el costo de
+abrir una sesión (TCP + TLS con --connect-ms, AUTH con --auth-ms) y de
+cada mensaje (--message-ms), y envía los mismos mensajes por la cola de
+emails dos veces: con una conexión nueva por mensaje (mail.send, como
+antes del pool) y con las conexiones persistentes de Utils.smtp_pool.
+Muestra mensajes por segundo y conexiones abiertas en cada modo.
+
+    python bench_smtp.py --messages 200
+    python bench_smtp.py --connect-ms 80 --auth-ms 40 --drop-every 25
+"""
+import argparse
+import os
+import socketserver
+import tempfile
+import threading
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Rendimiento del envío de emails contra un SMTP local')
+    parser.add_argument('--messages', type=int, default=200, help='Mensajes por modo')
+    parser.add_argument('--workers', type=int, help='EMAIL_WORKERS')
+    parser.add_argument('--pool-size', type=int, help='MAIL_POOL_SIZE')
+    parser.add_argument('--batch-size', type=int, help='EMAIL_BATCH_SIZE')
+    parser.add_argument('--connect-ms', type=float, default=30, help='Costo de abrir la conexión (TCP + TLS)')
+    parser.add_argument('--auth-ms', type=float, default=20, help='Costo del AUTH')
+    parser.add_argument('--message-ms', type=float, default=2, help='Costo de aceptar cada mensaje')
+    parser.add_argument('--drop-every', type=int, default=0,
+                        help='El servidor corta la conexión cada N mensajes (simula conexiones caídas)')
+    return parser.parse_args()
+
+
+class ServidorSMTP(socketserver.ThreadingTCPServer):
+    """SMTP mínimo que acepta todo y cuenta conexiones y mensajes"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, args):
+        super().__init__(('127.0.0.1', 0), ManejadorSMTP)
+        self.args = args
+        self.lock = threading.Lock()
+        self.conexiones = 0
+        self.mensajes = 0
+
+    def contar(self, campo):
+        with self.lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+
+class ManejadorSMTP(socketserver.StreamRequestHandler):
+
+    def responder(self, texto):
+        self.wfile.write(texto.encode('utf-8') + b'\r\n')
+
+    def handle(self):
+        args = self.server.args
+        time.sleep(args.connect_ms / 1000)
+        self.server.contar('conexiones')
+        self.responder('220 localhost ESMTP prueba')
+        mensajes = 0
+        while True:
+            linea = self.rfile.readline()
+            if not linea:
+                return
+            verbo = linea[:4].decode('ascii', 'replace').upper()
+            if verbo == 'EHLO':
+                self.responder('250-localhost')
+                self.responder('250-AUTH PLAIN LOGIN')
+                self.responder('250 8BITMIME')
+            elif verbo == 'AUTH':
+                time.sleep(args.auth_ms / 1000)
+                self.responder('235 Autenticado')
+            elif verbo in ('HELO', 'MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.responder('250 OK')
+            elif verbo == 'DATA':
+                self.responder('354 Fin con <CRLF>.<CRLF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                time.sleep(args.message_ms / 1000)
+                mensajes += 1
+                self.server.contar('mensajes')
+                self.responder('250 Aceptado')
+                if args.drop_every and mensajes % args.drop_every == 0:
+                    return  # cierre sin QUIT, como un servidor que corta la sesión
+            elif verbo == 'QUIT':
+                self.responder('221 Adiós')
+                return
+            else:
+                self.responder('502 No implementado')
+
+
+def main():
+    args = parse_args()
+    servidor = ServidorSMTP(args)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    for variable, valor in (('EMAIL_WORKERS', args.workers), ('MAIL_POOL_SIZE', args.pool_size),
+                            ('EMAIL_BATCH_SIZE', args.batch_size)):
+        if valor is not None:
+            os.environ[variable] = str(valor)
+    directorio = tempfile.mkdtemp()
+
+    # Importar después de fijar las variables de entorno que lee Config
+    from flask_mail import Message
+    from Config.config import Config
+    from app import create_app
+    from Utils.email_dispatcher import email_dispatcher
+    from Utils.smtp_pool import smtp_pool
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{directorio}/bench.db'
+        STATS_SQLITE_PATH = f'{directorio}/stats.sqlite3'
+        ASSETS_BUILD_ON_STARTUP = False
+        MAIL_SERVER = '127.0.0.1'
+        MAIL_PORT = servidor.server_address[1]
+        MAIL_USE_TLS = False
+        MAIL_USERNAME = 'bench@parnet.test'
+        MAIL_PASSWORD = 'bench'
+        MAIL_DEFAULT_SENDER = 'bench@parnet.test'
+
+    create_app(BenchConfig)
+
+    def correr(con_pool):
+        smtp_pool.close()
+        smtp_pool.enabled = con_pool
+        conexiones_antes, mensajes_antes = servidor.conexiones, servidor.mensajes
+        enviados_antes = email_dispatcher.enviados + email_dispatcher.fallidos
+        inicio = time.perf_counter()
+        for n in range(args.messages):
+            email_dispatcher.submit(Message(subject=f'Prueba {n}', sender=BenchConfig.MAIL_DEFAULT_SENDER,
+                                            recipients=['destino@parnet.test'], body='Hola'))
+        while email_dispatcher.enviados + email_dispatcher.fallidos - enviados_antes < args.messages:
+            time.sleep(0.005)
+        duracion = time.perf_counter() - inicio
+        return {
+            'por_segundo': args.messages / duracion,
+            'segundos': duracion,
+            'conexiones': servidor.conexiones - conexiones_antes,
+            'recibidos': servidor.mensajes - mensajes_antes
+        }
+
+    print(f"📨 {args.messages} mensajes, {email_dispatcher.workers} workers, lote {email_dispatcher.lote}, "
+          f"pool {smtp_pool.size} conexiones; servidor: conexión {args.connect_ms:g} ms, "
+          f"AUTH {args.auth_ms:g} ms, mensaje {args.message_ms:g} ms")
+    resultados = {'conexión por mensaje': correr(False), 'pool de conexiones': correr(True)}
+    for nombre, r in resultados.items():
+        print(f"   {nombre:22} {r['por_segundo']:8.1f} msg/s  {r['segundos']:6.2f} s  "
+              f"{r['conexiones']:4d} conexiones  {r['recibidos']:4d} recibidos")
+    base = resultados['conexión por mensaje']['por_segundo']
+    print(f"   Mejora: x{resultados['pool de conexiones']['por_segundo'] / base:.1f}")
+    print(f"   Dispatcher: fallidos {email_dispatcher.fallidos}, pool: {smtp_pool.stats()}")
+    email_dispatcher.shutdown()
+    servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
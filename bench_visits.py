@@ -0,0 +1,116 @@
+"""
+Contención al registrar visitas con 8, 16 y 32 hilos.
+
+Compara el registro anterior (un threading.Lock global por visita, un dict
+por sesión y dos datetime.now()) con el de Utils.singleton: cada hilo
+escribe en su propio buffer (Utils.visit_recorder) y el flusher vuelca
+los lotes al backend en memoria. Muestra visitas por segundo, la latencia
+p99 de cada llamada, qué porcentaje de llamadas encontró el lock ocupado
+y cuánto tarda el volcado del lote (fuera de la petición). Los buffers se
+dimensionan para la ronda completa, así ninguna visita se descarta.
+
+    python bench_visits.py --visits 20000
+    python bench_visits.py --threads 8 16 32 64
+"""
+import argparse
+import threading
+import time
+from datetime import datetime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Contención del registro de visitas')
+    parser.add_argument('--threads', type=int, nargs='+', default=[8, 16, 32], help='Hilos concurrentes')
+    parser.add_argument('--visits', type=int, default=20000, help='Visitas por hilo')
+    return parser.parse_args()
+
+
+class RegistroConLock:
+    """El register_visit anterior: todo bajo un lock global del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.contendidas = 0
+        self.visit_count = 0
+        self.active_sessions = {}
+        self.daily_visits = {}
+        self.page_views = {}
+
+    def register_visit(self, session_id, ip_address, user_agent, page=None):
+        if not self._lock.acquire(blocking=False):
+            self.contendidas += 1  # bajo el GIL, sin lock propio: solo es una estimación
+            self._lock.acquire()
+        try:
+            self.visit_count += 1
+            today = datetime.now().date()
+            if today not in self.daily_visits:
+                self.daily_visits[today] = 0
+            self.daily_visits[today] += 1
+            self.active_sessions[session_id] = {
+                'ip_address': ip_address,
+                'user_agent': user_agent,
+                'last_activity': datetime.now(),
+                'page': page
+            }
+            if page:
+                if page not in self.page_views:
+                    self.page_views[page] = 0
+                self.page_views[page] += 1
+        finally:
+            self._lock.release()
+
+
+def correr(registrar, hilos, visitas):
+    """(visitas por segundo, p99 en µs) con `hilos` llamando a `registrar` a la vez"""
+    latencias = []
+    barrera = threading.Barrier(hilos + 1)
+
+    def trabajador(n):
+        propias = []
+        reloj = time.perf_counter
+        barrera.wait()
+        for i in range(visitas):
+            inicio = reloj()
+            registrar(f'sesion-{n}-{i % 500}', '10.0.0.1', 'Mozilla/5.0', f'/api/public/productos/{i % 50}')
+            propias.append(reloj() - inicio)
+        latencias.extend(propias)
+
+    trabajadores = [threading.Thread(target=trabajador, args=(n,)) for n in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for t in trabajadores:
+        t.join()
+    duracion = time.perf_counter() - inicio
+    latencias.sort()
+    return hilos * visitas / duracion, latencias[int(len(latencias) * 0.99)] * 1e6
+
+
+def main():
+    args = parse_args()
+    from Utils.singleton import stats_manager
+    from Utils.visit_recorder import VisitRecorder
+
+    print(f"👥 {args.visits} visitas por hilo (backend en memoria)")
+    print(f"   {'hilos':>5} {'modo':22} {'visitas/s':>11} {'p99 µs':>8} {'lock ocupado':>13} {'volcado ms':>11}")
+    for hilos in args.threads:
+        anterior = RegistroConLock()
+        por_segundo, p99 = correr(anterior.register_visit, hilos, args.visits)
+        ocupado = anterior.contendidas / (hilos * args.visits) * 100
+        print(f"   {hilos:5d} {'lock global':22} {por_segundo:11.0f} {p99:8.1f} {ocupado:12.1f}% {'-':>11}")
+
+        stats_manager.flusher.stop()  # el volcado se mide aparte
+        stats_manager.recorder = VisitRecorder(capacity=args.visits)
+        total_antes = stats_manager.get_visit_count()
+        por_segundo, p99 = correr(stats_manager.recorder.record, hilos, args.visits)
+        inicio = time.perf_counter()
+        stats_manager.flush()
+        volcado = (time.perf_counter() - inicio) * 1000
+        recibidas = stats_manager.get_visit_count() - total_antes
+        print(f"   {hilos:5d} {'buffer por hilo':22} {por_segundo:11.0f} {p99:8.1f} {0:12.1f}% {volcado:11.1f}"
+              f"  ({recibidas} en el backend, {stats_manager.recorder.dropped} descartadas)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Comprobar que los contadores del dashboard no se desvían.
+
+Crea una base SQLite temporal, hace altas, cambios y bajas (varios sobre
+objetos expirados por un commit previo, el caso normal en una petición que
+carga un registro y lo modifica después) y al final compara los contadores
+con los conteos reales: reconcile() no debe encontrar ninguna diferencia.
+
+    python check_dashboard_counters.py
+"""
+import sys
+import tempfile
+
+
+def main():
+    directorio = tempfile.mkdtemp()
+
+    from Config.config import Config
+    from app import create_app
+    from DataBase.models.database import db
+    from DataBase.models.producto import Producto, CategoriaProducto
+    from DataBase.models.servicio import Servicio, SolicitudServicio
+    from DataBase.models.contacto import Contacto
+    from Utils.dashboard_counters import dashboard_counters
+
+    class CheckConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{directorio}/check.db'
+        STATS_SQLITE_PATH = f'{directorio}/stats.sqlite3'
+        ASSETS_BUILD_ON_STARTUP = False
+
+    app = create_app(CheckConfig)
+    with app.app_context():
+        categorias = [CategoriaProducto(nombre='Redes'), CategoriaProducto(nombre='Energía')]
+        servicio = Servicio(nombre='Cableado estructurado', descripcion='Instalación', area='telecomunicaciones')
+        db.session.add_all(categorias + [servicio])
+        db.session.flush()
+        productos = [Producto(nombre=f'Producto {i}', sku=f'CHK-{i}', precio=10, categoria_id=categorias[0].id)
+                     for i in range(6)]
+        solicitud = SolicitudServicio(servicio_id=servicio.id, nombre_cliente='Ana', email='ana@example.com',
+                                      mensaje='Cotización')
+        db.session.add_all(productos + [solicitud, Contacto(nombre='Bob', email='bob@example.com', mensaje='Hola')])
+        db.session.commit()
+        dashboard_counters.reconcile()
+
+        # Después del commit todos los objetos están expirados
+        productos[0].estatus = 'agotado'
+        productos[1].categoria_id = categorias[1].id
+        productos[2].activo = False
+        solicitud.estado = 'completado'
+        db.session.commit()
+
+        productos[2].activo = True
+        productos[3].estatus = 'agotado'
+        productos[3].estatus = 'disponible'
+        db.session.delete(productos[4])
+        db.session.commit()
+
+        servicio.activo = False
+        db.session.delete(productos[5])
+        db.session.commit()
+
+        deriva = dashboard_counters.reconcile()
+        if deriva:
+            print(f"❌ Contadores desviados: {deriva}")
+            return 1
+        print("✅ Contadores del dashboard sin desviación")
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
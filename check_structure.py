@@ -13,7 +13,8 @@ def check_structure():
         'DataBase':{
         'models': [
             '__init__.py', 'database.py', 'administrador.py', 'producto.py',
-            'servicio.py', 'cliente.py', 'contacto.py', 'noticia.py'
+            'servicio.py', 'cliente.py', 'contacto.py', 'noticia.py',
+            'estadistica.py', 'busqueda.py'
         ]},
         'Routes': [
             '__init__.py', 'auth.py', 'productos.py', 'servicios.py',
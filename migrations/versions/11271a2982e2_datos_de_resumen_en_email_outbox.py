@@ -0,0 +1,28 @@
+"""Campos del evento para los resúmenes (email_outbox.datos)
+
+Revision ID: 11271a2982e2
+Revises: 49ef3b359e03
+Create Date: 2026-10-18 19:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '11271a2982e2'
+down_revision = '49ef3b359e03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() no agrega columnas a una tabla que ya existe
+    columnas = {columna['name'] for columna in sa.inspect(op.get_bind()).get_columns('email_outbox')}
+    if 'datos' not in columnas:
+        op.add_column('email_outbox', sa.Column('datos', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('email_outbox') as batch_op:
+        batch_op.drop_column('datos')
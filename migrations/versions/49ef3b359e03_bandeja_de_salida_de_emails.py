@@ -0,0 +1,52 @@
+"""Bandeja de salida de emails (email_outbox)
+
+Revision ID: 49ef3b359e03
+Revises: 7e2d44611abd
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '49ef3b359e03'
+down_revision = '7e2d44611abd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'email_outbox' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'email_outbox',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+            sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+            sa.Column('activo', sa.Boolean(), nullable=True),
+            sa.Column('tipo', sa.String(length=50), nullable=False),
+            sa.Column('asunto', sa.String(length=255), nullable=False),
+            sa.Column('remitente', sa.String(length=255), nullable=True),
+            sa.Column('destinatarios', sa.JSON(), nullable=False),
+            sa.Column('reply_to', sa.String(length=255), nullable=True),
+            sa.Column('cuerpo_texto', sa.Text(), nullable=True),
+            sa.Column('cuerpo_html', sa.Text(), nullable=True),
+            sa.Column('estado', sa.String(length=20), nullable=False),
+            sa.Column('intentos', sa.Integer(), nullable=False),
+            sa.Column('proximo_intento', sa.DateTime(), nullable=False),
+            sa.Column('bloqueado_hasta', sa.DateTime(), nullable=True),
+            sa.Column('reclamo', sa.String(length=32), nullable=True),
+            sa.Column('ultimo_error', sa.Text(), nullable=True),
+            sa.Column('fecha_envio', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    indices = {indice['name'] for indice in sa.inspect(bind).get_indexes('email_outbox')}
+    if 'ix_email_outbox_estado_proximo' not in indices:
+        op.create_index('ix_email_outbox_estado_proximo', 'email_outbox',
+                        ['estado', 'proximo_intento'], unique=False)
+
+
+def downgrade():
+    op.drop_table('email_outbox')
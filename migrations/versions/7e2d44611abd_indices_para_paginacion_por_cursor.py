@@ -0,0 +1,49 @@
+"""Índices (fecha, id) para la paginación por cursor
+
+Revision ID: 7e2d44611abd
+Revises: 883e83ad7a5f
+Create Date: 2026-10-18 19:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e2d44611abd'
+down_revision = '883e83ad7a5f'
+branch_labels = None
+depends_on = None
+
+
+INDICES = (
+    ('contactos', 'ix_contactos_fecha_creacion_id', ['fecha_creacion', 'id']),
+    ('sugerencias', 'ix_sugerencias_fecha_creacion_id', ['fecha_creacion', 'id']),
+    ('solicitudes_servicios', 'ix_solicitudes_servicios_fecha_creacion_id', ['fecha_creacion', 'id']),
+    ('noticias', 'ix_noticias_fecha_publicacion_id', ['fecha_publicacion', 'id']),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # El cursor de noticias compara fecha_publicacion: una fila con NULL
+    # quedaría fuera de todas las páginas. Se rellena con la fecha de creación.
+    bind.execute(sa.text(
+        'UPDATE noticias SET fecha_publicacion = COALESCE(fecha_creacion, CURRENT_TIMESTAMP) '
+        'WHERE fecha_publicacion IS NULL'
+    ))
+    with op.batch_alter_table('noticias') as batch_op:
+        batch_op.alter_column('fecha_publicacion', existing_type=sa.DateTime(), nullable=False)
+
+    inspector = sa.inspect(bind)
+    for tabla, nombre, columnas in INDICES:
+        if nombre not in {indice['name'] for indice in inspector.get_indexes(tabla)}:
+            op.create_index(nombre, tabla, columnas, unique=False)
+
+
+def downgrade():
+    for tabla, nombre, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
+    with op.batch_alter_table('noticias') as batch_op:
+        batch_op.alter_column('fecha_publicacion', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,58 @@
+"""Agregados de visitas por periodo (visitas_rollup)
+
+Revision ID: 883e83ad7a5f
+Revises: c03eb21def66
+Create Date: 2026-10-18 18:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '883e83ad7a5f'
+down_revision = 'c03eb21def66'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if 'visitas_rollup' not in inspector.get_table_names():
+        op.create_table(
+            'visitas_rollup',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+            sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+            sa.Column('activo', sa.Boolean(), nullable=True),
+            sa.Column('granularidad', sa.String(length=10), nullable=False),
+            sa.Column('periodo', sa.DateTime(), nullable=False),
+            sa.Column('visitas', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    else:
+        # La tabla creada por create_all era de solo inserción: una fila por volcado.
+        # Se compacta a una fila por (granularidad, periodo) antes del índice único.
+        duplicados = bind.execute(sa.text(
+            'SELECT granularidad, periodo, SUM(visitas), MIN(id) FROM visitas_rollup '
+            'GROUP BY granularidad, periodo HAVING COUNT(*) > 1'
+        )).all()
+        for granularidad, periodo, visitas, conservar in duplicados:
+            bind.execute(sa.text('UPDATE visitas_rollup SET visitas = :visitas WHERE id = :id'),
+                         {'visitas': visitas, 'id': conservar})
+            bind.execute(sa.text(
+                'DELETE FROM visitas_rollup WHERE granularidad = :granularidad '
+                'AND periodo = :periodo AND id <> :id'
+            ), {'granularidad': granularidad, 'periodo': periodo, 'id': conservar})
+
+    indices = {indice['name'] for indice in sa.inspect(bind).get_indexes('visitas_rollup')}
+    if 'ix_visitas_rollup_granularidad_periodo' in indices:
+        op.drop_index('ix_visitas_rollup_granularidad_periodo', table_name='visitas_rollup')
+    if 'uq_visitas_rollup_granularidad_periodo' not in indices:
+        op.create_index('uq_visitas_rollup_granularidad_periodo', 'visitas_rollup',
+                        ['granularidad', 'periodo'], unique=True)
+
+
+def downgrade():
+    op.drop_table('visitas_rollup')
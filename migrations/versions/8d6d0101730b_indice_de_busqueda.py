@@ -0,0 +1,44 @@
+"""Índice invertido de búsqueda (indice_busqueda)
+
+Revision ID: 8d6d0101730b
+Revises: acdca1c2f4e9
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d6d0101730b'
+down_revision = 'acdca1c2f4e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'indice_busqueda' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'indice_busqueda',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+            sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+            sa.Column('activo', sa.Boolean(), nullable=True),
+            sa.Column('termino', sa.String(length=64), nullable=False),
+            sa.Column('tipo', sa.String(length=20), nullable=False),
+            sa.Column('documento_id', sa.Integer(), nullable=False),
+            sa.Column('peso', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    indices = {indice['name'] for indice in sa.inspect(bind).get_indexes('indice_busqueda')}
+    if 'ix_indice_busqueda_termino' not in indices:
+        op.create_index('ix_indice_busqueda_termino', 'indice_busqueda', ['termino'], unique=False)
+    if 'ix_indice_busqueda_documento' not in indices:
+        op.create_index('ix_indice_busqueda_documento', 'indice_busqueda',
+                        ['tipo', 'documento_id'], unique=False)
+
+
+def downgrade():
+    op.drop_table('indice_busqueda')
@@ -0,0 +1,36 @@
+"""Contadores materializados del dashboard (contadores_dashboard)
+
+Revision ID: acdca1c2f4e9
+Revises: 11271a2982e2
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'acdca1c2f4e9'
+down_revision = '11271a2982e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'contadores_dashboard' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'contadores_dashboard',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+            sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+            sa.Column('activo', sa.Boolean(), nullable=True),
+            sa.Column('clave', sa.String(length=120), nullable=False),
+            sa.Column('valor', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('clave')
+        )
+
+
+def downgrade():
+    op.drop_table('contadores_dashboard')
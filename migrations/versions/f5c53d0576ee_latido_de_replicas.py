@@ -0,0 +1,34 @@
+"""Latido para medir el retraso de las réplicas (replica_latido)
+
+Revision ID: f5c53d0576ee
+Revises: 8d6d0101730b
+Create Date: 2026-10-18 20:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c53d0576ee'
+down_revision = '8d6d0101730b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'replica_latido' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'replica_latido',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+            sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+            sa.Column('activo', sa.Boolean(), nullable=True),
+            sa.Column('marca', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('replica_latido')
@@ -0,0 +1,73 @@
+"""
+Réplica de prueba para SQLite.
+
+Copia periódicamente una base de datos SQLite (el "primario") sobre una o
+más copias que hacen de réplicas, con un retraso configurable, para probar
+en local el enrutamiento de lecturas a réplicas sin MySQL:
+
+    python replicate_sqlite.py /tmp/primario.db /tmp/replica.db --delay 2
+    DATABASE_URL=sqlite:////tmp/primario.db DB_REPLICA_URIS=sqlite:////tmp/replica.db python run.py
+
+Cada copia es una instantánea completa (API de backup de sqlite3) que se
+aplica `--delay` segundos después de tomarla, así que la réplica va siempre
+ese tiempo por detrás, igual que una réplica asíncrona con retraso.
+"""
+import argparse
+import sqlite3
+import time
+from collections import deque
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Replicar una base de datos SQLite con retraso')
+    parser.add_argument('primario', help='Archivo SQLite de origen')
+    parser.add_argument('replicas', nargs='+', help='Archivos SQLite de destino')
+    parser.add_argument('--delay', type=float, default=0, help='Retraso de replicación en segundos')
+    parser.add_argument('--interval', type=float, default=0.5, help='Segundos entre instantáneas')
+    parser.add_argument('--once', action='store_true', help='Copiar una vez y salir')
+    return parser.parse_args()
+
+
+def instantanea(ruta):
+    """Copia en memoria y consistente de la base de datos"""
+    origen = sqlite3.connect(ruta, timeout=30)
+    copia = sqlite3.connect(':memory:', check_same_thread=False)
+    try:
+        origen.backup(copia)
+    finally:
+        origen.close()
+    return copia
+
+
+def aplicar(copia, rutas):
+    for ruta in rutas:
+        destino = sqlite3.connect(ruta, timeout=30)
+        try:
+            copia.backup(destino)
+        finally:
+            destino.close()
+    copia.close()
+
+
+def main():
+    args = parse_args()
+    if args.once:
+        aplicar(instantanea(args.primario), args.replicas)
+        print(f"✅ {len(args.replicas)} réplica(s) copiadas de {args.primario}")
+        return
+
+    print(f"🔁 Replicando {args.primario} -> {', '.join(args.replicas)} "
+          f"(retraso {args.delay:g} s, cada {args.interval:g} s). Ctrl+C para salir")
+    pendientes = deque()  # (momento de la instantánea, copia)
+    try:
+        while True:
+            pendientes.append((time.monotonic(), instantanea(args.primario)))
+            while pendientes and time.monotonic() - pendientes[0][0] >= args.delay:
+                aplicar(pendientes.popleft()[1], args.replicas)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n👋 Replicación detenida")
+
+
+if __name__ == '__main__':
+    main()
@@ -89,6 +89,7 @@ function renderNoticias(noticias) {
         const resumen =
             n.resumen ||
             n.descripcion ||
+            (n.extracto && n.extracto.slice(0, 180) + '...') ||
             (n.contenido && n.contenido.slice(0, 180) + '...') ||
             '';
         const fechaPub = n.fecha_publicacion || n.fecha || null;
@@ -14,6 +14,7 @@ const searchInputEl = document.getElementById('product-search');
 const categorySelectEl = document.getElementById('product-category');
 const perPageSelectEl = document.getElementById('product-per-page');
 const searchBtnEl = document.getElementById('product-search-btn');
+const searchSuggestionsEl = document.getElementById('product-search-suggestions');
 const refreshBtnEl = document.getElementById('products-refresh-btn');
 
 // Estado de filtros / paginación
@@ -56,6 +57,47 @@ function mapProduct(p) {
     };
 }
 
+// ==================== AUTOCOMPLETADO ====================
+
+let autocompleteTimer = null;
+let autocompleteController = null;
+
+function cargarSugerencias(texto) {
+    if (!searchSuggestionsEl) return;
+    clearTimeout(autocompleteTimer);
+
+    if (texto.length < 2) {
+        searchSuggestionsEl.innerHTML = '';
+        return;
+    }
+
+    // Esperar a que el usuario deje de teclear y cancelar la petición anterior
+    autocompleteTimer = setTimeout(async () => {
+        if (autocompleteController) autocompleteController.abort();
+        autocompleteController = new AbortController();
+
+        try {
+            const qs = buildQuery({ q: texto, limit: 8 });
+            const resp = await fetch(`/api/public/autocomplete?${qs}`, {
+                signal: autocompleteController.signal
+            });
+            const data = await resp.json();
+            if (!data.success) return;
+
+            searchSuggestionsEl.innerHTML = '';
+            (data.sugerencias || []).forEach(s => {
+                const option = document.createElement('option');
+                option.value = s.texto;
+                searchSuggestionsEl.appendChild(option);
+            });
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Error cargando sugerencias:', error);
+            }
+        }
+    }, 150);
+}
+
 // ==================== CARGA DE CATEGORÍAS ====================
 
 async function cargarCategorias() {
@@ -483,6 +525,10 @@ document.addEventListener('DOMContentLoaded', () => {
                 cargarProductos(1);
             }
         });
+
+        searchInputEl.addEventListener('input', () => {
+            cargarSugerencias(searchInputEl.value.trim());
+        });
     }
 
     // Cambio de categoría
@@ -0,0 +1,99 @@
+"""
+Prueba de carga del pool de conexiones.
+
+Lanza N hilos que durante unos segundos piden una conexión, ejecutan una
+consulta y la retienen un momento (simulando una petición), y al final
+muestra el rendimiento y la telemetría del pool (esperas, overflow,
+timeouts, invalidaciones).
+
+    python stress_pool.py --threads 50 --seconds 10
+    python stress_pool.py --uri sqlite:////tmp/pool.db --pool-size 5 --max-overflow 5
+"""
+import argparse
+import os
+import threading
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Prueba de carga del pool de conexiones')
+    parser.add_argument('--uri', help='Base de datos (por defecto la de Config)')
+    parser.add_argument('--threads', type=int, default=50, help='Hilos concurrentes')
+    parser.add_argument('--seconds', type=float, default=10, help='Duración de la prueba')
+    parser.add_argument('--hold', type=float, default=0.02, help='Segundos que cada hilo retiene la conexión')
+    parser.add_argument('--pool-size', type=int, help='DB_POOL_SIZE')
+    parser.add_argument('--max-overflow', type=int, help='DB_MAX_OVERFLOW')
+    parser.add_argument('--pool-timeout', type=int, help='DB_POOL_TIMEOUT (segundos)')
+    parser.add_argument('--invalidate-every', type=int, default=0,
+                        help='Invalidar una de cada N conexiones (simula conexiones caídas)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    for variable, valor in (('DB_POOL_SIZE', args.pool_size), ('DB_MAX_OVERFLOW', args.max_overflow),
+                            ('DB_POOL_TIMEOUT', args.pool_timeout)):
+        if valor is not None:
+            os.environ[variable] = str(valor)
+
+    # Importar después de fijar las variables de entorno que lee Config
+    from sqlalchemy import exc, text
+    from Config.config import Config
+    from app import create_app
+    from DataBase.models.database import db
+    from Utils.db_pool import pool_monitor
+
+    class StressConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.uri or Config.SQLALCHEMY_DATABASE_URI
+        SQLALCHEMY_ENGINE_OPTIONS = dict(Config.SQLALCHEMY_ENGINE_OPTIONS)
+        ASSETS_BUILD_ON_STARTUP = False
+
+    app = create_app(StressConfig)
+
+    resultados = {'ok': 0, 'timeouts': 0, 'errores': 0}
+    lock = threading.Lock()
+    fin = time.monotonic() + args.seconds
+
+    def trabajador():
+        with app.app_context():
+            engine = db.engine
+            n = 0
+            while time.monotonic() < fin:
+                n += 1
+                try:
+                    with engine.connect() as conexion:
+                        conexion.execute(text('SELECT 1')).scalar()
+                        time.sleep(args.hold)
+                        if args.invalidate_every and n % args.invalidate_every == 0:
+                            conexion.invalidate()
+                    clave = 'ok'
+                except exc.TimeoutError:
+                    clave = 'timeouts'
+                except Exception as e:
+                    print(f"❌ {type(e).__name__}: {e}")
+                    clave = 'errores'
+                with lock:
+                    resultados[clave] += 1
+
+    print(f"🔧 {args.threads} hilos, {args.seconds:g} s, retención {args.hold * 1000:g} ms")
+    hilos = [threading.Thread(target=trabajador) for _ in range(args.threads)]
+    inicio = time.monotonic()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.monotonic() - inicio
+
+    print("=" * 50)
+    print(f"✅ Consultas: {resultados['ok']} ({resultados['ok'] / duracion:.0f}/s)")
+    print(f"⏱️  Timeouts del pool: {resultados['timeouts']}")
+    print(f"❌ Errores: {resultados['errores']}")
+    with app.app_context():
+        for bind, estado in pool_monitor.stats().items():
+            print(f"\n📊 Pool {bind}:")
+            for clave, valor in estado.items():
+                print(f"   {clave}: {valor}")
+
+
+if __name__ == '__main__':
+    main()